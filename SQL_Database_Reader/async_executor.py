@@ -0,0 +1,231 @@
+"""This program runs sql_program's database calls from asyncio without blocking
+the event loop. Every AsyncExecutor owns one connection and one thread that
+runs all of its statements, so a front end can keep responding while a long
+query runs. It also gets progress reports and can cancel the query.
+
+Instructions:
+    Include Northwind.db in the current directory.
+
+    Run "python async_executor.py Orders" to read Orders while progress is
+    printed, and add "--timeout 0.5" to cancel the read if it takes longer.
+    Press Ctrl+C to cancel it by hand.
+
+Usage:
+    async with AsyncExecutor("Northwind.db") as executor:
+        task = asyncio.create_task(executor.get_table_data("Orders", progress))
+        ...
+        task.cancel()  # interrupts the SELECT in SQLite
+
+Output:
+    The number of rows read, or a message if the read was cancelled.
+
+"""
+import argparse
+import asyncio
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import sql_program
+
+PROGRESS_STEPS = 100000
+
+
+class Job:
+    """One call waiting for or running on an executor's thread."""
+
+    def __init__(self, call, progress, loop):
+        self.call = call
+        self.progress = progress
+        self.loop = loop
+        self.steps = 0
+        self.cancelled = False
+
+
+class AsyncExecutor:
+    """Runs database calls on a thread of its own and awaits them.
+
+    The thread opens a ConnectionManager on first use and owns it, so every
+    call reuses the same connection, schema catalog and result cache. Calls
+    run one at a time in the order they are made.
+
+    Cancelling the task awaiting a call stops it: a call that has not started
+    never runs, and a running statement is stopped with Connection.interrupt()
+    and fails in SQLite with its changes undone.
+
+    Args:
+        database (str): database name
+        profile (str): name of the sql_program.PROFILES settings
+        progress_steps (int): SQLite virtual machine steps between progress
+        reports
+
+    """
+
+    def __init__(self, database, profile='default', progress_steps=PROGRESS_STEPS):
+        assert progress_steps > 0, "Progress steps must be at least 1."
+
+        self.database = database
+        self.profile = profile
+        self.progress_steps = progress_steps
+        self._manager = None
+        self._running = None
+        self._lock = threading.Lock()
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def run(self, call, progress=None):
+        """Runs call(manager) on the executor's thread.
+
+        Args:
+            call (callable): takes the executor's ConnectionManager, which can
+            be passed to any sql_program function as its database
+            progress (callable): called on the event loop with the steps run
+            so far, every progress_steps steps, or None
+
+        Returns:
+            The value call returns.
+
+        Raises:
+            asyncio.CancelledError: the awaiting task was cancelled.
+
+        """
+        job = Job(call, progress, asyncio.get_running_loop())
+        future = self._thread.submit(self._run_job, job)
+
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            self._cancel(job)
+            raise
+
+    async def get_tables(self, progress=None):
+        """Returns: list: names of tables in the database."""
+        return await self.run(sql_program.get_tables, progress)
+
+    async def get_table_data(self, selected_table, progress=None):
+        """Gets the field names and every row of a table.
+
+        Args:
+            selected_table (str): table name
+            progress (callable): called with the steps run so far, or None
+
+        Returns:
+            list: [field names, rows]
+
+        """
+        return await self.run(
+            lambda database: sql_program.get_table_data(selected_table, database), progress)
+
+    async def execute_sql(self, sql, values=None, progress=None):
+        """Executes and commits one statement, rolled back if it fails.
+
+        Args:
+            sql (str): a valid SQL statement
+            values (list): values for its placeholders, or None
+            progress (callable): called with the steps run so far, or None
+
+        Returns:
+            None.
+
+        """
+        return await self.run(
+            lambda database: sql_program.execute_sql(sql, database, values), progress)
+
+    async def close(self):
+        """Closes the connection once calls already made have finished."""
+        await asyncio.wrap_future(self._thread.submit(self._close_manager))
+        self._thread.shutdown()
+
+    def _run_job(self, job):
+        """Runs a job on the executor's thread with its progress handler set."""
+        if self._manager is None:
+            self._manager = sql_program.ConnectionManager(self.database, pool_size=1,
+                                                          profile=self.profile)
+
+        with self._lock:
+            if job.cancelled:
+                raise asyncio.CancelledError()
+            self._running = job
+
+        try:
+            with self._manager.writer() as connection:
+                connection.set_progress_handler(lambda: self._report(job),
+                                                self.progress_steps)
+                try:
+                    result = job.call(self._manager)
+                finally:
+                    connection.set_progress_handler(None, 0)
+        finally:
+            with self._lock:
+                self._running = None
+
+        if job.cancelled:
+            raise asyncio.CancelledError()
+
+        return result
+
+    def _report(self, job):
+        """Progress handler: reports steps and returns 1 to stop a cancelled job."""
+        job.steps += self.progress_steps
+        if job.progress is not None:
+            job.loop.call_soon_threadsafe(job.progress, job.steps)
+
+        return 1 if job.cancelled else 0
+
+    def _cancel(self, job):
+        """Marks a job cancelled and interrupts it if it is running."""
+        with self._lock:
+            job.cancelled = True
+            if self._running is job:
+                self._manager.interrupt()
+
+    def _close_manager(self):
+        if self._manager is not None:
+            self._manager.close()
+            self._manager = None
+
+
+async def read_table(database, selected_table, timeout=None):  # pragma: no cover
+    """Reads a table, printing progress, and cancels it after timeout seconds."""
+    start = time.perf_counter()
+
+    def progress(steps):
+        print(f"\r{steps:,} steps in {time.perf_counter() - start:.2f}s", end='', flush=True)
+
+    async with AsyncExecutor(database) as executor:
+        try:
+            field_names, rows = await asyncio.wait_for(
+                executor.get_table_data(selected_table, progress), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            print(f"\nCancelled after {time.perf_counter() - start:.2f}s")
+            return
+        except sqlite3.Error:
+            return
+
+    print(f"\nRead {len(rows)} rows of {len(field_names)} columns "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+def main():  # pragma: no cover
+    """Reads the table named on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("table", help="table to read")
+    parser.add_argument("--database", default="Northwind.db",
+                        help="database to read (default Northwind.db)")
+    parser.add_argument("--timeout", type=float, help="seconds before the read is cancelled")
+    arguments = parser.parse_args()
+
+    try:
+        asyncio.run(read_table(arguments.database, arguments.table, arguments.timeout))
+    except KeyboardInterrupt:
+        print("\nCancelled")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,321 @@
+"""This module runs sql_program without prompts. It reads a script of operations,
+one per line, and runs them all on one connection. Writes are grouped into
+transactions of a chosen size, so a script of thousands of changes runs at
+machine speed.
+
+Script:
+    Words are split like a shell command line, so quote a value with spaces.
+    Lines starting with # are comments. Filters are written as in the program's
+    Filter menu, e.g. "ShipCountry = France" or "Region is null".
+
+    list                                  print the tables
+    show TABLE [where FILTER]... [order "COLUMN [desc]"]... [limit N]
+    insert TABLE COLUMN=VALUE...
+    update TABLE set COLUMN=VALUE... where FILTER...
+    delete TABLE where FILTER...
+    export TABLE PATH                     format from .csv, .jsonl or .col, and .gz
+    commit                                commit the writes made so far
+
+    A VALUE of null is NULL. update and delete need at least one filter.
+
+Instructions:
+    Run "python sql_program.py --script changes.txt" to run a script, or
+    "python sql_program.py --script -" to read it from standard input. Add
+    "--transaction-size 500" to commit every 500 writes (0 commits once at the
+    end) and "--stop-on-error" to roll back and stop at the first failure.
+
+Output:
+    What list and show print, then a report of operations per second on
+    standard error, so the output can be piped.
+
+"""
+import shlex
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+
+import sql_program
+import table_export
+
+TRANSACTION_SIZE = 1000
+
+ScriptReport = namedtuple('ScriptReport', ['operations', 'rows', 'errors', 'seconds'])
+
+
+def parse_assignments(words, columns):
+    """Parses COLUMN=VALUE words.
+
+    Args:
+        words (list): words of the form column=value
+        columns (list): columns of the table
+
+    Returns:
+        tuple: (list of columns, list of values) with NULL as None.
+
+    Raises:
+        ValueError: If a word is not an assignment or names no column.
+
+    """
+    fields = []
+    values = []
+    for word in words:
+        name, separator, value = word.partition('=')
+        if not separator:
+            raise ValueError(f"Expected column=value: {word}")
+        fields.append(sql_program.match_column(name.strip(), columns))
+        values.append(None if value.lower() == 'null' else value)
+
+    return fields, values
+
+
+def split_clauses(words, keywords):
+    """Groups the words after each keyword.
+
+    Args:
+        words (list): words following the table name
+        keywords (set): clause names, e.g. {'where', 'order', 'limit'}
+
+    Returns:
+        list: (keyword, word) pairs in order.
+
+    Raises:
+        ValueError: If a word comes before the first keyword.
+
+    """
+    clauses = []
+    keyword = None
+    for word in words:
+        if word.lower() in keywords:
+            keyword = word.lower()
+            continue
+        if keyword is None:
+            raise ValueError(f"Expected one of {', '.join(sorted(keywords))}: {word}")
+        clauses.append((keyword, word))
+
+    return clauses
+
+
+def run_list(words, database, sink):
+    """list: prints the tables, one per line."""
+    for selected_table in sql_program.get_tables(database):
+        sink.write(f"{selected_table}\n")
+    return 0
+
+
+def run_show(words, database, sink):
+    """show: displays the rows of a table that match the filters."""
+    selected_table = words[0]
+    field_names = sql_program.get_field_names(selected_table, database)
+
+    filters, order_by, limit = [], [], sql_program.PAGE_SIZE
+    for keyword, word in split_clauses(words[1:], {'where', 'order', 'limit'}):
+        if keyword == 'where':
+            filters.append(sql_program.parse_filter(word, field_names))
+        elif keyword == 'order':
+            order_by.append(sql_program.parse_order(word, field_names))
+        else:
+            limit = int(word)
+
+    rows = sql_program.query_table(selected_table, database, filters, order_by, limit)[1]
+    if rows:
+        sql_program.display_table(selected_table, rows, field_names, sink=sink)
+    else:
+        sink.write(f"No rows in {selected_table} match.\n")
+    return 0
+
+
+def run_insert(words, database, connection):
+    """insert: adds one row. Returns: int: rows inserted."""
+    selected_table = words[0]
+    field_names = sql_program.get_field_names(selected_table, database)
+    fields, values = parse_assignments(words[1:], field_names)
+
+    columns = ', '.join(f'"{field}"' for field in fields)
+    placeholders = ', '.join('?' * len(fields))
+    sql = f"INSERT INTO {selected_table}({columns}) VALUES({placeholders});"
+    return connection.execute(sql, values).rowcount
+
+
+def run_update(words, database, connection):
+    """update: sets columns of every row that matches. Returns: int: rows changed."""
+    selected_table = words[0]
+    field_names = sql_program.get_field_names(selected_table, database)
+    clauses = split_clauses(words[1:], {'set', 'where'})
+
+    fields, values = parse_assignments([word for keyword, word in clauses if keyword == 'set'],
+                                       field_names)
+    filters = [sql_program.parse_filter(word, field_names)
+               for keyword, word in clauses if keyword == 'where']
+    if not fields or not filters:
+        raise ValueError("update needs set column=value and at least one where filter.")
+
+    conditions, filter_values = sql_program.build_where(filters)
+    assignments = ', '.join(f'"{field}" = ?' for field in fields)
+    sql = f"UPDATE {selected_table} SET {assignments} WHERE {conditions};"
+    return connection.execute(sql, values + filter_values).rowcount
+
+
+def run_delete(words, database, connection):
+    """delete: removes every row that matches. Returns: int: rows deleted."""
+    selected_table = words[0]
+    field_names = sql_program.get_field_names(selected_table, database)
+    filters = [sql_program.parse_filter(word, field_names)
+               for _, word in split_clauses(words[1:], {'where'})]
+    if not filters:
+        raise ValueError("delete needs at least one where filter.")
+
+    conditions, values = sql_program.build_where(filters)
+    return connection.execute(f"DELETE FROM {selected_table} WHERE {conditions};",
+                              values).rowcount
+
+
+def run_export(words, database, sink):
+    """export: writes a table to a file named by the second word."""
+    selected_table, path = words[0], words[1]
+    name = path[:-3] if path.endswith('.gz') else path
+    formats = {extension: file_format
+               for file_format, extension in table_export.EXTENSIONS.items()}
+    extension = name[name.rfind('.'):] if '.' in name else ''
+    if extension not in formats:
+        raise ValueError(f"Expected a file ending in {', '.join(formats)}: {path}")
+
+    report = table_export.export_query(f"SELECT * FROM {selected_table};", None, database,
+                                       path, formats[extension], path.endswith('.gz'))
+    sink.write(f"Exported {report.rows} rows to {report.path}\n")
+    return 0
+
+
+READS = {'list': run_list, 'show': run_show, 'export': run_export}
+WRITERS = {'insert': run_insert, 'update': run_update, 'delete': run_delete}
+# Words each operation needs after its name.
+REQUIRED_WORDS = {'list': 0, 'show': 1, 'export': 2, 'insert': 2, 'update': 3, 'delete': 2,
+                  'commit': 0}
+
+
+def run_script(lines, database, transaction_size=TRANSACTION_SIZE, stop_on_error=False,
+               sink=None):
+    """Runs the operations of a script on one connection.
+
+    Args:
+        lines (iterable): lines of the script
+        database (ConnectionManager): open manager, its primary connection
+        runs every operation
+        transaction_size (int): writes per transaction, 0 for one transaction
+        stop_on_error (bool): True to roll back the open transaction and stop
+        at the first failure, False to report it and go on
+        sink (file): where list, show and export write, sys.stdout by default
+
+    Returns:
+        ScriptReport: operations maps every operation name to its (count,
+        seconds), rows counts the rows changed by committed writes, errors
+        lists the (line number, message) of every failure and seconds is the
+        time the script took.
+
+    """
+    assert transaction_size >= 0, "Transaction size must be 0 or more."
+
+    if sink is None:
+        sink = sys.stdout
+
+    operations = {}
+    errors = []
+    rows = 0
+    pending_rows = 0
+    pending = 0
+    start = time.perf_counter()
+
+    with database.writer() as connection:
+        try:
+            for line_number, line in enumerate(lines, 1):
+                try:
+                    words = shlex.split(line, comments=True)
+                except ValueError as exception:
+                    errors.append((line_number, str(exception)))
+                    if stop_on_error:
+                        raise
+                    continue
+                if not words:
+                    continue
+
+                name = words[0].lower()
+                operation_start = time.perf_counter()
+                try:
+                    if name not in REQUIRED_WORDS:
+                        raise ValueError(f"Unknown operation: {words[0]}")
+                    if len(words) - 1 < REQUIRED_WORDS[name]:
+                        raise ValueError(f"{name} is missing words, see the script help.")
+
+                    if name in WRITERS:
+                        pending_rows += WRITERS[name](words[1:], database, connection)
+                        pending += 1
+                    elif name in READS:
+                        READS[name](words[1:], database, sink)
+
+                    if name == 'commit' or (transaction_size and pending >= transaction_size):
+                        connection.commit()
+                        rows, pending_rows, pending = rows + pending_rows, 0, 0
+                except (sqlite3.Error, ValueError, AssertionError) as exception:
+                    errors.append((line_number, str(exception)))
+                    if stop_on_error:
+                        raise
+                    continue
+
+                count, seconds = operations.get(name, (0, 0.0))
+                operations[name] = (count + 1, seconds + time.perf_counter() - operation_start)
+
+            connection.commit()
+            rows += pending_rows
+        except (sqlite3.Error, ValueError, AssertionError):
+            connection.rollback()
+
+    return ScriptReport(operations, rows, errors, time.perf_counter() - start)
+
+
+def format_report(report):
+    """Returns: str: operations per second and failures of a ScriptReport."""
+    total = sum(count for count, _ in report.operations.values())
+    lines = [f"{'Operation':<12}{'count':>10}{'seconds':>12}{'ops/s':>12}"]
+    for name, (count, seconds) in report.operations.items():
+        rate = count / seconds if seconds else 0.0
+        lines.append(f"{name:<12}{count:>10}{seconds:>12.3f}{rate:>12.0f}")
+
+    rate = total / report.seconds if report.seconds else 0.0
+    lines.append(f"\n{total} operations, {report.rows} rows changed in "
+                 f"{report.seconds:.3f}s ({rate:.0f} ops/s), {len(report.errors)} failed")
+    for line_number, message in report.errors:
+        lines.append(f"    line {line_number}: {message}")
+
+    return '\n'.join(lines)
+
+
+def run_script_file(path, database_name, profile='default', transaction_size=TRANSACTION_SIZE,
+                    stop_on_error=False, read_only=False, immutable=False):
+    """Runs a script file, or standard input for '-', and reports on standard error.
+
+    Args:
+        path (str): script file, or '-' for standard input
+        database_name (str): database name
+        profile (str): name of the sql_program.PROFILES settings
+        transaction_size (int): writes per transaction, 0 for one transaction
+        stop_on_error (bool): True to stop at the first failure
+        read_only (bool): True to open the database read-only, so every
+        write of the script fails
+        immutable (bool): True to open a read-only snapshot as immutable
+
+    Returns:
+        int: exit status, 1 if any operation failed.
+
+    """
+    with sql_program.ConnectionManager(database_name, profile=profile,
+                                       read_only=read_only or immutable,
+                                       immutable=immutable) as database:
+        if path == '-':
+            report = run_script(sys.stdin, database, transaction_size, stop_on_error)
+        else:
+            with open(path, encoding='utf-8') as file:
+                report = run_script(file, database, transaction_size, stop_on_error)
+
+    print(format_report(report), file=sys.stderr)
+
+    return 1 if report.errors else 0
@@ -0,0 +1,281 @@
+"""This program benchmarks sql_program against a scaled-up Northwind database made
+by northwind_generator. It is built in a temporary directory so Northwind.db is
+never changed.
+
+Instructions:
+    Include Northwind.db in the current directory.
+
+    Run "python benchmark_sql_program.py" to benchmark at the default scale, or
+    "python benchmark_sql_program.py --scale 50 --repeat 500" for a bigger run.
+
+Output:
+    Operations per second for each operation, opening a connection per call
+    compared with sharing one ConnectionManager for the whole run.
+
+    Rows per second rendering the Orders table, printing one row at a time
+    compared with the compiled row format written in batches.
+
+    Time to bring OrderDetails up to date after one update, re-reading the
+    whole table compared with patching the changed row through TableRows.
+
+    Commit latency and OrderDetails read throughput for each of the
+    sql_program PROFILES, each on its own copy of the scaled database.
+
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import northwind_generator
+import sql_program
+
+SOURCE_DATABASE = "Northwind.db"
+
+
+def session_operations(database):
+    """Builds the operations a user session performs against database.
+
+    Args:
+        database (str or ConnectionManager): database name or open manager
+
+    Returns:
+        list: (name, callable) pairs.
+
+    """
+    insert_sql = "INSERT INTO Regions(RegionID, RegionDescription) VALUES(?,?);"
+    delete_sql = "DELETE FROM Regions WHERE RegionID = ?;"
+
+    def insert_and_delete():
+        sql_program.execute_sql(insert_sql, database, [9999, 'Benchmark'])
+        sql_program.execute_sql(delete_sql, database, [9999])
+
+    return [
+        ("get_tables", lambda: sql_program.get_tables(database)),
+        ("get_table_data Regions", lambda: sql_program.get_table_data('Regions', database)),
+        ("execute_sql insert+delete", insert_and_delete),
+    ]
+
+
+def ops_per_second(operation, repeat):
+    """Runs operation repeat times.
+
+    Returns:
+        float: operations per second.
+
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        operation()
+    elapsed = time.perf_counter() - start
+
+    return repeat / elapsed
+
+
+def run_benchmark(database, repeat):
+    """Measures every session operation per call and through a ConnectionManager.
+
+    Args:
+        database (str): database name
+        repeat (int): times each operation runs
+
+    Returns:
+        list: (name, per-call ops/sec, manager ops/sec) tuples.
+
+    """
+    results = []
+
+    # The result cache is off, so the manager is measured on connection reuse
+    # alone and repeat reads are not served from memory.
+    with sql_program.ConnectionManager(database, cache_budget=0) as manager:
+        per_call = session_operations(database)
+        managed = session_operations(manager)
+
+        for (name, before), (_, after) in zip(per_call, managed):
+            results.append((name, ops_per_second(before, repeat),
+                            ops_per_second(after, repeat)))
+
+    return results
+
+
+def legacy_format_row(row, max_length):
+    """The row formatter before compile_row_format, kept as the baseline."""
+    formatted_row = ''
+    for num, column in enumerate(row):
+        spaces = ' ' * (5 + max_length[num] - len(str(column)))
+        new_row = f"{str(column)}{spaces}"
+        formatted_row = f"{formatted_row}{new_row}"
+
+    return formatted_row
+
+
+def legacy_display_table(selected_table, rows, field_names, sink):
+    """The display_table before compile_row_format, kept as the baseline."""
+    space = ' ' * len(str(len(rows)))
+    max_length = sql_program.calculate_max_length(field_names, None)
+    for row in rows:
+        max_length = sql_program.calculate_max_length(row, max_length)
+
+    print(file=sink)
+    print(f'Table: {selected_table}\n', file=sink)
+    print(f'Row #{space}|   {legacy_format_row(field_names, max_length)}\n', file=sink)
+    for num, row in enumerate(rows):
+        print(f"{num + 1:<2}{space}   |   {legacy_format_row(row, max_length)}", file=sink)
+    print("\n", file=sink)
+
+
+def rows_per_second(render, rows, repeat):
+    """Renders rows repeat times.
+
+    Returns:
+        float: rows rendered per second.
+
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        render()
+    elapsed = time.perf_counter() - start
+
+    return len(rows) * repeat / elapsed
+
+
+def run_render_benchmark(database, selected_table, repeat):
+    """Measures rendering a whole table into a null sink before and after.
+
+    Args:
+        database (str): database name
+        selected_table (str): table to render
+        repeat (int): times the table is rendered
+
+    Returns:
+        tuple: (row count, column count, legacy rows/sec, compiled rows/sec)
+
+    """
+    field_names, rows = sql_program.get_table_data(selected_table, database)
+
+    with open(os.devnull, 'w', encoding='utf-8') as sink:
+        before = rows_per_second(
+            lambda: legacy_display_table(selected_table, rows, field_names, sink),
+            rows, repeat)
+        after = rows_per_second(
+            lambda: sql_program.display_table(selected_table, rows, field_names, sink=sink),
+            rows, repeat)
+
+    return len(rows), len(field_names), before, after
+
+
+def run_refresh_benchmark(database, repeat):
+    """Measures refreshing every row of OrderDetails after a one-row update.
+
+    Args:
+        database (str): database name
+        repeat (int): number of updates
+
+    Returns:
+        tuple: (row count, seconds per full re-read, seconds per patch)
+
+    """
+    sql = "UPDATE OrderDetails SET Quantity = Quantity + 1 WHERE rowid = ?;"
+
+    with sql_program.ConnectionManager(database) as manager:
+        table_rows = sql_program.TableRows('OrderDetails', manager, None)
+
+        start = time.perf_counter()
+        for row_id in range(1, repeat + 1):
+            sql_program.execute_sql(sql, manager, [row_id])
+            sql_program.get_table_data('OrderDetails', manager)
+        full = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for row_id in range(1, repeat + 1):
+            sql_program.execute_sql(sql, manager, [row_id])
+            table_rows.refresh()
+        patched = (time.perf_counter() - start) / repeat
+
+        table_rows.close()
+
+    return len(table_rows.rows), full, patched
+
+
+def run_profile_benchmark(database, directory, repeat):
+    """Measures commits and reads under every connection profile.
+
+    Args:
+        database (str): scaled database, copied once per profile because
+        WAL stays on in a database once set
+        directory (str): directory for the copies
+        repeat (int): commits and reads measured
+
+    Returns:
+        list: (profile, median commit ms, rows read per second) tuples.
+
+    """
+    sql = "UPDATE Regions SET RegionDescription = ? WHERE RegionID = 1;"
+    results = []
+
+    for profile in sql_program.PROFILES:
+        copy = os.path.join(directory, f"Northwind_{profile}.db")
+        shutil.copy(database, copy)
+
+        with sql_program.ConnectionManager(copy, profile=profile) as manager:
+            commits = []
+            for num in range(repeat):
+                start = time.perf_counter()
+                sql_program.execute_sql(sql, manager, [f"Eastern {num}"])
+                commits.append(time.perf_counter() - start)
+
+            rows = 0
+            start = time.perf_counter()
+            for _ in range(max(1, repeat // 20)):
+                rows += len(sql_program.read_table_data('OrderDetails', manager)[1])
+            elapsed = time.perf_counter() - start
+
+        results.append((profile, statistics.median(commits) * 1000, rows / elapsed))
+
+    return results
+
+
+def main():  # pragma: no cover
+    """Builds the scaled database and prints the benchmark results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=10,
+                        help="rows of each table compared with Northwind.db (default 10)")
+    parser.add_argument("--repeat", type=int, default=200,
+                        help="times each operation runs (default 200)")
+    parser.add_argument("--table", default="Orders",
+                        help="table rendered by the display benchmark (default Orders)")
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "Northwind_scaled.db")
+        northwind_generator.generate_database(SOURCE_DATABASE, database, arguments.scale)
+
+        print(f"Northwind x{arguments.scale:g}, {arguments.repeat} runs per operation\n")
+        print(f"{'Operation':<30}{'per call ops/s':>16}{'manager ops/s':>16}{'speedup':>10}")
+        for name, before, after in run_benchmark(database, arguments.repeat):
+            print(f"{name:<30}{before:>16.0f}{after:>16.0f}{after / before:>9.1f}x")
+
+        row_count, column_count, before, after = run_render_benchmark(
+            database, arguments.table, max(1, arguments.repeat // 100))
+        print(f"\ndisplay_table {arguments.table}: {row_count} rows, {column_count} columns\n")
+        print(f"{'Renderer':<30}{'rows/s':>16}")
+        print(f"{'print per row':<30}{before:>16.0f}")
+        print(f"{'compiled, batched':<30}{after:>16.0f}{after / before:>9.1f}x")
+
+        row_count, full, patched = run_refresh_benchmark(database, 20)
+        print(f"\nRefresh OrderDetails ({row_count} rows) after a one-row update\n")
+        print(f"{'Refresh':<30}{'ms':>16}")
+        print(f"{'full re-read':<30}{full * 1000:>16.2f}")
+        print(f"{'patch changed rows':<30}{patched * 1000:>16.2f}{full / patched:>9.1f}x")
+
+        print("\nConnection profiles\n")
+        print(f"{'Profile':<30}{'commit ms (p50)':>16}{'read rows/s':>16}")
+        for profile, commit, read in run_profile_benchmark(database, directory,
+                                                           arguments.repeat):
+            print(f"{profile:<30}{commit:>16.3f}{read:>16.0f}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,317 @@
+"""This program measures the hot paths of sql_program on tables from 1K to 10M
+rows. For every table size it reports throughput, p50 and p99 latency and peak
+memory of get_tables, get_table_data, display_table, format_row,
+calculate_max_length and single-row insert, update and delete statements.
+Results can be saved as JSON and compared with an earlier run.
+
+Each size gets its own database in a temporary directory, holding one table
+named Bench with an integer key and text, real, integer and date columns.
+Reads open their own connection the way a new session does. Writes share one
+ConnectionManager and commit one statement at a time. Row functions run on
+chunks of CHUNK_SIZE rows from the first SAMPLE_ROWS rows of the table, and
+each chunk is one latency sample.
+
+Instructions:
+    Run "python benchmark_suite.py" for 1K to 1M rows, or
+    "python benchmark_suite.py --sizes 1000 10000000 --output run.json" to save
+    a run. Run "python benchmark_suite.py --compare run.json" to flag
+    operations more than 10% slower than the saved run.
+
+Output:
+    One line per operation and table size, and the regressions when comparing.
+
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+
+import sql_program
+
+SIZES = [1000, 10000, 100000, 1000000]
+CHUNK_SIZE = 1000
+SAMPLE_ROWS = 10000
+TIME_BUDGET = 1.0
+MIN_SAMPLES = 5
+MAX_SAMPLES = 1000
+REGRESSION_THRESHOLD = 0.10
+
+Result = namedtuple('Result', ['operation', 'rows', 'samples', 'throughput', 'unit',
+                               'p50_ms', 'p99_ms', 'peak_bytes'])
+
+
+def build_database(path, rows):
+    """Writes a database holding a Bench table of the given number of rows.
+
+    Args:
+        path (str): database to create
+        rows (int): rows of the Bench table
+
+    Returns:
+        None.
+
+    """
+    connection = sqlite3.connect(path)
+    try:
+        connection.execute("CREATE TABLE Bench(BenchID INTEGER PRIMARY KEY, Name TEXT, "
+                           "Price REAL, Quantity INTEGER, OrderDate TEXT);")
+        with connection:
+            connection.execute(
+                "WITH RECURSIVE numbers(num) AS (SELECT 1 UNION ALL SELECT num + 1 "
+                "FROM numbers LIMIT ?) "
+                "INSERT INTO Bench SELECT num, 'Product ' || num, (num % 1000) / 4.0, "
+                "num % 97, date('1996-07-04', '+' || (num % 1000) || ' days') FROM numbers;",
+                [rows])
+    finally:
+        connection.close()
+
+
+def percentile(samples, fraction):
+    """Gets a percentile of samples by the nearest-rank method.
+
+    Args:
+        samples (list): measured values
+        fraction (float): 0.5 for the median, 0.99 for p99
+
+    Returns:
+        float: the value at that rank.
+
+    """
+    assert samples, "No samples to take a percentile of."
+
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(round(fraction * len(ordered), 9)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def measure(operation, items, budget=TIME_BUDGET):
+    """Runs operation until the time budget is spent, timing every run.
+
+    Args:
+        operation (callable): work to time, called with the run number
+        items (int): rows or statements handled by one run
+        budget (float): seconds to keep running after MIN_SAMPLES runs
+
+    Returns:
+        tuple: (list of seconds per run, items per second)
+
+    """
+    samples = []
+    start = time.perf_counter()
+
+    while len(samples) < MAX_SAMPLES:
+        if len(samples) >= MIN_SAMPLES and time.perf_counter() - start > budget:
+            break
+        run_start = time.perf_counter()
+        operation(len(samples))
+        samples.append(time.perf_counter() - run_start)
+
+    return samples, items * len(samples) / sum(samples)
+
+
+def peak_memory(operation):
+    """Returns: int: most bytes Python allocated at once during one run."""
+    tracemalloc.start()
+    try:
+        operation(MAX_SAMPLES)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def chunks(rows, size=CHUNK_SIZE):
+    """Returns: list: rows split into lists of at most size rows."""
+    return [rows[num:num + size] for num in range(0, len(rows), size)]
+
+
+def suite_operations(database, manager, size, rows, field_names, sink):
+    """Builds the operations measured on one database, one at a time.
+
+    Args:
+        database (str): database name, for reads on a connection of their own
+        manager (ConnectionManager): open manager for the writes
+        size (int): rows of the Bench table
+        rows (list): sample of the rows of Bench for the row functions
+        field_names (list): column names of Bench
+        sink (file): null sink display_table writes to
+
+    Returns:
+        generator: (name, operation, items per run, unit) tuples, each built
+        once the operations before it were measured.
+
+    """
+    row_chunks = chunks(rows)
+    max_length = sql_program.calculate_max_length(field_names, None)
+    for row in rows:
+        max_length = sql_program.calculate_max_length(row, max_length)
+    # Every run, and the extra run of peak_memory, gets a key of its own.
+    first_id = size + 1
+    delete_id = first_id + MAX_SAMPLES + 1
+    key = sql_program.get_key_columns('Bench', manager)
+
+    def chunk(run):
+        return row_chunks[run % len(row_chunks)]
+
+    def format_rows(run):
+        for row in chunk(run):
+            sql_program.format_row(row, max_length)
+
+    def measure_rows(run):
+        widths = None
+        for row in chunk(run):
+            widths = sql_program.calculate_max_length(row, widths)
+
+    def insert(run):
+        sql_program.execute_sql("INSERT INTO Bench VALUES(?, ?, ?, ?, ?);", manager,
+                                [first_id + run, 'Benchmark', 1.0, 1, '1996-07-04'])
+
+    def update(run):
+        sql_program.execute_sql(sql_program.update_sql('Bench', ['Quantity'], key), manager,
+                                [run, run % size + 1])
+
+    def delete(run):
+        sql_program.execute_sql(sql_program.delete_sql('Bench', key), manager,
+                                [delete_id + run])
+
+    yield "get_tables", lambda run: sql_program.get_tables(database), 1, 'ops/s'
+    yield ("get_table_data", lambda run: sql_program.get_table_data('Bench', database),
+           size, 'rows/s')
+    yield ("display_table", lambda run: sql_program.display_table(
+        'Bench', chunk(run), field_names, sink=sink), len(row_chunks[0]), 'rows/s')
+    yield "format_row", format_rows, len(row_chunks[0]), 'rows/s'
+    yield "calculate_max_length", measure_rows, len(row_chunks[0]), 'rows/s'
+    yield "insert", insert, 1, 'ops/s'
+    yield "update", update, 1, 'ops/s'
+
+    # The rows every delete removes are written only now, after the reads
+    # were measured on the table as built.
+    with manager.writer() as connection:
+        connection.executemany("INSERT INTO Bench VALUES(?, 'Delete', 1.0, 1, '1996-07-04');",
+                               [(delete_id + run,) for run in range(MAX_SAMPLES + 1)])
+        connection.commit()
+    yield "delete", delete, 1, 'ops/s'
+
+
+def run_size(directory, size, budget=TIME_BUDGET):
+    """Measures every operation on a table of the given size.
+
+    Args:
+        directory (str): directory for the database
+        size (int): rows of the Bench table
+        budget (float): seconds spent on each operation
+
+    Returns:
+        list: Result for every operation.
+
+    """
+    database = os.path.join(directory, f"bench_{size}.db")
+    build_database(database, size)
+    # The row functions need only a sample, not every row of a 10M row table.
+    field_names = sql_program.get_field_names('Bench', database)
+    rows = sql_program.get_table_page('Bench', database, None, SAMPLE_ROWS)[0]
+    results = []
+
+    with sql_program.ConnectionManager(database) as manager, \
+            open(os.devnull, 'w', encoding='utf-8') as sink:
+        for name, operation, items, unit in suite_operations(database, manager, size, rows,
+                                                             field_names, sink):
+            samples, throughput = measure(operation, items, budget)
+            # Run number MAX_SAMPLES is never used by measure, so the extra
+            # write gets a key of its own.
+            peak = peak_memory(operation)
+            results.append(Result(name, size, len(samples), throughput, unit,
+                                  percentile(samples, 0.5) * 1000,
+                                  percentile(samples, 0.99) * 1000, peak))
+
+    os.remove(database)
+
+    return results
+
+
+def run_suite(sizes=None, budget=TIME_BUDGET):
+    """Measures every operation at every table size.
+
+    Returns:
+        dict: 'environment' describing the run and 'results', a list of
+        Result dicts, ready to be written as JSON.
+
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes or SIZES:
+            results.extend(run_size(directory, size, budget))
+
+    return {
+        'environment': {'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+                        'platform': platform.platform(),
+                        'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': [result._asdict() for result in results],
+    }
+
+
+def compare_runs(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Finds operations slower than in an earlier run.
+
+    Args:
+        baseline (dict): earlier run_suite result
+        current (dict): new run_suite result
+        threshold (float): share of throughput that may be lost, 0.1 for 10%
+
+    Returns:
+        list: (operation, rows, baseline throughput, current throughput) for
+        every operation and size measured in both runs that lost more.
+
+    """
+    before = {(result['operation'], result['rows']): result['throughput']
+              for result in baseline['results']}
+
+    regressions = []
+    for result in current['results']:
+        key = (result['operation'], result['rows'])
+        if key in before and result['throughput'] < before[key] * (1 - threshold):
+            regressions.append((*key, before[key], result['throughput']))
+
+    return regressions
+
+
+def main():  # pragma: no cover
+    """Runs the suite and prints, saves or compares the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs='+', default=SIZES,
+                        help="rows of the table to measure at (default 1K to 1M)")
+    parser.add_argument("--budget", type=float, default=TIME_BUDGET,
+                        help=f"seconds spent on each operation (default {TIME_BUDGET})")
+    parser.add_argument("--output", help="file to save the results to as JSON")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare with")
+    arguments = parser.parse_args()
+
+    run = run_suite(arguments.sizes, arguments.budget)
+
+    print(f"{'Operation':<22}{'rows':>10}{'throughput':>16}{'':<7}{'p50 ms':>10}"
+          f"{'p99 ms':>10}{'peak KiB':>12}")
+    for result in run['results']:
+        print(f"{result['operation']:<22}{result['rows']:>10}{result['throughput']:>16.0f} "
+              f"{result['unit']:<6}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+              f"{result['peak_bytes'] / 1024:>12.0f}")
+
+    if arguments.output:
+        with open(arguments.output, 'w', encoding='utf-8') as file:
+            json.dump(run, file, indent=2)
+
+    if arguments.compare:
+        with open(arguments.compare, encoding='utf-8') as file:
+            regressions = compare_runs(json.load(file), run)
+        print(f"\n{len(regressions)} regressions against {arguments.compare}")
+        for operation, rows, before, after in regressions:
+            print(f"    {operation} at {rows} rows: {before:.0f} -> {after:.0f} "
+                  f"({after / before - 1:+.0%})")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,254 @@
+"""This program loads rows from a CSV or JSONL file into a table of a SQLite
+database. Rows are streamed from the file and inserted with executemany, one
+transaction per batch, so files far bigger than memory can be loaded.
+
+Instructions:
+    Include Northwind.db in the current directory.
+
+    Run "python bulk_import.py orders.csv Orders" to load orders.csv into Orders.
+    Add "--rebuild-indexes" to drop the table's own non-unique indexes during
+    the load and create them again afterwards.
+
+    CSV files need a header row naming the columns. JSONL files hold one JSON
+    object per line. Names that are not columns of the table are rejected, columns
+    missing from a row take their default value and empty CSV fields are NULL.
+
+Output:
+    Rows inserted, rows per second and every rejected row with the reason.
+
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+import sql_program
+
+BATCH_SIZE = 5000
+
+ImportReport = namedtuple('ImportReport', ['inserted', 'rejected', 'seconds',
+                                           'failed_indexes'])
+
+
+def rows_per_second(report):
+    """Returns: float: rows inserted per second for an ImportReport."""
+    return report.inserted / report.seconds if report.seconds else 0.0
+
+
+def read_records(path, file_format=None):
+    """Yields the records of a CSV or JSONL file one at a time.
+
+    Args:
+        path (str): file to read
+        file_format (str): 'csv' or 'jsonl', or None to use the file extension
+
+    Yields:
+        tuple: (line number, dict of field name to value) or (line number,
+        reason) as a str when the line cannot be read.
+
+    """
+    if file_format is None:
+        file_format = os.path.splitext(path)[1].lstrip('.').lower()
+    assert file_format in {'csv', 'jsonl'}, f"Unknown file format: {file_format}"
+
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        if file_format == 'csv':
+            reader = csv.DictReader(file)
+            for record in reader:
+                if None in record or None in record.values():
+                    yield reader.line_num, f"expected {len(reader.fieldnames)} fields"
+                    continue
+                yield reader.line_num, {name: None if value == '' else value
+                                        for name, value in record.items()}
+            return
+
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exception:
+                yield line_number, f"invalid JSON: {exception}"
+                continue
+            if not isinstance(record, dict):
+                yield line_number, "expected a JSON object"
+                continue
+            yield line_number, record
+
+
+def map_columns(field_names, columns):
+    """Matches field names from a file to the columns of a table.
+
+    SQLite column names are not case sensitive, so neither is the match.
+
+    Args:
+        field_names (iterable): names used in the file
+        columns (list): columns of the table
+
+    Returns:
+        dict: column name for every field name that matches one.
+
+    """
+    by_name = {column.lower(): column for column in columns}
+    return {name: by_name[name.lower()] for name in field_names
+            if name is not None and name.lower() in by_name}
+
+
+def insert_sql(selected_table, columns):
+    """Builds a parameterized INSERT for the given columns.
+
+    Args:
+        selected_table (str): table name
+        columns (tuple): columns given a value
+
+    Returns:
+        str: INSERT statement with one ? per column.
+
+    """
+    placeholders = ', '.join('?' * len(columns))
+    column_names = ', '.join(f'"{column}"' for column in columns)
+
+    return f"INSERT INTO {selected_table}({column_names}) VALUES({placeholders});"
+
+
+def insert_batch(connection, sql, batch, rejected):
+    """Inserts a batch in one transaction, one row at a time if any row fails.
+
+    Args:
+        connection (sqlite3.Connection): open connection
+        sql (str): parameterized INSERT statement
+        batch (list): (line number, values) pairs
+        rejected (list): (line number, reason) pairs for rows that fail
+
+    Returns:
+        int: rows inserted.
+
+    """
+    try:
+        connection.executemany(sql, [values for _, values in batch])
+        connection.commit()
+        return len(batch)
+    except sqlite3.Error:
+        connection.rollback()
+
+    inserted = 0
+    for line_number, values in batch:
+        try:
+            connection.execute(sql, values)
+            inserted += 1
+        except sqlite3.Error as exception:
+            rejected.append((line_number, str(exception)))
+    connection.commit()
+
+    return inserted
+
+
+def bulk_import(path, selected_table, database, batch_size=BATCH_SIZE,
+                rebuild_indexes=False, file_format=None):
+    """Loads every record of a CSV or JSONL file into a table.
+
+    Args:
+        path (str): file to load
+        selected_table (str): table to insert into
+        database (str or ConnectionManager): database name or open manager
+        batch_size (int): rows inserted per transaction
+        rebuild_indexes (bool): True to drop the table's non-unique CREATE INDEX
+        indexes during the load and create them again afterwards. Unique
+        indexes are kept so they still reject duplicate rows.
+        file_format (str): 'csv' or 'jsonl', or None to use the file extension
+
+    Returns:
+        ImportReport: rows inserted, rejected (line number, reason) pairs,
+        seconds taken and (index name, reason) pairs for indexes that could
+        not be created again.
+
+    """
+    assert batch_size > 0, "Batch size must be at least 1."
+
+    inserted = 0
+    rejected = []
+    failed_indexes = []
+    start = time.perf_counter()
+
+    with sql_program.connect(database, write=True) as connection:
+        table = sql_program.get_catalog(database, connection).table(selected_table)
+        indexes = [index for index in table.indexes
+                   if rebuild_indexes and index.origin == 'c' and index.sql
+                   and not index.unique]
+
+        for index in indexes:
+            connection.execute(f'DROP INDEX "{index.name}";')
+        connection.commit()
+
+        try:
+            batches = {}
+            for line_number, record in read_records(path, file_format):
+                if isinstance(record, str):
+                    rejected.append((line_number, record))
+                    continue
+
+                mapping = map_columns(record, table.columns)
+                unknown = [name for name in record if name not in mapping]
+                if unknown:
+                    rejected.append((line_number, f"no such column: {', '.join(unknown)}"))
+                    continue
+
+                columns = tuple(mapping.values())
+                batch = batches.setdefault(columns, [])
+                batch.append((line_number, list(record.values())))
+
+                if len(batch) == batch_size:
+                    inserted += insert_batch(connection, insert_sql(selected_table, columns),
+                                             batch, rejected)
+                    batch.clear()
+
+            for columns, batch in batches.items():
+                if batch:
+                    inserted += insert_batch(connection, insert_sql(selected_table, columns),
+                                             batch, rejected)
+        finally:
+            # One index that fails is reported, the rest are still created.
+            for index in indexes:
+                try:
+                    connection.execute(index.sql)
+                except sqlite3.Error as exception:
+                    failed_indexes.append((index.name, str(exception)))
+            connection.commit()
+
+    return ImportReport(inserted, rejected, time.perf_counter() - start, failed_indexes)
+
+
+def main():  # pragma: no cover
+    """Loads the file named on the command line and prints the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="CSV or JSONL file to load")
+    parser.add_argument("table", help="table to insert into")
+    parser.add_argument("--database", default="Northwind.db",
+                        help="database to load into (default Northwind.db)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"rows per transaction (default {BATCH_SIZE})")
+    parser.add_argument("--format", choices=['csv', 'jsonl'], dest="file_format",
+                        help="file format if the extension does not say")
+    parser.add_argument("--rebuild-indexes", action="store_true",
+                        help="drop the table's non-unique indexes during the load")
+    arguments = parser.parse_args()
+
+    with sql_program.ConnectionManager(arguments.database) as database:
+        report = bulk_import(arguments.path, arguments.table, database,
+                             arguments.batch_size, arguments.rebuild_indexes,
+                             arguments.file_format)
+
+    print(f"Inserted {report.inserted} rows into {arguments.table} in {report.seconds:.2f}s "
+          f"({rows_per_second(report):.0f} rows/s)")
+    print(f"Rejected {len(report.rejected)} rows")
+    for line_number, reason in report.rejected:
+        print(f"    line {line_number}: {reason}")
+    for name, reason in report.failed_indexes:
+        print(f"Could not create index {name} again: {reason}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
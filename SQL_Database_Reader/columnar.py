@@ -0,0 +1,353 @@
+"""This module holds query results column by column instead of as a list of row
+tuples. Integer and real columns are kept in arrays of 8-byte numbers. Other
+columns keep each distinct value once, plus an array of small codes saying
+which value each row has. A numeric table like OrderDetails then takes about
+8 bytes per cell instead of a Python object per cell.
+
+Sums, means, minimums and maximums run over the arrays with Python's built-in
+functions, so totals such as UnitPrice * Quantity need no SQL round trip and
+no loop over rows in Python code.
+
+Usage:
+    details = get_table_columns('OrderDetails', 'Northwind.db')
+    details[0]                                  # first row as a tuple
+    details[10:20]                              # a ColumnarTable of ten rows
+    details.sum_product('UnitPrice', 'Quantity')
+    sql_program.display_table('OrderDetails', details[:100], details.field_names)
+
+"""
+import operator
+import sys
+from array import array
+from itertools import compress
+
+import sql_program
+
+BATCH_SIZE = 5000
+# Largest integer every double holds exactly.
+EXACT_INTEGER = 2 ** 53
+
+
+class Column:
+    """The values of one column.
+
+    kind is 'q' for 64-bit integers, 'd' for doubles or integers mixed with
+    doubles, or 'o' for any other values, stored as codes into a dictionary
+    of distinct values. A NULL in a numeric column is stored as 0 and marked
+    missing in present. In a column of integers mixed with doubles, integers
+    marks the values that were integers, so they are returned as integers.
+
+    """
+
+    def __init__(self, kind='q'):
+        self.kind = kind
+        self.data = array(kind) if kind != 'o' else array('I')
+        self.dictionary = [] if kind == 'o' else None
+        self.present = None
+        self.integers = None
+        self._codes = {} if kind == 'o' else None
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if self.present is not None and not self.present[index]:
+            return None
+        if self.kind == 'o':
+            return self.dictionary[self.data[index]]
+        if self.integers is not None and self.integers[index]:
+            return int(self.data[index])
+        return self.data[index]
+
+    def extend(self, values):
+        """Appends values, changing how the column is stored if a value needs it.
+
+        Args:
+            values (tuple): new values of the column
+
+        Returns:
+            None.
+
+        """
+        if self.kind == 'o':
+            self._extend_codes(values)
+            return
+
+        kinds = set(map(type, values))
+        numbers = kinds - {type(None)}
+        if numbers and numbers <= {int, float} and self._only_nulls():
+            # The first values decide between integers and doubles.
+            self.kind = 'q' if numbers == {int} else 'd'
+            self.data = array(self.kind, self.data)
+        elif (self.kind == 'q' and float in numbers and numbers <= {int, float}
+              and all(abs(value) <= EXACT_INTEGER for value in self.data)):
+            # Integers mixed with doubles are summed as doubles, as SQLite does.
+            self.kind = 'd'
+            self.integers = bytearray(b'\x01' * len(self.data))
+            self.data = array('d', self.data)
+        if numbers and not numbers <= ({int} if self.kind == 'q' else {int, float}):
+            self._to_codes()
+            self._extend_codes(values)
+            return
+
+        length = len(self.data)
+        if self.kind == 'd' and (int in numbers or self.integers is not None):
+            if any(type(value) is int and abs(value) > EXACT_INTEGER for value in values):
+                self._to_codes()
+                self._extend_codes(values)
+                return
+            if self.integers is None:
+                self.integers = bytearray(length)
+            self.integers.extend([type(value) is int for value in values])
+
+        try:
+            if len(numbers) == len(kinds):
+                self.data.extend(values)
+                if self.present is not None:
+                    self.present.extend(b'\x01' * len(values))
+                return
+
+            # Some values are NULL.
+            if self.present is None:
+                self.present = bytearray(b'\x01' * len(self.data))
+            zero = 0 if self.kind == 'q' else 0.0
+            self.data.extend([zero if value is None else value for value in values])
+            self.present.extend([value is not None for value in values])
+        except OverflowError:
+            # An integer too big for 64 bits, drop what was appended of values.
+            del self.data[length:]
+            if self.present is not None:
+                del self.present[length:]
+            if self.integers is not None:
+                del self.integers[length:]
+            self._to_codes()
+            self._extend_codes(values)
+
+    def values(self):
+        """Returns: list: every value of the column, NULL as None."""
+        if self.kind == 'o':
+            return list(map(self.dictionary.__getitem__, self.data))
+        values = self.data.tolist()
+        if self.integers is not None:
+            values = [int(value) if integer else value
+                      for value, integer in zip(values, self.integers)]
+        if self.present is None:
+            return values
+        return [value if present else None for value, present in zip(values, self.present)]
+
+    def numbers(self):
+        """Returns: iterable: the column's values without NULLs."""
+        if self.kind == 'o' or self.integers is not None:
+            return [value for value in self.values() if value is not None]
+        if self.present is None:
+            return self.data
+        return compress(self.data, self.present)
+
+    def slice(self, start, stop):
+        """Returns: Column: the rows from start up to stop."""
+        column = Column(self.kind)
+        column.data = self.data[start:stop]
+        if self.present is not None:
+            column.present = self.present[start:stop]
+        if self.integers is not None:
+            column.integers = self.integers[start:stop]
+        if self.kind == 'o':
+            column.dictionary = self.dictionary
+            column._codes = self._codes
+        return column
+
+    def memory_size(self):
+        """Returns: int: bytes used by the column's arrays and distinct values."""
+        size = len(self.data) * self.data.itemsize
+        if self.present is not None:
+            size += len(self.present)
+        if self.integers is not None:
+            size += len(self.integers)
+        if self.dictionary is not None:
+            size += sum(sys.getsizeof(value) for value in self.dictionary)
+        return size
+
+    def _only_nulls(self):
+        """Returns: bool: True if the column holds no value but NULL."""
+        return not self.data or (self.present is not None and not any(self.present))
+
+    def _to_codes(self):
+        """Changes a numeric column to codes into a dictionary."""
+        values = self.values()
+        self.kind = 'o'
+        self.data = array('I')
+        self.dictionary = []
+        self.present = None
+        self.integers = None
+        self._codes = {}
+        self._extend_codes(values)
+
+    def _extend_codes(self, values):
+        codes = self._codes
+        dictionary = self.dictionary
+        new_codes = []
+        for value in values:
+            if isinstance(value, str):
+                value = sys.intern(value)
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(dictionary)
+                dictionary.append(value)
+            new_codes.append(code)
+        self.data.extend(new_codes)
+
+
+class ColumnarTable:
+    """Rows of a query held as one Column per field.
+
+    Supports len(), iteration over row tuples, table[index] for one row and
+    table[start:stop] for a ColumnarTable of a range of rows, so it can be
+    passed to display_table in place of a list of rows.
+
+    Args:
+        field_names (list): column names
+        columns (list): Column for every field, or None for empty columns
+
+    """
+
+    def __init__(self, field_names, columns=None):
+        self.field_names = list(field_names)
+        self.columns = columns if columns is not None else [Column() for _ in field_names]
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            assert step == 1, "Only slices with a step of 1 are supported."
+            return ColumnarTable(self.field_names,
+                                 [column.slice(start, stop) for column in self.columns])
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        return tuple(column[index] for column in self.columns)
+
+    def __iter__(self):
+        return zip(*[column.values() for column in self.columns])
+
+    def extend(self, rows):
+        """Appends rows given as tuples."""
+        if rows:
+            for column, values in zip(self.columns, zip(*rows)):
+                column.extend(values)
+
+    def column(self, name):
+        """Gets a column by name, matched without regard to case.
+
+        Raises:
+            KeyError: no column has that name.
+
+        """
+        lowered = name.lower()
+        for field_name, column in zip(self.field_names, self.columns):
+            if field_name.lower() == lowered:
+                return column
+        raise KeyError(name)
+
+    def sum(self, name):
+        """Returns: number: total of a numeric column, NULLs left out."""
+        return sum(self._numeric(name).numbers())
+
+    def mean(self, name):
+        """Returns: float: mean of a numeric column, or None if it has no values."""
+        column = self._numeric(name)
+        count = len(column) if column.present is None else sum(column.present)
+        return sum(column.numbers()) / count if count else None
+
+    def min(self, name):
+        """Returns: the smallest value of a column, or None if it has no values."""
+        return min(self.column(name).numbers(), default=None)
+
+    def max(self, name):
+        """Returns: the largest value of a column, or None if it has no values."""
+        return max(self.column(name).numbers(), default=None)
+
+    def sum_product(self, *names):
+        """Adds up the product of numeric columns row by row.
+
+        Rows with NULL in any of the columns are left out, as SQL would.
+
+        Args:
+            names (str): two or more numeric column names
+
+        Returns:
+            number: e.g. total of UnitPrice * Quantity.
+
+        """
+        assert len(names) >= 2, "Name at least two columns."
+
+        columns = [self._numeric(name) for name in names]
+        products = columns[0].data
+        for column in columns[1:]:
+            products = map(operator.mul, products, column.data)
+
+        masks = [column.present for column in columns if column.present is not None]
+        if masks:
+            present = masks[0]
+            for mask in masks[1:]:
+                present = bytes(map(operator.and_, present, mask))
+            products = compress(products, present)
+
+        return sum(products)
+
+    def memory_size(self):
+        """Returns: int: bytes used by the columns' arrays and distinct values."""
+        return sum(column.memory_size() for column in self.columns)
+
+    def _numeric(self, name):
+        column = self.column(name)
+        if column.kind == 'o':
+            raise TypeError(f"{name} is not a numeric column.")
+        return column
+
+
+def read_columns(sql, values, database, batch_size=BATCH_SIZE):
+    """Reads the rows of a query into a ColumnarTable.
+
+    Args:
+        sql (str): SELECT statement, may use ? placeholders
+        values (list): values for the placeholders, or None
+        database (str or ConnectionManager): database name or open manager
+        batch_size (int): rows fetched at a time
+
+    Returns:
+        ColumnarTable: the query's rows.
+
+    """
+    assert batch_size > 0, "Batch size must be at least 1."
+
+    with sql_program.connect(database) as connection:
+        cursor = connection.execute(sql, values or [])
+        table = ColumnarTable([field[0] for field in cursor.description])
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            table.extend(batch)
+
+    return table
+
+
+def get_table_columns(selected_table, database, batch_size=BATCH_SIZE):
+    """Gets every row of the selected table as a ColumnarTable.
+
+    The columnar counterpart of sql_program.get_table_data.
+
+    Args:
+        selected_table (str): table name
+        database (str or ConnectionManager): database name or open manager
+        batch_size (int): rows fetched at a time
+
+    Returns:
+        ColumnarTable: the table's rows.
+
+    """
+    return read_columns(f"SELECT * FROM {selected_table};", None, database, batch_size)
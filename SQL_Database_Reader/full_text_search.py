@@ -0,0 +1,182 @@
+"""This program builds full-text search indexes over the text columns of a table,
+so a record can be found by a few words of it without reading the whole table.
+
+Each index is an FTS5 table named <table>_fts that reads its text from the
+table itself (an external content index), so the text is not stored twice.
+Triggers on insert, update and delete keep it in sync with every change made
+through any connection. By default words are matched by their beginning, e.g.
+"alfr futt" finds "Alfreds Futterkiste". A substring index, built with the
+trigram tokenizer, matches text anywhere inside a value instead, e.g. "terki".
+
+sql_program.search_table runs the searches, and the program offers a Search
+option for tables with an index. The rows found can be updated and deleted
+there like any other rows.
+
+Instructions:
+    Include Northwind.db in the current directory.
+
+    Run "python full_text_search.py Customers --index CompanyName ContactName"
+    to build an index, adding "--substring" for substring matching. Then run
+    "python full_text_search.py Customers alfreds" to search it, or
+    "python full_text_search.py Customers --drop" to remove it. Run
+    "python full_text_search.py --list" to show the indexes.
+
+Output:
+    The rows found, best match first, and how long the search took.
+
+"""
+import argparse
+import re
+import time
+from collections import namedtuple
+
+import sql_program
+
+DATABASE = "Northwind.db"
+
+SearchIndex = namedtuple('SearchIndex', ['table', 'columns', 'substring'])
+
+
+def create_index(selected_table, columns, database, substring=False):
+    """Builds a search index over columns of a table, replacing any old one.
+
+    Args:
+        selected_table (str): table name, of a table with a rowid
+        columns (list): text columns to index, matched without regard to case
+        database (str or ConnectionManager): database name or open manager
+        substring (bool): True to match text anywhere inside a value, False
+        to match the beginning of words
+
+    Returns:
+        int: rows indexed.
+
+    """
+    assert columns, "Name at least one column to index."
+
+    index = sql_program.search_index_name(selected_table)
+    with sql_program.connect(database, write=True) as connection:
+        table = sql_program.get_catalog(database, connection).table(selected_table)
+        assert table.page_key == ['rowid'], f"{selected_table} has no rowid to index."
+        columns = [sql_program.match_column(column, table.columns) for column in columns]
+
+        drop_triggers(connection, selected_table)
+        connection.execute(f'DROP TABLE IF EXISTS "{index}";')
+
+        options = "tokenize = 'trigram'" if substring else \
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+        quoted = ', '.join(f'"{column}"' for column in columns)
+        connection.execute(f'CREATE VIRTUAL TABLE "{index}" USING fts5({quoted}, '
+                           f'content = "{selected_table}", {options});')
+
+        new = ', '.join(f'NEW."{column}"' for column in columns)
+        old = ', '.join(f'OLD."{column}"' for column in columns)
+        remove = (f'INSERT INTO "{index}"("{index}", rowid, {quoted}) '
+                  f"VALUES('delete', OLD.rowid, {old});")
+        add = f'INSERT INTO "{index}"(rowid, {quoted}) VALUES(NEW.rowid, {new});'
+        for event, body in [('insert', add), ('delete', remove), ('update', remove + ' ' + add)]:
+            connection.execute(f'CREATE TRIGGER "{index}_{event}" AFTER {event.upper()} '
+                               f'ON "{selected_table}" BEGIN {body} END;')
+
+        connection.execute(f"INSERT INTO \"{index}\"(\"{index}\") VALUES('rebuild');")
+        connection.commit()
+        rows = connection.execute(f'SELECT COUNT(*) FROM "{selected_table}";').fetchone()[0]
+
+    return rows
+
+
+def drop_triggers(connection, selected_table):
+    """Drops the triggers that keep the search index of a table in sync."""
+    index = sql_program.search_index_name(selected_table)
+    for event in ['insert', 'delete', 'update']:
+        connection.execute(f'DROP TRIGGER IF EXISTS "{index}_{event}";')
+
+
+def drop_index(selected_table, database):
+    """Removes the search index of a table and its triggers.
+
+    Returns:
+        None.
+
+    """
+    with sql_program.connect(database, write=True) as connection:
+        drop_triggers(connection, selected_table)
+        connection.execute(
+            f'DROP TABLE IF EXISTS "{sql_program.search_index_name(selected_table)}";')
+        connection.commit()
+
+
+def get_indexes(database):
+    """Gets the search indexes of a database.
+
+    Args:
+        database (str or ConnectionManager): database name or open manager
+
+    Returns:
+        list: SearchIndex for every indexed table.
+
+    """
+    indexes = []
+    with sql_program.connect(database) as connection:
+        search_tables = sql_program.get_search_tables(connection)
+        definitions = connection.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table';").fetchall()
+        for name, sql in definitions:
+            if name not in search_tables or not name.endswith(sql_program.SEARCH_INDEX_SUFFIX):
+                continue
+            content = re.search(r"content\s*=\s*['\"]?(\w+)", sql, re.IGNORECASE)
+            if content is None:
+                continue
+            columns = [row[1] for row in connection.execute(f'PRAGMA table_info("{name}");')]
+            indexes.append(SearchIndex(content.group(1), columns, 'trigram' in sql.lower()))
+
+    return indexes
+
+
+def main():  # pragma: no cover
+    """Builds, drops, lists or searches the indexes named on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("table", nargs='?', help="table to index or search")
+    parser.add_argument("text", nargs='?', help="words to search for")
+    parser.add_argument("--index", nargs='+', metavar="COLUMN", help="columns to index")
+    parser.add_argument("--substring", action="store_true",
+                        help="match text anywhere in a value, not just word beginnings")
+    parser.add_argument("--drop", action="store_true", help="remove the table's index")
+    parser.add_argument("--list", action="store_true", help="show the search indexes")
+    parser.add_argument("--limit", type=int, default=sql_program.PAGE_SIZE,
+                        help=f"most rows to show (default {sql_program.PAGE_SIZE})")
+    parser.add_argument("--database", default=DATABASE,
+                        help=f"database to open (default {DATABASE})")
+    arguments = parser.parse_args()
+
+    if arguments.list:
+        for search_index in get_indexes(arguments.database):
+            kind = "substring" if search_index.substring else "word prefix"
+            print(f"{search_index.table}: {', '.join(search_index.columns)} ({kind})")
+        return
+
+    if arguments.table is None:
+        parser.error("name a table")
+
+    start = time.perf_counter()
+    if arguments.drop:
+        drop_index(arguments.table, arguments.database)
+        print(f"Dropped the search index of {arguments.table}")
+    elif arguments.index:
+        rows = create_index(arguments.table, arguments.index, arguments.database,
+                            arguments.substring)
+        print(f"Indexed {rows} rows of {arguments.table} in "
+              f"{time.perf_counter() - start:.3f}s")
+    elif arguments.text:
+        row_ids, rows = sql_program.search_table(arguments.table, arguments.text,
+                                                 arguments.database, arguments.limit)
+        seconds = time.perf_counter() - start
+        field_names = sql_program.get_field_names(arguments.table, arguments.database)
+        if rows:
+            sql_program.display_table(arguments.table, rows, field_names)
+        print(f"{len(row_ids)} rows found in {seconds * 1000:.1f} ms")
+    else:
+        parser.error("give text to search for, --index, or --drop")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
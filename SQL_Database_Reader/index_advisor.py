@@ -0,0 +1,302 @@
+"""This program checks whether the statements sql_program issues are answered
+from an index. It runs the program's own access paths against every table with a
+trace callback recording each statement. Writes are rolled back, so the data
+is never changed. Then it runs EXPLAIN QUERY PLAN on every statement, flags full
+table scans and proposes CREATE INDEX statements for the columns the scans
+filter or sort on.
+
+Instructions:
+    Include Northwind.db in the current directory.
+
+    Run "python index_advisor.py --filter Orders.ShipCountry" to also check a
+    filter on Orders.ShipCountry, "--statements session.sql" to also check
+    statements saved from a session (separated by ';' at the end of a line), and
+    "--apply" to create the proposed indexes, run ANALYZE and time every flagged
+    statement before and after.
+
+Output:
+    Each statement with a full table scan, the index proposed for it and, with
+    --apply, its time before and after.
+
+"""
+import argparse
+import re
+import time
+from collections import OrderedDict, namedtuple
+
+import sql_program
+
+IGNORED_STATEMENTS = ('PRAGMA', 'BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE',
+                      'EXPLAIN', 'CREATE', 'DROP', 'ANALYZE')
+EQUALITY_OPERATORS = {'=', '==', 'IS', 'IN'}
+CONDITION_PATTERN = r'(?<![\w"]){column}"?\s*(==|=|<=|>=|<>|!=|<|>|IS\b|IN\b|LIKE\b|BETWEEN\b)'
+
+Advice = namedtuple('Advice', ['sql', 'count', 'scans', 'index_sql', 'before', 'after'])
+
+
+class StatementLog:
+    """Records the statements a connection runs through its trace callback.
+
+    The trace callback sees statements with their bound values filled in, so
+    each one can be explained on its own. Housekeeping statements such as
+    PRAGMA and transaction control are left out.
+
+    """
+
+    def __init__(self):
+        self.statements = OrderedDict()
+
+    def record(self, sql):
+        """Trace callback: counts one run of a statement."""
+        sql = sql.strip()
+        if not sql or sql.upper().startswith(IGNORED_STATEMENTS) or 'sqlite_' in sql:
+            return
+        self.statements[sql] = self.statements.get(sql, 0) + 1
+
+    def attach(self, connection):
+        """Starts recording the statements connection runs."""
+        connection.set_trace_callback(self.record)
+
+    def detach(self, connection):
+        """Stops recording the statements connection runs."""
+        connection.set_trace_callback(None)
+
+
+def run_program_workload(database, filters=()):
+    """Runs sql_program's access paths against every table.
+
+    Pages, widths, keyed updates and keyed deletes are run for every table
+    and a query for every filter. The writes are rolled back.
+
+    Args:
+        database (ConnectionManager): open manager, used from its own thread
+        filters (list): (table, column) pairs to filter on with '='
+
+    Returns:
+        None.
+
+    """
+    for selected_table in sql_program.get_tables(database):
+        field_names = sql_program.get_field_names(selected_table, database)
+        rows, last_key = sql_program.get_table_page(selected_table, database)
+        sql_program.get_table_page(selected_table, database, last_key)
+        sql_program.plan_column_widths(selected_table, database, field_names,
+                                       sql_program.WIDTH_SAMPLE)
+        if not rows:
+            continue
+
+        key = sql_program.get_key_columns(selected_table, database)
+        values = sql_program.row_keys(selected_table, database, field_names, rows[:1], key)[0]
+        with database.writer() as connection:
+            connection.execute("SAVEPOINT advisor;")
+            try:
+                connection.execute(sql_program.update_sql(selected_table, [field_names[-1]], key),
+                                   [rows[0][-1]] + values)
+                connection.execute(sql_program.delete_sql(selected_table, key), values)
+            finally:
+                connection.execute("ROLLBACK TO advisor;")
+                connection.execute("RELEASE advisor;")
+
+    for selected_table, column in filters:
+        field_names = sql_program.get_field_names(selected_table, database)
+        column = sql_program.match_column(column, field_names)
+        rows = sql_program.get_table_page(selected_table, database, page_size=1)[0]
+        value = rows[0][field_names.index(column)] if rows else None
+        sql_program.query_table(selected_table, database, [(column, '=', value)])
+
+
+def read_statements(path):
+    """Reads statements separated by ';' at the end of a line.
+
+    Returns:
+        list: statements without their trailing ';'.
+
+    """
+    with open(path, encoding='utf-8') as file:
+        text = file.read()
+
+    return [statement.strip() for statement in re.split(r';\s*$', text, flags=re.MULTILINE)
+            if statement.strip()]
+
+
+def explain(connection, sql):
+    """Returns: list: the detail column of EXPLAIN QUERY PLAN for sql."""
+    return [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def find_scans(sql, plan):
+    """Gets the tables a plan reads from start to end to filter or sort them.
+
+    A scan of a statement without WHERE that needs no sort reads the rows it
+    returns in order, as paging and export do, so it is not flagged.
+
+    Args:
+        sql (str): statement explained
+        plan (list): details from explain
+
+    Returns:
+        list: names of the scanned tables.
+
+    """
+    sorts = any(detail.startswith('USE TEMP B-TREE FOR ORDER BY') for detail in plan)
+    if not sorts and not re.search(r'\bWHERE\b', sql, re.IGNORECASE):
+        return []
+
+    scans = []
+    for detail in plan:
+        words = detail.split()
+        if len(words) >= 2 and words[0] == 'SCAN' and words[1] != 'CONSTANT':
+            scans.append(words[1])
+
+    return scans
+
+
+def propose_index(sql, table):
+    """Proposes an index that would let SQLite search instead of scan.
+
+    Columns compared for equality come first, then one compared by range,
+    then the first ORDER BY column.
+
+    Args:
+        sql (str): statement with a full scan of table
+        table (TableSchema): schema of the scanned table
+
+    Returns:
+        str: CREATE INDEX statement, or None if no column is filtered or sorted
+        or an existing index already starts with the proposed columns.
+
+    """
+    where = re.search(r'\bWHERE\b(.*?)(?:\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|$)', sql,
+                      re.IGNORECASE | re.DOTALL)
+    order = re.search(r'\bORDER BY\s+"?(\w+)', sql, re.IGNORECASE)
+
+    equality = []
+    ranges = []
+    for column in table.columns:
+        if where is None:
+            break
+        pattern = CONDITION_PATTERN.format(column=f'"?{re.escape(column)}')
+        match = re.search(pattern, where.group(1), re.IGNORECASE)
+        if match:
+            operator = match.group(1).upper()
+            (equality if operator in EQUALITY_OPERATORS else ranges).append(column)
+
+    columns = equality + ranges[:1]
+    if order:
+        ordered = [column for column in table.columns if column.lower() == order.group(1).lower()]
+        columns.extend(column for column in ordered if column not in columns)
+    if not columns:
+        return None
+
+    for index in table.indexes:
+        if index.columns[:len(columns)] == columns:
+            return None
+
+    name = '_'.join(['advisor', table.name] + columns)
+    column_names = ', '.join(f'"{column}"' for column in columns)
+    return f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table.name}"({column_names});'
+
+
+def time_statement(connection, sql, repeat=5):
+    """Times a statement, rolling back any change it makes.
+
+    Returns:
+        float: best seconds taken over repeat runs.
+
+    """
+    best = None
+    for _ in range(repeat):
+        connection.execute("SAVEPOINT advisor_timing;")
+        try:
+            start = time.perf_counter()
+            connection.execute(sql).fetchall()
+            elapsed = time.perf_counter() - start
+        finally:
+            connection.execute("ROLLBACK TO advisor_timing;")
+            connection.execute("RELEASE advisor_timing;")
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def advise(database, statements, apply=False):
+    """Explains statements and proposes indexes for the ones that scan.
+
+    Args:
+        database (ConnectionManager): open manager
+        statements (dict): statement text to number of runs
+        apply (bool): True to create the proposed indexes, run ANALYZE and
+        time the flagged statements before and after
+
+    Returns:
+        list: Advice for every statement with a full table scan.
+
+    """
+    advice = []
+
+    with database.writer() as connection:
+        catalog = sql_program.get_catalog(database, connection)
+
+        for sql, count in statements.items():
+            scans = find_scans(sql, explain(connection, sql))
+            if not scans:
+                continue
+
+            index_sql = None
+            for scanned in scans:
+                if scanned in catalog.tables:
+                    index_sql = index_sql or propose_index(sql, catalog.table(scanned))
+            before = time_statement(connection, sql) if apply else None
+            advice.append(Advice(sql, count, scans, index_sql, before, None))
+
+        if apply:
+            for index_sql in OrderedDict.fromkeys(item.index_sql for item in advice
+                                                  if item.index_sql):
+                connection.execute(index_sql)
+            connection.execute("ANALYZE;")
+            connection.commit()
+            advice = [item._replace(after=time_statement(connection, item.sql))
+                      for item in advice]
+
+    return advice
+
+
+def main():  # pragma: no cover
+    """Runs the workload and prints the advice."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", default="Northwind.db",
+                        help="database to check (default Northwind.db)")
+    parser.add_argument("--filter", action="append", default=[], metavar="TABLE.COLUMN",
+                        help="also check a filter on this column, repeat for more")
+    parser.add_argument("--statements", help="file of statements saved from a session")
+    parser.add_argument("--apply", action="store_true",
+                        help="create the proposed indexes and run ANALYZE")
+    arguments = parser.parse_args()
+
+    filters = [tuple(text.split('.', 1)) for text in arguments.filter]
+    log = StatementLog()
+
+    with sql_program.ConnectionManager(arguments.database) as database:
+        with database.writer() as connection:
+            log.attach(connection)
+        run_program_workload(database, filters)
+        if arguments.statements:
+            for sql in read_statements(arguments.statements):
+                log.record(sql)
+        with database.writer() as connection:
+            log.detach(connection)
+
+        advice = advise(database, log.statements, arguments.apply)
+
+    print(f"Checked {len(log.statements)} statements, {len(advice)} scan a whole table.\n")
+    for item in advice:
+        print(f"{item.sql}\n    runs: {item.count}, scans: {', '.join(item.scans)}")
+        print(f"    proposed: {item.index_sql or 'no index can help, every row is read'}")
+        if item.before is not None:
+            print(f"    time: {item.before * 1000:.3f} ms before, "
+                  f"{item.after * 1000:.3f} ms after")
+        print()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,284 @@
+"""This module shows where the time of a sql_program session goes. Installed on
+sql_program, it times the program's database operations and every statement
+SQLite runs for them. It keeps latency histograms, rows and bytes returned and
+rows changed, writes statements slower than a threshold to a slow-query log and
+prints a summary.
+
+Statements are seen through Connection.set_trace_callback, which every
+connection gets from open_connection once the module is installed. The
+callback fires as SQLite starts a statement, so a statement is timed from its
+start to the start of the next statement of the same operation, or to the end
+of the operation. Statements run outside a timed operation are only counted.
+
+Instructions:
+    Run "python sql_program.py --stats" to print the summary when the program
+    exits, and add "--slow-ms 50 --slow-log slow.log" to log every statement
+    that took 50 ms or more.
+
+Usage:
+    instruments = Instrumentation(slow_ms=50, slow_log="slow.log")
+    instruments.install(sql_program)
+    ...
+    print(instruments.summary())
+
+"""
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import sql_program
+
+OPERATIONS = ['get_tables', 'get_table_data', 'get_table_page', 'query_table',
+              'plan_column_widths', 'execute_sql', 'execute_sql_many']
+METHODS = [('TableRows', 'load'), ('TableRows', 'refresh')]
+# Position of the rows in the list each read returns.
+ROW_RESULTS = {'get_table_data': 1, 'query_table': 1, 'get_table_page': 0}
+BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+SLOW_MS = 100.0
+LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\bX'[0-9A-Fa-f]*'|(?<![\w.])-?\d+(?:\.\d+)?\b")
+
+
+def normalize(sql):
+    """Replaces the literals of a statement with ?.
+
+    The trace callback sees statements with their values filled in, so this
+    groups the runs of one statement together.
+
+    """
+    return LITERAL_PATTERN.sub('?', ' '.join(sql.split()))
+
+
+class Histogram:
+    """Counts latencies in the buckets of BUCKETS_MS."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds):
+        """Counts one latency."""
+        milliseconds = seconds * 1000
+        bucket = 0
+        while bucket < len(BUCKETS_MS) and milliseconds > BUCKETS_MS[bucket]:
+            bucket += 1
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def percentile(self, fraction):
+        """Gets the upper bound in ms of the bucket a percentile falls in.
+
+        Args:
+            fraction (float): 0.5 for the median, 0.99 for p99
+
+        Returns:
+            float: bucket bound, or the largest latency for the last bucket.
+
+        """
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                if bucket == len(BUCKETS_MS):
+                    break
+                return min(BUCKETS_MS[bucket], self.maximum * 1000)
+
+        return self.maximum * 1000
+
+
+class Stats:
+    """Latencies and row counts of one operation or statement."""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.rows = 0
+        self.bytes = 0
+
+
+class Instrumentation:
+    """Times sql_program's operations and the statements they run.
+
+    Args:
+        slow_ms (float): statements taking this many milliseconds or more are
+        slow queries
+        slow_log (str): file slow queries are appended to, or None
+
+    """
+
+    def __init__(self, slow_ms=SLOW_MS, slow_log=None):
+        self.slow_seconds = slow_ms / 1000
+        self.slow_log = slow_log
+        self.slow_queries = 0
+        self.operations = {}
+        self.statements = {}
+        self.untimed = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._originals = []
+
+    def install(self, module=sql_program):
+        """Wraps the module's operations and traces every connection it opens.
+
+        Args:
+            module (module): sql_program, or the module running as __main__
+
+        Returns:
+            Instrumentation: this instrumentation.
+
+        """
+        assert not self._originals, "Instrumentation is already installed."
+
+        open_connection = module.open_connection
+
+        def traced_open_connection(*args, **kwargs):
+            connection = open_connection(*args, **kwargs)
+            self.attach(connection)
+            return connection
+
+        self._replace(module, 'open_connection', traced_open_connection)
+        for name in OPERATIONS:
+            self._replace(module, name, self.timed(name, getattr(module, name)))
+        for class_name, name in METHODS:
+            owner = getattr(module, class_name)
+            self._replace(owner, name, self.timed(f"{class_name}.{name}", getattr(owner, name)))
+
+        return self
+
+    def uninstall(self):
+        """Puts back everything install replaced."""
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals = []
+
+    def attach(self, connection):
+        """Traces the statements of a connection opened before install."""
+        connection.set_trace_callback(lambda sql: self._trace(connection, sql))
+
+    def timed(self, name, function):
+        """Wraps function so its calls are timed as the operation name."""
+
+        def wrapper(*args, **kwargs):
+            frame = {'pending': None}
+            stack = self._stack()
+            stack.append(frame)
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                stack.pop()
+                if frame['pending'] is not None:
+                    self._finish(frame['pending'], end)
+
+            self._record_operation(name, end - start, result)
+            return result
+
+        wrapper.__name__ = function.__name__
+        wrapper.__doc__ = function.__doc__
+        return wrapper
+
+    def summary(self):
+        """Returns: str: a table of the operations and statements recorded."""
+        lines = [f"{'Operation':<40}{'calls':>8}{'total ms':>11}{'p50 ms':>9}{'p99 ms':>9}"
+                 f"{'max ms':>9}{'rows':>9}{'bytes':>11}"]
+        with self._lock:
+            for name, stats in sorted(self.operations.items(),
+                                      key=lambda item: -item[1].latency.total):
+                lines.append(self._format(name, stats, stats.bytes))
+
+            lines.append('')
+            lines.append(f"{'Statement':<40}{'runs':>8}{'total ms':>11}{'p50 ms':>9}"
+                         f"{'p99 ms':>9}{'max ms':>9}{'changed':>9}")
+            for sql, stats in sorted(self.statements.items(),
+                                     key=lambda item: -item[1].latency.total):
+                lines.append(self._format(sql, stats))
+
+            lines.append('')
+            lines.append(f"{sum(self.untimed.values())} statements outside timed operations, "
+                         f"{self.slow_queries} slow queries of "
+                         f"{self.slow_seconds * 1000:g} ms or more")
+
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _format(name, stats, size=None):
+        latency = stats.latency
+        if len(name) > 38:
+            name = f"{name[:35]}..."
+        line = (f"{name:<40}{latency.count:>8}{latency.total * 1000:>11.2f}"
+                f"{latency.percentile(0.5):>9.2f}{latency.percentile(0.99):>9.2f}"
+                f"{latency.maximum * 1000:>9.2f}{stats.rows:>9}")
+        return line if size is None else f"{line}{size:>11}"
+
+    def _replace(self, owner, name, replacement):
+        self._originals.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, replacement)
+
+    def _stack(self):
+        """Returns: list: operations running on the calling thread."""
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _trace(self, connection, sql):
+        """Trace callback: ends the previous statement and starts timing sql."""
+        now = time.perf_counter()
+        if sql.startswith('--'):
+            # A statement of a trigger, timed as part of the one that fired it.
+            return
+
+        stack = self._stack()
+        if not stack:
+            with self._lock:
+                self.untimed[normalize(sql)] += 1
+            return
+
+        frame = stack[-1]
+        if frame['pending'] is not None:
+            self._finish(frame['pending'], now)
+        frame['pending'] = (now, sql, connection, connection.total_changes)
+
+    def _finish(self, pending, end):
+        """Records a statement that ran from its start until end."""
+        start, sql, connection, changes = pending
+        try:
+            changes = connection.total_changes - changes
+        except sqlite3.ProgrammingError:
+            # Closed before the operation ended.
+            changes = 0
+
+        seconds = end - start
+        with self._lock:
+            stats = self.statements.setdefault(normalize(sql), Stats())
+            stats.latency.add(seconds)
+            stats.rows += changes
+
+            if seconds >= self.slow_seconds:
+                self.slow_queries += 1
+                if self.slow_log is not None:
+                    with open(self.slow_log, 'a', encoding='utf-8') as file:
+                        file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} "
+                                   f"{seconds * 1000:.3f} ms {' '.join(sql.split())}\n")
+
+    def _record_operation(self, name, seconds, result):
+        """Records an operation with the rows and bytes it returned."""
+        rows = 0
+        size = 0
+        if name in ROW_RESULTS:
+            returned = result[ROW_RESULTS[name]]
+            rows = len(returned)
+            size = sql_program.estimate_size(returned)
+        elif name == 'execute_sql_many':
+            rows = result
+
+        with self._lock:
+            stats = self.operations.setdefault(name, Stats())
+            stats.latency.add(seconds)
+            stats.rows += rows
+            stats.bytes += size
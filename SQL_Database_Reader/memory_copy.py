@@ -0,0 +1,277 @@
+"""This module edits a working copy of a database held in memory. The file is
+copied into a :memory: database with the sqlite3 backup API when the session
+starts, every read and write is served from memory, and the changes are
+copied back to the file either after every write or in batched flushes.
+
+A flush copies the whole database to the file with Connection.backup, a
+chunk of FLUSH_PAGES pages at a time, so its cost grows with the size of the
+database and not with the number of changes. Write-through keeps the file
+current after every committed write. Periodic flushing writes the file after
+flush_every writes, every flush_interval seconds from a background thread
+while writes are waiting, even if the session sits idle, and when the
+session ends. It risks losing the writes made since the last flush if the
+process dies.
+
+The working copy owns the file while it is open. Changes other connections
+make to the file are overwritten by the next flush.
+
+Instructions:
+    Include Northwind.db in the current directory.
+
+    Run "python sql_program.py --in-memory write-through", or
+    "python sql_program.py --in-memory periodic --flush-every 50", to edit a
+    working copy. Run "python memory_copy.py" to time loading and flushing
+    at several database sizes, and add "--sizes 1000 1000000 --writes 50" to
+    choose them.
+
+Output:
+    For every size, the time to load the copy, and the time per write on
+    the file, with write-through and with periodic flushes.
+
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import benchmark_suite
+import sql_program
+
+FLUSH_MODES = ['write-through', 'periodic']
+FLUSH_PAGES = 1024
+FLUSH_EVERY = 100
+FLUSH_INTERVAL = 30.0
+SIZES = [1000, 100000, 1000000]
+WRITES = 20
+
+CopyTiming = namedtuple('CopyTiming', ['rows', 'size_bytes', 'load_ms', 'disk_write_ms',
+                                       'write_through_ms', 'periodic_write_ms', 'flush_ms'])
+
+
+class MemoryCopy(sql_program.ConnectionManager):
+    """A ConnectionManager that works on a copy of the database in memory.
+
+    Every thread reads and writes through the one in-memory connection, so
+    calls from other threads wait for each other instead of using a pool.
+    A write that raises is rolled back before the error is passed on, so a
+    flush never copies half of it.
+
+    Args:
+        database (str): database file to copy and flush to
+        flush (str): 'write-through' to flush after every committed write,
+        'periodic' to flush after flush_every writes or every flush_interval
+        seconds
+        flush_pages (int): pages copied by each step of a flush
+        flush_every (int): committed writes between periodic flushes
+        flush_interval (float): most seconds between periodic flushes
+        cache_budget (int): bytes of table reads kept in the result cache
+        profile (str): name of the sql_program.PROFILES settings
+
+    """
+
+    def __init__(self, database, flush='write-through', flush_pages=FLUSH_PAGES,
+                 flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL,
+                 cache_budget=sql_program.RESULT_CACHE_BUDGET, profile='default'):
+        assert flush in FLUSH_MODES, f"Unknown flush mode: {flush}"
+        assert flush_pages > 0, "A flush must copy at least 1 page a step."
+        assert flush_every > 0, "Flush every 1 write or more."
+
+        self.flush_mode = flush
+        self.flush_pages = flush_pages
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.flush_seconds = []
+        self.load_seconds = None
+        self._pending = 0
+        self._depth = 0
+        self._last_flush = time.perf_counter()
+        self._stopped = threading.Event()
+        self._timer = None
+        self.disk = sql_program.open_connection(database, profile=profile)
+        try:
+            super().__init__(database, pool_size=1, cache_budget=cache_budget,
+                             profile=profile)
+        except BaseException:
+            self.disk.close()
+            raise
+
+        if flush == 'periodic':
+            self._timer = threading.Thread(target=self._flush_every_interval, daemon=True,
+                                           name='memory-copy-flush')
+            self._timer.start()
+
+    def _open_primary(self):
+        """Copies the database file into a new :memory: database."""
+        start = time.perf_counter()
+        memory = sqlite3.connect(':memory:', check_same_thread=False,
+                                 cached_statements=sql_program.STATEMENT_CACHE_SIZE)
+        self.disk.backup(memory)
+        sql_program.apply_profile(memory, self.profile)
+        self.load_seconds = time.perf_counter() - start
+        return memory
+
+    @contextmanager
+    def writer(self):
+        """Yields the in-memory connection, flushing after a committed write.
+
+        A write counts once the rows changed and no transaction is left open,
+        so a write rolled back by hand is flushed too, harmlessly. If the
+        outermost block raises, its open transaction is rolled back.
+
+        """
+        with super().writer() as connection:
+            self._depth += 1
+            changes = connection.total_changes
+            try:
+                yield connection
+            except BaseException:
+                if self._depth == 1 and connection.in_transaction:
+                    connection.rollback()
+                raise
+            finally:
+                self._depth -= 1
+
+            if (self._depth == 0 and connection.total_changes != changes
+                    and not connection.in_transaction):
+                self._pending += 1
+                if (self.flush_mode == 'write-through' or self._pending >= self.flush_every
+                        or time.perf_counter() - self._last_flush >= self.flush_interval):
+                    self.flush()
+
+    def temp_writer(self):
+        """Yields the in-memory connection without counting its changes as writes."""
+        return super().writer()
+
+    def reader(self):
+        """Yields the in-memory connection, for every thread."""
+        return self.writer()
+
+    def flush(self):
+        """Copies the in-memory database to the file if it changed.
+
+        Returns:
+            float: seconds the copy took, 0.0 if there was nothing to copy.
+
+        """
+        with super().writer() as connection:
+            if not self._pending:
+                return 0.0
+            start = time.perf_counter()
+            connection.backup(self.disk, pages=self.flush_pages, sleep=0)
+            seconds = time.perf_counter() - start
+
+            self.flush_seconds.append(seconds)
+            self._pending = 0
+            self._last_flush = time.perf_counter()
+
+        return seconds
+
+    def _flush_every_interval(self):
+        """Flushes waiting writes every flush_interval seconds until closed."""
+        while not self._stopped.wait(self.flush_interval):
+            with self._lock:
+                # A transaction still open is flushed once it is committed.
+                if self._closed or self._primary.in_transaction:
+                    continue
+                self.flush()
+
+    def close(self):
+        """Flushes the writes not yet in the file, then closes both databases."""
+        self._stopped.set()
+        if self._timer is not None:
+            self._timer.join()
+        with self._lock:
+            if not self._closed:
+                self.flush()
+        super().close()
+        self.disk.close()
+
+
+def time_writes(database, writes):
+    """Returns: float: seconds for writes single-row updates of the Bench table."""
+    start = time.perf_counter()
+    for num in range(writes):
+        sql_program.execute_sql("UPDATE Bench SET Quantity = Quantity + 1 WHERE BenchID = ?;",
+                                database, [num + 1])
+    return time.perf_counter() - start
+
+
+def time_working_copy(path, rows, writes=WRITES, flush_every=FLUSH_EVERY):
+    """Times loading a working copy of a Bench database and writing through it.
+
+    Args:
+        path (str): database holding a Bench table, see benchmark_suite
+        rows (int): rows of the Bench table
+        writes (int): single-row updates timed in every mode
+        flush_every (int): writes between periodic flushes
+
+    Returns:
+        CopyTiming: load time, mean flush time, and time per write on the
+        file, in memory with write-through and in memory with periodic
+        flushes, all in milliseconds.
+
+    """
+    assert writes > 0, "Time at least 1 write."
+
+    with sql_program.ConnectionManager(path) as manager:
+        disk_seconds = time_writes(manager, writes)
+
+    with MemoryCopy(path, 'write-through') as copy:
+        load_seconds = copy.load_seconds
+        write_through_seconds = time_writes(copy, writes)
+        flush_seconds = copy.flush_seconds
+
+    with MemoryCopy(path, 'periodic', flush_every=flush_every) as copy:
+        periodic_seconds = time_writes(copy, writes)
+        # The writes left over are flushed too, as closing the session would.
+        periodic_seconds += copy.flush()
+
+    return CopyTiming(rows, os.path.getsize(path), load_seconds * 1000,
+                      disk_seconds / writes * 1000, write_through_seconds / writes * 1000,
+                      periodic_seconds / writes * 1000,
+                      sum(flush_seconds) / len(flush_seconds) * 1000)
+
+
+def run_timings(sizes=None, writes=WRITES, flush_every=FLUSH_EVERY):
+    """Times the working copy of a Bench database of every size.
+
+    Returns:
+        list: CopyTiming for every size.
+
+    """
+    timings = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes or SIZES:
+            path = os.path.join(directory, f"copy_{size}.db")
+            benchmark_suite.build_database(path, size)
+            timings.append(time_working_copy(path, size, writes, flush_every))
+            os.remove(path)
+
+    return timings
+
+
+def main():  # pragma: no cover
+    """Prints the timings of the sizes named on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs='+', default=SIZES,
+                        help="rows of the table to time at (default 1K, 100K and 1M)")
+    parser.add_argument("--writes", type=int, default=WRITES,
+                        help=f"single-row updates timed in each mode (default {WRITES})")
+    parser.add_argument("--flush-every", type=int, default=FLUSH_EVERY,
+                        help=f"writes between periodic flushes (default {FLUSH_EVERY})")
+    arguments = parser.parse_args()
+
+    print(f"{'rows':>10}{'MiB':>9}{'load ms':>10}{'flush ms':>10}{'disk ms/write':>15}"
+          f"{'write-through':>15}{'periodic':>10}")
+    for timing in run_timings(arguments.sizes, arguments.writes, arguments.flush_every):
+        print(f"{timing.rows:>10}{timing.size_bytes / 2 ** 20:>9.1f}{timing.load_ms:>10.1f}"
+              f"{timing.flush_ms:>10.1f}{timing.disk_write_ms:>15.3f}"
+              f"{timing.write_through_ms:>15.3f}{timing.periodic_write_ms:>10.3f}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,303 @@
+"""This program builds a bigger Northwind database for load testing. Every table of
+the source database gets scale factor times as many rows, and every foreign key
+points at a row that exists, so joins and keyed updates behave as on real data.
+
+The tables and indexes are created from the CREATE statements in the source's
+sqlite_master, so the copy has the same columns, types, collations and CHECK
+constraints. Each generated row starts as a copy of a source row, which keeps
+values and their mix of NULLs realistic. Its primary key is then made unique,
+and each foreign key is pointed at a random generated row of the parent table.
+A row whose primary key is made only of foreign keys is dropped when every
+combination of parent keys tried is taken, and the drops are reported.
+Rows go in with executemany in one transaction per table, and the indexes are
+created after the data.
+
+Instructions:
+    Include Northwind.db in the current directory.
+
+    Run "python northwind_generator.py 100" to write Northwind_100x.db with 100
+    times the rows of every table. Add "--seed 7" for a different but repeatable
+    database and "--output big.db" to choose the file name.
+
+Output:
+    Rows written for each table, with rows per second and rows dropped.
+
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+
+import sql_program
+
+SOURCE_DATABASE = "Northwind.db"
+BATCH_SIZE = 10000
+KEY_ATTEMPTS = 100
+
+
+def get_schema(connection):
+    """Gets the CREATE statements of the tables and indexes of a database.
+
+    Returns:
+        list: [table statements, index statements], internal sqlite_ objects,
+        search indexes and automatic indexes left out.
+
+    """
+    statements = connection.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE type IN ('table', 'index') "
+        "AND sql IS NOT NULL AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\' ORDER BY rowid;")
+
+    search_tables = sql_program.get_search_tables(connection)
+    tables = []
+    indexes = []
+    for object_type, name, sql in statements:
+        if name in search_tables:
+            continue
+        (tables if object_type == 'table' else indexes).append(sql)
+
+    return [tables, indexes]
+
+
+def get_foreign_keys(connection, catalog, selected_table):
+    """Gets the foreign keys of a table.
+
+    Args:
+        connection (sqlite3.Connection): open connection
+        catalog (SchemaCatalog): catalog of the database
+        selected_table (str): table name
+
+    Returns:
+        dict: column name to (parent table, parent column).
+
+    """
+    foreign_keys = {}
+    for row in connection.execute(f'PRAGMA foreign_key_list("{selected_table}");'):
+        parent_column = row[4] or catalog.table(row[2]).primary_key[0]
+        foreign_keys[row[3]] = (row[2], parent_column)
+
+    return foreign_keys
+
+
+def load_order(table_names, foreign_keys):
+    """Orders tables so every table comes after the tables it references.
+
+    Args:
+        table_names (list): table names
+        foreign_keys (dict): table name to its get_foreign_keys result
+
+    Returns:
+        list: table names, parents first.
+
+    """
+    ordered = []
+    visiting = set()
+
+    def visit(selected_table):
+        if selected_table in ordered or selected_table in visiting:
+            return
+        visiting.add(selected_table)
+        for parent, _ in foreign_keys[selected_table].values():
+            if parent != selected_table and parent in foreign_keys:
+                visit(parent)
+        ordered.append(selected_table)
+
+    for selected_table in table_names:
+        visit(selected_table)
+
+    return ordered
+
+
+def scaled_count(count, factor):
+    """Returns: int: rows a table of count rows gets at a scale factor."""
+    return max(1, round(count * factor)) if count else 0
+
+
+def new_key(template, number, is_integer, used, suffixes):
+    """Makes a unique primary key value that is not a foreign key.
+
+    Integer keys are numbered from 1. Other keys keep the template's value if
+    it is free, or else get the template's next numbered suffix that is free,
+    so a suffixed key never matches a key made from another template.
+
+    Args:
+        template: key value of the source row
+        number (int): number of the generated row
+        is_integer (bool): True to number the key from 1
+        used (set): key values already made for the column
+        suffixes (dict): template value to the last suffix it was given
+
+    Returns:
+        the key value, which is added to used.
+
+    """
+    if is_integer:
+        return number + 1
+
+    key = template
+    suffix = suffixes.get(template, 0)
+    while key in used:
+        suffix += 1
+        key = f"{template}{suffix}"
+    suffixes[template] = suffix
+    used.add(key)
+    return key
+
+
+def generate_rows(table, templates, count, foreign_keys, keys, rng):
+    """Yields the generated rows of one table.
+
+    Args:
+        table (TableSchema): schema of the table
+        templates (list): rows of the source table, copied in turn
+        count (int): rows to generate
+        foreign_keys (dict): column name to (parent table, parent column),
+        NULL foreign keys of a template stay NULL
+        keys (dict): (table, column) to the values generated for that column
+        rng (random.Random): random source
+
+    Yields:
+        list: values for the table's columns. A row whose primary key is only
+        foreign keys is left out when KEY_ATTEMPTS choices of them are taken.
+
+    """
+    positions = {column: num for num, column in enumerate(table.columns)}
+    linked = [(positions[column], keys.get(parent))
+              for column, parent in foreign_keys.items() if column in positions]
+    key_positions = [positions[column] for column in table.primary_key]
+    own_keys = [(positions[column], table.types[positions[column]].upper() == 'INTEGER')
+                for column in table.primary_key if column not in foreign_keys]
+    linked_key = bool(table.primary_key) and not own_keys
+    used = set()
+    own_used = [(set(), {}) for _ in own_keys]
+
+    for number in range(count):
+        template_number = number % len(templates)
+        row = list(templates[template_number])
+
+        for _ in range(KEY_ATTEMPTS):
+            for position, parent_keys in linked:
+                if parent_keys and templates[template_number][position] is not None:
+                    row[position] = rng.choice(parent_keys)
+            if not linked_key:
+                break
+            key = tuple(row[position] for position in key_positions)
+            if key not in used:
+                used.add(key)
+                break
+        else:
+            # Every combination of parent keys tried was taken.
+            continue
+
+        for (position, is_integer), (key_values, suffixes) in zip(own_keys, own_used):
+            row[position] = new_key(templates[template_number][position], number,
+                                    is_integer and len(own_keys) == 1, key_values, suffixes)
+
+        yield row
+
+
+def generate_database(source, target, factor, seed=0, batch_size=BATCH_SIZE):
+    """Writes a database with the schema of source and factor times its rows.
+
+    Args:
+        source (str): database whose schema and rows are the templates
+        target (str): name of the new database, which must not exist
+        factor (float): rows of each table compared with source
+        seed (int): seed of the random choices, the same seed gives the same
+        database
+        batch_size (int): rows per executemany
+
+    Returns:
+        list: (table, rows written, rows dropped, seconds) for every table in
+        load order.
+
+    """
+    assert factor > 0, "Scale factor must be above 0."
+    assert not os.path.exists(target), f"{target} already exists."
+
+    rng = random.Random(seed)
+    results = []
+    keys = {}
+
+    source_connection = sql_program.open_connection(source, 'ro')
+    target_connection = sqlite3.connect(target)
+    try:
+        table_sql, index_sql = get_schema(source_connection)
+        for sql in table_sql:
+            target_connection.execute(sql)
+        sql_program.apply_profile(target_connection, 'bulk-load')
+
+        catalog = sql_program.SchemaCatalog().refresh(source_connection)
+        foreign_keys = {name: get_foreign_keys(source_connection, catalog, name)
+                        for name in catalog.table_names()}
+        referenced = {parent for table_keys in foreign_keys.values()
+                      for parent in table_keys.values()}
+
+        for selected_table in load_order(catalog.table_names(), foreign_keys):
+            start = time.perf_counter()
+            table = catalog.table(selected_table)
+            templates = source_connection.execute(
+                f'SELECT * FROM "{selected_table}";').fetchall()
+            count = scaled_count(len(templates), factor)
+
+            columns = ', '.join(f'"{column}"' for column in table.columns)
+            placeholders = ', '.join('?' * len(table.columns))
+            insert_sql = f'INSERT INTO "{selected_table}"({columns}) VALUES({placeholders});'
+            kept = [(table.columns.index(column), (selected_table, column))
+                    for parent_table, column in referenced if parent_table == selected_table]
+            for _, key in kept:
+                keys[key] = []
+
+            written = 0
+            rows = generate_rows(table, templates, count, foreign_keys[selected_table],
+                                 keys, rng) if templates else iter(())
+            with target_connection:
+                while True:
+                    batch = [row for _, row in zip(range(batch_size), rows)]
+                    if not batch:
+                        break
+                    target_connection.executemany(insert_sql, batch)
+                    for position, key in kept:
+                        keys[key].extend(row[position] for row in batch)
+                    written += len(batch)
+
+            results.append((selected_table, written, count - written,
+                            time.perf_counter() - start))
+
+        with target_connection:
+            for sql in index_sql:
+                target_connection.execute(sql)
+            target_connection.execute("ANALYZE;")
+        # WAL was only for the load, leave the journal mode the source uses.
+        journal_mode = source_connection.execute("PRAGMA journal_mode;").fetchone()[0]
+        target_connection.execute(f"PRAGMA journal_mode = {journal_mode};")
+    finally:
+        source_connection.close()
+        target_connection.close()
+
+    return results
+
+
+def main():  # pragma: no cover
+    """Generates the database described on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("factor", type=float, help="rows of each table compared with source")
+    parser.add_argument("--source", default=SOURCE_DATABASE,
+                        help=f"database to copy the schema and rows of (default {SOURCE_DATABASE})")
+    parser.add_argument("--output", help="database to write (default Northwind_<factor>x.db)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random choices")
+    arguments = parser.parse_args()
+
+    target = arguments.output or f"Northwind_{arguments.factor:g}x.db"
+    start = time.perf_counter()
+    results = generate_database(arguments.source, target, arguments.factor, arguments.seed)
+
+    for selected_table, written, dropped, seconds in results:
+        rate = written / seconds if seconds else 0.0
+        print(f"{selected_table:<25}{written:>12} rows{rate:>14.0f} rows/s", end='')
+        print(f"{dropped:>10} dropped, parent keys taken" if dropped else '')
+    print(f"\nWrote {target} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
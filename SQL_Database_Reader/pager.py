@@ -0,0 +1,282 @@
+"""This program pages through a table in the terminal. Only the rows on screen
+are read and formatted, so the first screen of a table of millions of rows
+shows as fast as the first screen of a table of ten.
+
+Rows are read a page at a time by seeking on the table's key, as
+get_table_page does, and the last CACHE_PAGES pages read are kept so scrolling
+back needs no query. Jumping to a row finds the key of the row before it with
+an OFFSET over the key alone, then reads only the page it is on. The database
+is opened read-only.
+
+Instructions:
+    Include Northwind.db in the current directory.
+
+    Run "python pager.py Orders", or choose Browse in sql_program.
+
+    Keys:
+        Down, Up, j, k           one row
+        PgDn, PgUp, Space, b     one screen
+        Home, End, g, G          first or last row
+        Right, Left, l, h        one column
+        :                        jump to a row number
+        r                        read the table again
+        q                        quit
+
+Output:
+    The rows of the table that fit on screen, with a status line.
+
+"""
+import argparse
+import curses
+from collections import OrderedDict
+
+import sql_program
+
+DATABASE = "Northwind.db"
+CACHE_PAGES = 8
+# Widest a column is drawn, longer values are cut.
+MAX_WIDTH = 40
+
+
+class PageSource:
+    """Reads the rows of a table by row number, a page at a time.
+
+    Args:
+        selected_table (str): table name
+        database (str or ConnectionManager): database name or open manager
+        page_size (int): rows read at a time
+        cache_pages (int): most pages kept in memory
+
+    """
+
+    def __init__(self, selected_table, database, page_size=sql_program.PAGE_SIZE,
+                 cache_pages=CACHE_PAGES):
+        assert page_size > 0, "Page size must be at least 1."
+        assert cache_pages > 0, "Cache must hold at least 1 page."
+
+        self.selected_table = selected_table
+        self.database = database
+        self.page_size = page_size
+        self.cache_pages = cache_pages
+        self.field_names = sql_program.get_field_names(selected_table, database)
+        self.hits = 0
+        self.misses = 0
+        with sql_program.connect(database) as connection:
+            catalog = sql_program.get_catalog(database, connection)
+            self._key = catalog.table(selected_table).page_key
+        self.refresh()
+
+    def refresh(self):
+        """Forgets the pages read and counts the rows again."""
+        self._pages = OrderedDict()
+        # Key of the row before the first row of each page found so far.
+        self._starts = {0: None}
+        with sql_program.connect(self.database) as connection:
+            self.count = connection.execute(
+                f'SELECT COUNT(*) FROM "{self.selected_table}";').fetchone()[0]
+
+    def page(self, number):
+        """Gets the rows of one page, from the cache if it was read lately.
+
+        Args:
+            number (int): page number, 0 for the first page
+
+        Returns:
+            list: rows of the page, empty past the last row.
+
+        """
+        rows = self._pages.get(number)
+        if rows is not None:
+            self._pages.move_to_end(number)
+            self.hits += 1
+            return rows
+
+        self.misses += 1
+        key_length = len(self._key)
+        with sql_program.connect(self.database) as connection:
+            after = self._start(connection, number)
+            # Only the first page starts before every key, later ones without a
+            # start key are past the last row.
+            keyed_rows = [] if number and after is None else sql_program.select_keyed_rows(
+                connection, self.selected_table, self._key, after, self.page_size)
+
+        rows = [row[key_length:] for row in keyed_rows]
+        if keyed_rows:
+            self._starts[number + 1] = keyed_rows[-1][:key_length]
+        self._pages[number] = rows
+        while len(self._pages) > self.cache_pages:
+            self._pages.popitem(last=False)
+
+        return rows
+
+    def rows(self, start, count):
+        """Gets count rows from row number start, 0 for the first row.
+
+        Returns:
+            list: the rows, fewer past the end of the table.
+
+        """
+        rows = []
+        number, offset = divmod(start, self.page_size)
+        while len(rows) < count:
+            page = self.page(number)
+            rows.extend(page[offset:offset + count - len(rows)])
+            if len(page) < self.page_size:
+                break
+            number, offset = number + 1, 0
+
+        return rows
+
+    def _start(self, connection, number):
+        """Gets the key to seek past for a page, by OFFSET over the key if unknown."""
+        if number in self._starts:
+            return self._starts[number]
+
+        key_columns = ', '.join(self._key)
+        row = connection.execute(
+            f'SELECT {key_columns} FROM "{self.selected_table}" ORDER BY {key_columns} '
+            f'LIMIT 1 OFFSET ?;', [number * self.page_size - 1]).fetchone()
+        self._starts[number] = tuple(row) if row is not None else None
+        return self._starts[number]
+
+
+def visible_columns(widths, first_column, screen_width, prefix_width):
+    """Gets the columns that fit on screen from first_column on.
+
+    Returns:
+        range: column numbers, always at least first_column.
+
+    """
+    used = prefix_width
+    last = first_column
+    while last < len(widths) and (last == first_column
+                                  or used + widths[last] + 5 <= screen_width):
+        used += widths[last] + 5
+        last += 1
+
+    return range(first_column, last)
+
+
+def render(field_names, rows, widths, first_row, first_column, screen_width):
+    """Formats the header and rows of the window on screen.
+
+    Args:
+        field_names (list): field names of the table
+        rows (list): rows on screen
+        widths (list): width of every column
+        first_row (int): row number of the first row, 0 for the first row
+        first_column (int): first column on screen
+        screen_width (int): characters that fit on a line
+
+    Returns:
+        list: header line, then one line for each row, cut to screen_width.
+
+    """
+    number_width = max(5, len(str(first_row + len(rows))))
+    columns = visible_columns(widths, first_column, screen_width, number_width + 3)
+    row_format = sql_program.compile_row_format([widths[num] for num in columns],
+                                                f'{{0:<{number_width}}} | ', True)
+
+    lines = [row_format.format('Row #', *[field_names[num] for num in columns])]
+    for number, row in enumerate(rows, first_row + 1):
+        lines.append(row_format.format(number, *[row[num] for num in columns]))
+
+    return [line[:screen_width] for line in lines]
+
+
+def ask_row(screen, height):  # pragma: no cover
+    """Reads a row number typed on the status line, or None."""
+    screen.move(height - 1, 0)
+    screen.clrtoeol()
+    screen.addstr(height - 1, 0, "Row: ")
+    curses.echo()
+    try:
+        text = screen.getstr(height - 1, 5, 12).decode()
+    finally:
+        curses.noecho()
+
+    return int(text) if text.strip().isdigit() else None
+
+
+def run_pager(screen, source, widths):  # pragma: no cover
+    """Draws the window of rows and moves it on key presses until q."""
+    curses.curs_set(0)
+    first_row = 0
+    first_column = 0
+
+    while True:
+        height, width = screen.getmaxyx()
+        visible = max(1, height - 2)
+        last_first_row = max(0, source.count - visible)
+        first_row = max(0, min(first_row, last_first_row))
+
+        lines = render(source.field_names, source.rows(first_row, visible), widths,
+                       first_row, first_column, width - 1)
+        screen.erase()
+        screen.addstr(0, 0, lines[0], curses.A_BOLD)
+        for num, line in enumerate(lines[1:], 1):
+            screen.addstr(num, 0, line)
+        status = (f" {source.selected_table}: rows {first_row + 1}-"
+                  f"{min(first_row + visible, source.count)} of {source.count}, column "
+                  f"{first_column + 1} of {len(widths)}, cache {source.hits} hits "
+                  f"{source.misses} reads  (: jump, q quit)")
+        screen.addstr(height - 1, 0, status[:width - 1], curses.A_REVERSE)
+        screen.refresh()
+
+        key = screen.getch()
+        if key in (ord('q'), 27):
+            return
+        if key in (curses.KEY_DOWN, ord('j')):
+            first_row += 1
+        elif key in (curses.KEY_UP, ord('k')):
+            first_row -= 1
+        elif key in (curses.KEY_NPAGE, ord(' ')):
+            first_row += visible
+        elif key in (curses.KEY_PPAGE, ord('b')):
+            first_row -= visible
+        elif key in (curses.KEY_HOME, ord('g')):
+            first_row = 0
+        elif key in (curses.KEY_END, ord('G')):
+            first_row = last_first_row
+        elif key in (curses.KEY_RIGHT, ord('l')):
+            first_column = min(first_column + 1, len(widths) - 1)
+        elif key in (curses.KEY_LEFT, ord('h')):
+            first_column = max(first_column - 1, 0)
+        elif key == ord(':'):
+            row = ask_row(screen, height)
+            if row:
+                first_row = row - 1
+        elif key == ord('r'):
+            source.refresh()
+
+
+def browse(selected_table, database_name, profile='default'):  # pragma: no cover
+    """Pages through a table on a read-only connection until the user quits.
+
+    Args:
+        selected_table (str): table name
+        database_name (str): database name
+        profile (str): name of the sql_program.PROFILES settings
+
+    """
+    with sql_program.ConnectionManager(database_name, profile=profile,
+                                       read_only=True) as manager:
+        source = PageSource(selected_table, manager)
+        widths = sql_program.plan_column_widths(selected_table, manager, source.field_names,
+                                                sql_program.WIDTH_SAMPLE, MAX_WIDTH)
+        curses.wrapper(run_pager, source, widths)
+
+
+def main():  # pragma: no cover
+    """Pages through the table named on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("table", help="table to page through")
+    parser.add_argument("--database", default=DATABASE,
+                        help=f"database to open (default {DATABASE})")
+    arguments = parser.parse_args()
+
+    browse(arguments.table, arguments.database)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
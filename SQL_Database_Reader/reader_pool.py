@@ -0,0 +1,268 @@
+"""This program serves table views from a pool of reader threads on a read-only
+database, and measures how read throughput grows with the number of readers
+while another connection keeps writing.
+
+Every connection of a ReaderPool is opened with mode=ro, so browsing never
+takes a write lock or a RESERVED lock that would hold up a writer. Each thread
+borrows its own connection from the pool's ConnectionManager, and SQLite runs
+their statements at the same time because the sqlite3 module releases the GIL
+while a statement steps. An archived snapshot that nothing writes to can be
+opened with immutable=1, which also skips file locking and change checks.
+
+The benchmark works on a copy of the database in a temporary directory. Each
+reader pages through a table with get_table_page, and one writer thread
+inserts and commits a row at a time into a table of its own. The result cache
+is turned off so every page is read from SQLite.
+
+Instructions:
+    Include Northwind.db in the current directory.
+
+    Run "python reader_pool.py" to measure 1, 4 and 16 readers against one
+    writer for 2 seconds each. Add "--profile read-heavy" to measure with WAL,
+    "--readers 1 2 8 --seconds 5" for other counts, or "--immutable" to measure
+    readers of an immutable snapshot without a writer.
+
+Usage:
+    with ReaderPool("Northwind.db", readers=4) as pool:
+        pages = pool.views(["Orders", "Customers"])
+
+Output:
+    Rows read per second, pages read and commits per second for every number
+    of readers.
+
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import sql_program
+
+SOURCE_DATABASE = "Northwind.db"
+READERS = [1, 4, 16]
+SECONDS = 2.0
+BENCHMARK_TABLE = "Orders"
+
+ReadResult = namedtuple('ReadResult', ['readers', 'rows', 'pages', 'busy', 'writes',
+                                       'seconds'])
+
+
+class ReaderPool:
+    """Runs reads on a pool of threads, each with its own read-only connection.
+
+    Args:
+        database (str): database name
+        readers (int): reader threads, and read-only connections kept open
+        immutable (bool): True to open a snapshot nothing writes to as
+        immutable, without file locks
+        profile (str): name of the sql_program.PROFILES settings
+        cache_budget (int): bytes of reads kept in the result cache, 0 to read
+        every page from SQLite
+
+    """
+
+    def __init__(self, database, readers=4, immutable=False, profile='default',
+                 cache_budget=sql_program.RESULT_CACHE_BUDGET):
+        assert readers > 0, "A pool needs at least 1 reader."
+
+        self.readers = readers
+        self.manager = sql_program.ConnectionManager(
+            database, pool_size=readers, cache_budget=cache_budget, profile=profile,
+            read_only=True, immutable=immutable)
+        self._threads = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='reader')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, call):
+        """Runs call(manager) on a reader thread.
+
+        Returns:
+            concurrent.futures.Future: the result of call.
+
+        """
+        return self._threads.submit(call, self.manager)
+
+    def view(self, selected_table, after=None, page_size=sql_program.PAGE_SIZE):
+        """Reads one page of a table on a reader thread.
+
+        Returns:
+            concurrent.futures.Future: the [rows, key] of get_table_page.
+
+        """
+        return self.submit(lambda manager: sql_program.get_table_page(
+            selected_table, manager, after, page_size))
+
+    def views(self, tables, page_size=sql_program.PAGE_SIZE):
+        """Reads the first page of several tables at the same time.
+
+        Args:
+            tables (list): table names
+            page_size (int): most rows of each page
+
+        Returns:
+            dict: table name to its rows.
+
+        """
+        futures = {selected_table: self.view(selected_table, page_size=page_size)
+                   for selected_table in tables}
+        return {selected_table: future.result()[0] for selected_table, future in futures.items()}
+
+    def close(self):
+        """Waits for the running reads, then closes every connection."""
+        self._threads.shutdown()
+        self.manager.close()
+
+
+def read_pages(manager, selected_table, deadline, page_size=sql_program.PAGE_SIZE):
+    """Pages through a table again and again until deadline.
+
+    Args:
+        manager (ConnectionManager): manager lending this thread a connection
+        selected_table (str): table name
+        deadline (float): time.perf_counter() value to stop at
+        page_size (int): most rows of each page
+
+    Returns:
+        tuple: (rows read, pages read, reads that failed as busy)
+
+    """
+    rows = pages = busy = 0
+    after = None
+    while time.perf_counter() < deadline:
+        try:
+            page, after = sql_program.get_table_page(selected_table, manager, after, page_size)
+        except sqlite3.OperationalError:
+            # Locked out by the writer for longer than the busy timeout.
+            busy += 1
+            continue
+        rows += len(page)
+        pages += 1
+
+    return rows, pages, busy
+
+
+def write_rows(database, profile, deadline):
+    """Inserts and commits one row at a time until deadline.
+
+    Returns:
+        int: transactions committed.
+
+    """
+    connection = sql_program.open_connection(database, profile=profile)
+    try:
+        connection.execute("CREATE TABLE IF NOT EXISTS BenchmarkWrites("
+                           "WriteID INTEGER PRIMARY KEY, WrittenAt REAL);")
+        connection.commit()
+        writes = 0
+        while time.perf_counter() < deadline:
+            try:
+                with connection:
+                    connection.execute("INSERT INTO BenchmarkWrites(WrittenAt) VALUES(?);",
+                                       [time.time()])
+            except sqlite3.OperationalError:
+                continue
+            writes += 1
+    finally:
+        connection.close()
+
+    return writes
+
+
+def measure_readers(database, readers, seconds=SECONDS, selected_table=BENCHMARK_TABLE,
+                    profile='default', immutable=False):
+    """Measures read throughput of a number of readers for some seconds.
+
+    Args:
+        database (str): database name, written to unless immutable
+        readers (int): reader threads
+        seconds (float): how long to read
+        selected_table (str): table the readers page through
+        profile (str): name of the sql_program.PROFILES settings
+        immutable (bool): True to read the database as an immutable snapshot
+        with no writer
+
+    Returns:
+        ReadResult: rows and pages read, busy failures and commits.
+
+    """
+    with ReaderPool(database, readers, immutable, profile, cache_budget=0) as pool:
+        # The schema is read once, before the clock starts.
+        sql_program.get_field_names(selected_table, pool.manager)
+        start = time.perf_counter()
+        deadline = start + seconds
+
+        writer = None
+        writes = []
+        if not immutable:
+            writer = threading.Thread(
+                target=lambda: writes.append(write_rows(database, profile, deadline)))
+            writer.start()
+
+        futures = [pool.submit(lambda manager: read_pages(manager, selected_table, deadline))
+                   for _ in range(readers)]
+        counts = [future.result() for future in futures]
+        if writer is not None:
+            writer.join()
+        elapsed = time.perf_counter() - start
+
+    return ReadResult(readers, sum(count[0] for count in counts),
+                      sum(count[1] for count in counts), sum(count[2] for count in counts),
+                      sum(writes), elapsed)
+
+
+def run_benchmark(source, reader_counts=None, seconds=SECONDS, selected_table=BENCHMARK_TABLE,
+                  profile='default', immutable=False):
+    """Measures every number of readers on a copy of source.
+
+    Returns:
+        list: ReadResult for every number of readers.
+
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, os.path.basename(source))
+        shutil.copyfile(source, database)
+        for readers in reader_counts or READERS:
+            results.append(measure_readers(database, readers, seconds, selected_table,
+                                           profile, immutable))
+
+    return results
+
+
+def main():  # pragma: no cover
+    """Runs the benchmark described on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", default=SOURCE_DATABASE,
+                        help=f"database to copy and read (default {SOURCE_DATABASE})")
+    parser.add_argument("--readers", type=int, nargs='+', default=READERS,
+                        help="numbers of reader threads to measure (default 1 4 16)")
+    parser.add_argument("--seconds", type=float, default=SECONDS,
+                        help=f"seconds to measure each number of readers (default {SECONDS})")
+    parser.add_argument("--table", default=BENCHMARK_TABLE,
+                        help=f"table the readers page through (default {BENCHMARK_TABLE})")
+    parser.add_argument("--profile", choices=list(sql_program.PROFILES), default='default',
+                        help="SQLite settings of every connection")
+    parser.add_argument("--immutable", action="store_true",
+                        help="read an immutable snapshot, with no writer")
+    arguments = parser.parse_args()
+
+    results = run_benchmark(arguments.database, arguments.readers, arguments.seconds,
+                            arguments.table, arguments.profile, arguments.immutable)
+
+    print(f"{'readers':>8}{'rows/s':>14}{'pages':>10}{'busy':>8}{'commits/s':>12}")
+    for result in results:
+        print(f"{result.readers:>8}{result.rows / result.seconds:>14.0f}{result.pages:>10}"
+              f"{result.busy:>8}{result.writes / result.seconds:>12.0f}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
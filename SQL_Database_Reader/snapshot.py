@@ -0,0 +1,228 @@
+"""This program takes consistent snapshots of a database while it is in use, and
+keeps only the newest of them.
+
+Copying the file with cp while sql_program writes can catch a transaction
+half written. A snapshot is taken with Connection.backup on a read-only
+connection instead. It copies PAGES pages at a time and sleeps between steps,
+so the session's writes go ahead while the snapshot runs. If another
+connection changes the database during the copy, SQLite starts the copy again,
+so every snapshot holds the database as of one moment. The copy is written
+next to its final name, checked with PRAGMA quick_check, optionally gzipped,
+and only then renamed, so a snapshot that exists is always complete.
+
+Snapshots are named <database>_<YYYYmmdd_HHMMSS>.db, or .db.gz compressed.
+
+Instructions:
+    Include Northwind.db in the current directory.
+
+    Run "python snapshot.py" to write a snapshot to the snapshots directory
+    and keep the newest 7. Add "--compress" to gzip it, "--keep 30" or
+    "--max-age-days 14" to change what is kept, and "--pages 64 --sleep 0.05"
+    to copy more gently while the program is busy.
+
+Output:
+    Progress while copying, then the snapshot's size, time and throughput
+    and the old snapshots removed.
+
+"""
+import argparse
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import time
+from collections import namedtuple
+
+import sql_program
+
+DATABASE = "Northwind.db"
+DIRECTORY = "snapshots"
+PAGES = 256
+SLEEP = 0.005
+KEEP = 7
+
+SnapshotReport = namedtuple('SnapshotReport', ['path', 'pages', 'bytes', 'seconds',
+                                               'restarts'])
+
+
+def snapshot_pattern(database):
+    """Returns: re.Pattern: matches the snapshot file names of a database."""
+    stem = os.path.splitext(os.path.basename(database))[0]
+    return re.compile(rf"^{re.escape(stem)}_(\d{{8}})_(\d{{6}})(?:_(\d+))?\.db(?:\.gz)?$")
+
+
+def snapshot_path(database, directory, when, compress=False):
+    """Names a new snapshot, numbering it if one was taken the same second.
+
+    Args:
+        database (str): database name
+        directory (str): directory of the snapshots
+        when (time.struct_time): time of the snapshot
+        compress (bool): True for a .db.gz name
+
+    Returns:
+        str: path of a snapshot that does not exist yet.
+
+    """
+    stem = os.path.splitext(os.path.basename(database))[0]
+    name = f"{stem}_{time.strftime('%Y%m%d_%H%M%S', when)}"
+    extension = '.db.gz' if compress else '.db'
+
+    # Numbered past snapshots of that second with either extension, so the
+    # number orders them.
+    number = 0
+    numbered = name
+    while any(os.path.exists(os.path.join(directory, f"{numbered}{taken}"))
+              for taken in ['.db', '.db.gz']):
+        number += 1
+        numbered = f"{name}_{number}"
+
+    return os.path.join(directory, f"{numbered}{extension}")
+
+
+def take_snapshot(database, directory=DIRECTORY, compress=False, pages=PAGES, sleep=SLEEP,
+                  progress=None):
+    """Copies a database that may be in use into a consistent snapshot.
+
+    Args:
+        database (str): database name
+        directory (str): directory for the snapshot, made if missing
+        compress (bool): True to gzip the snapshot
+        pages (int): pages copied by each step
+        sleep (float): seconds between steps, for the session to run its writes
+        progress (function): called after every step with (pages copied,
+        total pages), or None
+
+    Returns:
+        SnapshotReport: path, pages, bytes written, seconds taken and times
+        the copy started again because the database changed.
+
+    Raises:
+        sqlite3.DatabaseError: If the copy fails its quick_check.
+
+    """
+    assert pages > 0, "Copy at least 1 page a step."
+
+    os.makedirs(directory, exist_ok=True)
+    path = snapshot_path(database, directory, time.localtime(), compress)
+    # Written under .partial names, renamed once complete.
+    partial = f"{path}.partial"
+    copy = f"{path.removesuffix('.gz')}.partial"
+    state = {'remaining': None, 'restarts': 0, 'total': 0}
+
+    def step(status, remaining, total):
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+        state['remaining'] = remaining
+        state['total'] = total
+        if progress is not None:
+            progress(total - remaining, total)
+
+    start = time.perf_counter()
+    source = sql_program.open_connection(database, 'ro')
+    target = sqlite3.connect(copy)
+    try:
+        source.backup(target, pages=pages, progress=step, sleep=sleep)
+        check = target.execute("PRAGMA quick_check;").fetchone()[0]
+        if check != 'ok':
+            raise sqlite3.DatabaseError(f"Snapshot failed its check: {check}")
+    except BaseException:
+        target.close()
+        os.remove(copy)
+        raise
+    finally:
+        source.close()
+    target.close()
+
+    if compress:
+        with open(copy, 'rb') as file, gzip.open(partial, 'wb') as packed:
+            shutil.copyfileobj(file, packed)
+        os.remove(copy)
+    os.replace(partial, path)
+
+    return SnapshotReport(path, state['total'], os.path.getsize(path),
+                          time.perf_counter() - start, state['restarts'])
+
+
+def list_snapshots(database, directory=DIRECTORY):
+    """Returns: list: paths of the snapshots of a database, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+
+    pattern = snapshot_pattern(database)
+    snapshots = []
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            day, second, number = match.groups()
+            snapshots.append(((day, second, int(number or 0)), name))
+
+    return [os.path.join(directory, name) for _, name in sorted(snapshots)]
+
+
+def apply_retention(database, directory=DIRECTORY, keep=KEEP, max_age_days=None, now=None):
+    """Removes the snapshots a retention policy does not keep.
+
+    Args:
+        database (str): database name
+        directory (str): directory of the snapshots
+        keep (int): newest snapshots always kept
+        max_age_days (float): snapshots older than this are removed unless
+        among the newest keep, None to keep only by count
+        now (float): current time.time(), for tests
+
+    Returns:
+        list: paths removed.
+
+    """
+    assert keep > 0, "Keep at least 1 snapshot."
+
+    now = time.time() if now is None else now
+    snapshots = list_snapshots(database, directory)
+    older = snapshots[:-keep]
+    if max_age_days is not None:
+        older = [path for path in older if now - os.path.getmtime(path) > max_age_days * 86400]
+
+    for path in older:
+        os.remove(path)
+
+    return older
+
+
+def main():  # pragma: no cover
+    """Takes a snapshot and applies the retention policy named on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", default=DATABASE,
+                        help=f"database to snapshot (default {DATABASE})")
+    parser.add_argument("--directory", default=DIRECTORY,
+                        help=f"directory of the snapshots (default {DIRECTORY})")
+    parser.add_argument("--compress", action="store_true", help="gzip the snapshot")
+    parser.add_argument("--keep", type=int, default=KEEP,
+                        help=f"newest snapshots to keep (default {KEEP})")
+    parser.add_argument("--max-age-days", type=float,
+                        help="also keep older snapshots up to this many days old")
+    parser.add_argument("--pages", type=int, default=PAGES,
+                        help=f"pages copied by each step (default {PAGES})")
+    parser.add_argument("--sleep", type=float, default=SLEEP,
+                        help=f"seconds between steps (default {SLEEP})")
+    arguments = parser.parse_args()
+
+    def progress(copied, total):
+        print(f"\rCopied {copied} of {total} pages ({copied / total:.0%})", end='', flush=True)
+
+    report = take_snapshot(arguments.database, arguments.directory, arguments.compress,
+                           arguments.pages, arguments.sleep, progress)
+    removed = apply_retention(arguments.database, arguments.directory, arguments.keep,
+                              arguments.max_age_days)
+
+    rate = report.pages / report.seconds if report.seconds else 0.0
+    print(f"\nWrote {report.path}: {report.pages} pages, {report.bytes / 2 ** 20:.2f} MiB "
+          f"in {report.seconds:.3f}s ({rate:.0f} pages/s), "
+          f"{report.restarts} restarts after writes")
+    for path in removed:
+        print(f"Removed {path}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -9,6 +9,27 @@ Instructions:
     https://en.wikiversity.org/wiki/Database_Examples/Northwind/SQLite
 
     Run program and enter an integer that corresponds with the desired table
+
+    Run "python sql_program.py --profile interactive" to open the database with
+    one of the PROFILES of SQLite settings.
+
+    Run "python sql_program.py --stats" to print how long every statement took
+    when the program exits, and add "--slow-log slow.log" to log the statements
+    that took 100 ms or more ("--slow-ms" changes the threshold).
+
+    Run "python sql_program.py --read-only" to browse without write locks, or
+    add "--immutable" for an archived copy that nothing writes to.
+
+    Choose Browse to page through a whole table on screen, see pager.py.
+
+    Choose Search on a table with an index built by full_text_search.py to
+    find rows by the words in them.
+
+    Run "python sql_program.py --in-memory write-through" to edit a copy of the
+    database in memory, see memory_copy.py.
+
+    Run "python sql_program.py --script changes.txt" to run the operations in
+    changes.txt without prompts, see batch_mode.py for the script format.
     
 Output:
     The selected table's rows of data.
@@ -21,43 +42,591 @@ References:
     a-variable-in-python-abe0a77c287a
 
 """
+import argparse
+import queue
+import re
 import sqlite3
 import sys
+import threading
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from itertools import islice
 from urllib.request import pathname2url
 
-
-def get_tables(database):
-    """Gets the names of tables in database.
+PAGE_SIZE = 100
+WIDTH_SAMPLE = 1000
+ROW_BATCH = 256
+RESULT_CACHE_BUDGET = 64 * 1024 * 1024
+STATEMENT_CACHE_SIZE = 256
+
+TableSchema = namedtuple('TableSchema', ['name', 'columns', 'types', 'primary_key',
+                                         'indexes', 'page_key'])
+IndexSchema = namedtuple('IndexSchema', ['name', 'unique', 'origin', 'columns', 'sql'])
+
+FILTER_OPERATORS = ['=', '!=', '<=', '>=', '<', '>', 'NOT LIKE', 'LIKE', 'IS NOT', 'IS']
+FILTER_PATTERN = re.compile(
+    r"^\s*(\w+)\s*(" + '|'.join(re.escape(operator).replace(r'\ ', r'\s+')
+                             for operator in FILTER_OPERATORS) + r")\s*(.*?)\s*$",
+    re.IGNORECASE)
+
+# Search indexes of a table are named <table>_fts, see full_text_search.py.
+SEARCH_INDEX_SUFFIX = '_fts'
+# Tables FTS5 creates to store a search index named <index>_<suffix>.
+FTS5_SHADOW_SUFFIXES = ['data', 'idx', 'content', 'docsize', 'config']
+
+# PRAGMA settings applied to every connection opened with the profile. WAL is
+# stored in the database file, so it stays on for later connections too.
+PROFILES = {
+    'default': {},
+    'interactive': {'journal_mode': 'WAL', 'synchronous': 'NORMAL',
+                    'cache_size': -16000, 'temp_store': 'MEMORY'},
+    'read-heavy': {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'cache_size': -64000,
+                   'mmap_size': 256 * 1024 * 1024, 'temp_store': 'MEMORY'},
+    'bulk-load': {'journal_mode': 'WAL', 'synchronous': 'OFF', 'cache_size': -256000,
+                  'temp_store': 'MEMORY'},
+}
+
+
+def open_connection(database, mode='rw', profile='default', immutable=False):
+    """Opens a connection to database.
 
     Args:
         database (str): database name
+        mode (str): SQLite URI mode, 'rw' or 'ro'
+        profile (str): name of the PROFILES settings to apply
+        immutable (bool): True for a database file nothing changes, e.g. an
+        archived snapshot. SQLite then takes no locks and never checks for
+        changes, so only use it with mode 'ro' on a file no one writes.
 
     Returns:
-        list: Names of tables in database.
+        sqlite3.Connection: connection usable from any thread. Statements are
+        prepared once and reused from a cache of STATEMENT_CACHE_SIZE.
 
     """
-    tables_list = []
+    assert not immutable or mode == 'ro', "Only read-only connections can be immutable."
 
     try:
-        database_path = f'file:{pathname2url(database)}?mode=rw'
-        connection = sqlite3.connect(database_path, uri=True)
+        database_path = f'file:{pathname2url(database)}?mode={mode}'
+        if immutable:
+            database_path = f'{database_path}&immutable=1'
+        connection = sqlite3.connect(database_path, uri=True, check_same_thread=False,
+                                     cached_statements=STATEMENT_CACHE_SIZE)
     except:
         print(f"Unable to connect to {database}")
         raise
 
-    sql = "SELECT name FROM sqlite_master WHERE type='table';"
+    apply_profile(connection, profile, mode)
+
+    return connection
+
+
+def apply_profile(connection, profile, mode='rw'):
+    """Applies the PRAGMA settings of a profile to a connection.
+
+    The journal mode is changed only on connections that can write.
+
+    Args:
+        connection (sqlite3.Connection): open connection
+        profile (str): name of the PROFILES settings
+        mode (str): SQLite URI mode the connection was opened with
+
+    Returns:
+        None.
+
+    """
+    assert profile in PROFILES, f"Unknown profile: {profile}"
+
+    for pragma, value in PROFILES[profile].items():
+        if pragma == 'journal_mode' and mode == 'ro':
+            continue
+        connection.execute(f"PRAGMA {pragma} = {value};").fetchall()
+
+
+class ConnectionManager:
+    """Keeps connections to a database open for a whole session.
+
+    The thread that creates the manager reads and writes through one primary
+    connection, so its page cache and parsed schema survive between calls.
+    Other threads borrow read-only connections from a small pool. Pass the
+    manager anywhere a database name is accepted.
+
+    A read-only manager opens the primary connection with mode=ro as well, so
+    the session never takes a write lock and every write fails in SQLite.
+
+    Args:
+        database (str): database name
+        pool_size (int): most reader connections kept open for other threads
+        cache_budget (int): bytes of table reads kept in the result cache
+        profile (str): name of the PROFILES settings for every connection
+        read_only (bool): True to open every connection read-only
+        immutable (bool): True to open a read-only snapshot nothing writes to
+        as immutable, without file locks
+
+    """
+
+    def __init__(self, database, pool_size=4, cache_budget=RESULT_CACHE_BUDGET,
+                 profile='default', read_only=False, immutable=False):
+        assert pool_size > 0, "Pool size must be at least 1."
+        assert read_only or not immutable, "An immutable database must be read-only."
+
+        self.database = database
+        self.pool_size = pool_size
+        self.profile = profile
+        self.read_only = read_only
+        self.immutable = immutable
+        self._owner = threading.get_ident()
+        self._lock = threading.RLock()
+        # The pool has a lock of its own, so borrowing never waits for a
+        # statement running on the primary connection.
+        self._pool_lock = threading.Lock()
+        self._primary = self._open_primary()
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        self._borrowed = threading.local()
+        self._closed = False
+        self.catalog = SchemaCatalog()
+        self.results = ResultCache(cache_budget)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @contextmanager
+    def writer(self):
+        """Yields the primary connection, locked for the calling thread."""
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection manager is closed.")
+            yield self._primary
+
+    def temp_writer(self):
+        """Yields the primary connection for changes to its temp schema only.
+
+        Temp tables live in the connection and never reach the database file,
+        so a manager that copies writes to the file can leave these out.
+
+        """
+        return self.writer()
+
+    @contextmanager
+    def reader(self):
+        """Yields a connection for reading.
+
+        The owning thread gets the primary connection so it sees its own
+        writes; any other thread gets a pooled read-only connection, the same
+        one for reads nested inside each other.
+
+        """
+        if threading.get_ident() == self._owner:
+            with self.writer() as connection:
+                yield connection
+            return
+
+        connection = getattr(self._borrowed, 'connection', None)
+        if connection is not None:
+            yield connection
+            return
+
+        connection = self._borrow()
+        self._borrowed.connection = connection
+        try:
+            yield connection
+        finally:
+            self._borrowed.connection = None
+            self._readers.put(connection)
+
+    def data_version(self, connection=None):
+        """Gets a value that changes whenever the database changes.
+
+        PRAGMA data_version changes when another connection commits, and the
+        primary connection's total_changes when this session writes. Both
+        belong to the connection they are read on, so versions read on
+        different connections do not compare. An immutable database never
+        changes, so its readers skip the queries.
+
+        Args:
+            connection (sqlite3.Connection): connection lent by this manager
+            to read the version on, or None for the primary connection
+
+        Returns:
+            tuple: (schema_version, data_version, total_changes)
+
+        """
+        if self.immutable:
+            return 0, 0, 0
+
+        if connection is None:
+            with self.writer() as primary:
+                return self.data_version(primary)
+
+        schema_version = connection.execute("PRAGMA schema_version;").fetchone()[0]
+        data_version = connection.execute("PRAGMA data_version;").fetchone()[0]
+        return schema_version, data_version, connection.total_changes
+
+    def interrupt(self):
+        """Stops the statement running on the primary connection.
+
+        Safe to call from any thread. The statement fails with
+        sqlite3.OperationalError "interrupted" and its changes are undone.
+
+        """
+        self._primary.interrupt()
+
+    def _open_primary(self):
+        """Returns: sqlite3.Connection: the connection the owning thread uses."""
+        return open_connection(self.database, 'ro' if self.read_only else 'rw', self.profile,
+                               self.immutable)
+
+    def _borrow(self):
+        """Takes an idle reader connection, opening one if the pool has room."""
+        with self._pool_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection manager is closed.")
+            try:
+                return self._readers.get_nowait()
+            except queue.Empty:
+                pass
+            if self._reader_count < self.pool_size:
+                self._reader_count += 1
+                return open_connection(self.database, 'ro', self.profile, self.immutable)
+
+        return self._readers.get()
+
+    def close(self):
+        """Closes the primary connection and every idle reader connection."""
+        with self._lock, self._pool_lock:
+            if self._closed:
+                return
+            self._closed = True
+            while True:
+                try:
+                    self._readers.get_nowait().close()
+                except queue.Empty:
+                    break
+            # Closed last so it can checkpoint and remove a WAL file.
+            self._primary.close()
+
+
+@contextmanager
+def connect(database, write=False):
+    """Yields a connection to database.
+
+    Args:
+        database (str or ConnectionManager): database name or open manager
+        write (bool): True if the connection will be used to change data
+
+    A database name opens a connection that is closed on exit, a manager
+    lends one of its open connections instead.
+
+    """
+    if isinstance(database, ConnectionManager):
+        with database.writer() if write else database.reader() as connection:
+            yield connection
+        return
+
+    connection = open_connection(database)
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+
+class SchemaCatalog:
+    """Keeps the tables, columns and keys of a database in memory.
+
+    The schema is read from sqlite_master and PRAGMA table_info/index_list
+    once, then reused until PRAGMA schema_version shows it has changed.
+    Internal sqlite_ tables are left out.
+
+    """
+
+    def __init__(self):
+        self.schema_version = None
+        self.tables = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, connection):
+        """Reloads the schema if it changed since the last refresh.
+
+        Args:
+            connection (sqlite3.Connection): open connection to the database
+
+        Returns:
+            SchemaCatalog: this catalog.
+
+        """
+        schema_version = connection.execute("PRAGMA schema_version;").fetchone()[0]
+        if schema_version == self.schema_version:
+            return self
+
+        with self._lock:
+            if schema_version != self.schema_version:
+                self.tables = load_schema(connection)
+                self.schema_version = schema_version
+
+        return self
+
+    def table_names(self):
+        """Returns: list: names of the tables in the database."""
+        return list(self.tables)
+
+    def table(self, selected_table):
+        """Gets the schema of one table.
+
+        Args:
+            selected_table (str): table name
+
+        Returns:
+            TableSchema: the table's columns, types, keys and indexes.
 
-    cursor = connection.cursor()
+        Raises:
+            sqlite3.OperationalError: If the table does not exist.
 
-    cursor.execute(sql)
-    connection.commit()
-    raw_tables = cursor.fetchall()
-    connection.close()
+        """
+        try:
+            return self.tables[selected_table]
+        except KeyError:
+            raise sqlite3.OperationalError(f"no such table: {selected_table}") from None
+
+
+class ResultCache:
+    """Least recently used cache of table reads with a budget in bytes.
+
+    Every entry belongs to the version of the database from
+    ConnectionManager.data_version it was read at, and is dropped when it is
+    looked up at any other version, so a change made by anything, in this
+    process or another, is never hidden by the cache.
+
+    Args:
+        budget (int): most bytes of results kept
+
+    """
+
+    def __init__(self, budget=RESULT_CACHE_BUDGET):
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """Gets a cached result.
+
+        Args:
+            key (tuple): what was read
+            version (tuple): current version of the database
+
+        Returns:
+            The cached result, or None if it is not cached for this version.
+
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] != version:
+                del self._entries[key]
+                self.size -= entry[1]
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, version, result):
+        """Caches a result, evicting the least recently used results to fit.
+
+        Args:
+            key (tuple): what was read
+            version (tuple): version of the database the result was read from
+            result: value to cache
+
+        Returns:
+            None.
+
+        """
+        size = estimate_size(result)
+        if size > self.budget:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
 
-    assert len(raw_tables) > 0, "No tables in database"
+            while self._entries and self.size + size > self.budget:
+                self.size -= self._entries.popitem(last=False)[1][1]
+                self.evictions += 1
 
-    for table in raw_tables:
-        tables_list.append(table[0])
+            self._entries[key] = (result, size, version)
+            self.size += size
+
+    def stats(self):
+        """Returns: dict: entries, bytes, hits, misses, evictions and invalidations."""
+        return {'entries': len(self._entries), 'bytes': self.size, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions,
+                'invalidations': self.invalidations}
+
+
+def estimate_size(result):
+    """Estimates the bytes held by a result of lists and tuples.
+
+    Args:
+        result: value to measure
+
+    Returns:
+        int: bytes held by the value and everything it contains.
+
+    """
+    size = sys.getsizeof(result)
+    if isinstance(result, (list, tuple)):
+        for item in result:
+            if isinstance(item, (list, tuple)):
+                size += estimate_size(item)
+            else:
+                size += sys.getsizeof(item)
+
+    return size
+
+
+def cached_read(database, key, read):
+    """Serves a read from the manager's result cache, reading it on a miss.
+
+    Args:
+        database (str or ConnectionManager): database name or open manager
+        key (tuple): what is read, e.g. ('rows', table name)
+        read (function): reads the result when it is not cached
+
+    Returns:
+        The result of read().
+
+    """
+    if not isinstance(database, ConnectionManager) or not database.results.budget:
+        return read()
+
+    # The version is read on the connection read() borrows, so a reader thread
+    # never waits for the primary connection. Versions of different
+    # connections do not compare, so each connection keeps its own entries,
+    # except on an immutable database.
+    with database.reader() as connection:
+        version = database.data_version(connection)
+        if not database.immutable:
+            key = (id(connection), key)
+        result = database.results.get(key, version)
+        if result is None:
+            result = read()
+            database.results.put(key, version, result)
+
+    return result
+
+
+def get_search_tables(connection):
+    """Gets the FTS5 tables of a database and the shadow tables that store them.
+
+    Args:
+        connection (sqlite3.Connection): open connection to the database
+
+    Returns:
+        set: names of the search indexes and their shadow tables.
+
+    """
+    names = set()
+    sql = ("SELECT name, sql FROM sqlite_master "
+           "WHERE type='table' AND sql LIKE 'CREATE VIRTUAL TABLE%';")
+    for name, definition in connection.execute(sql).fetchall():
+        if re.search(r"\bUSING\s+fts5\b", definition, re.IGNORECASE):
+            names.add(name)
+            names.update(f"{name}_{suffix}" for suffix in FTS5_SHADOW_SUFFIXES)
+
+    return names
+
+
+def load_schema(connection):
+    """Reads the schema of every table that is not internal to SQLite.
+
+    FTS5 search indexes and their shadow tables are left out, see
+    full_text_search.py.
+
+    Args:
+        connection (sqlite3.Connection): open connection to the database
+
+    Returns:
+        dict: TableSchema for each table name, in sqlite_master order.
+
+    """
+    tables = {}
+    hidden = get_search_tables(connection)
+
+    sql = ("SELECT name FROM sqlite_master "
+           "WHERE type='table' AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\';")
+
+    for (name,) in connection.execute(sql).fetchall():
+        if name in hidden:
+            continue
+        table_info = connection.execute(f'PRAGMA table_info("{name}");').fetchall()
+        primary_key = [column[1] for column in sorted(table_info, key=lambda column: column[5])
+                       if column[5] > 0]
+
+        indexes = []
+        for index in connection.execute(f'PRAGMA index_list("{name}");').fetchall():
+            index_columns = connection.execute(f'PRAGMA index_info("{index[1]}");').fetchall()
+            index_sql = connection.execute("SELECT sql FROM sqlite_master WHERE name = ?;",
+                                           (index[1],)).fetchone()
+            indexes.append(IndexSchema(index[1], bool(index[2]), index[3],
+                                       [column[2] for column in index_columns],
+                                       index_sql[0] if index_sql else None))
+
+        try:
+            connection.execute(f'SELECT rowid FROM "{name}" LIMIT 0;')
+            page_key = ['rowid']
+        except sqlite3.OperationalError:
+            page_key = primary_key
+
+        tables[name] = TableSchema(name, [column[1] for column in table_info],
+                                   [column[2] for column in table_info],
+                                   primary_key, indexes, page_key)
+
+    return tables
+
+
+def get_catalog(database, connection):
+    """Gets the schema catalog for database.
+
+    Args:
+        database (str or ConnectionManager): database name or open manager
+        connection (sqlite3.Connection): connection lent by connect(database)
+
+    Returns:
+        SchemaCatalog: the manager's cached catalog, or a fresh one for a name.
+
+    """
+    if isinstance(database, ConnectionManager):
+        return database.catalog.refresh(connection)
+
+    return SchemaCatalog().refresh(connection)
+
+
+def get_tables(database):
+    """Gets the names of tables in database.
+
+    Args:
+        database (str or ConnectionManager): database name or open manager
+
+    Returns:
+        list: Names of tables in database.
+
+    """
+    with connect(database) as connection:
+        tables_list = get_catalog(database, connection).table_names()
+
+    assert len(tables_list) > 0, "No tables in database"
 
     return tables_list
 
@@ -97,47 +666,641 @@ def get_choice(options, prompt):
 
 
 def get_table_data(selected_table, database):
+    """Gets the field names and every row of the selected table.
+
+    Args:
+        selected_table (str): table name
+        database (str or ConnectionManager): database name or open manager
+
+    Returns:
+        list: [field names, rows]
+
+    """
+    field_names, rows = cached_read(database, ('rows', selected_table),
+                                    lambda: read_table_data(selected_table, database))
+
+    return [list(field_names), list(rows)]
+
+
+def read_table_data(selected_table, database):
+    """Reads the field names and every row of the selected table.
+
+    Args:
+        selected_table (str): table name
+        database (str or ConnectionManager): database name or open manager
+
+    Returns:
+        list: [field names, rows]
+
+    """
     field_names_and_rows = []
     field_names = []
 
-    try:
-        database_path = f'file:{pathname2url(database)}?mode=rw'
-        connection = sqlite3.connect(database_path, uri=True)
-    except:
-        print(f"Unable to connect to {database}")
-        raise
-
-    try:
-        cursor = connection.cursor()
+    with connect(database) as connection:
+        try:
+            cursor = connection.cursor()
 
-        sql = f"SELECT * FROM {selected_table};"
-        cursor.execute(sql)
+            sql = f"SELECT * FROM {selected_table};"
+            cursor.execute(sql)
 
-        field_metadata = cursor.description
-        for field in field_metadata:
-            field_names.append(field[0])
+            field_metadata = cursor.description
+            for field in field_metadata:
+                field_names.append(field[0])
 
-        rows = cursor.fetchall()
+            rows = cursor.fetchall()
 
-        field_names_and_rows.append(field_names)
-        field_names_and_rows.append(rows)
+            field_names_and_rows.append(field_names)
+            field_names_and_rows.append(rows)
 
-    except Exception as exception:
-        print("Error displaying tables.")
-        print(exception)
-        raise exception from exception
-    finally:
-        connection.close()
+        except Exception as exception:
+            print("Error displaying tables.")
+            print(exception)
+            raise exception from exception
 
     return field_names_and_rows
 
 
-def display_table(selected_table, rows, field_names):
+def get_table_page(selected_table, database, after=None, page_size=PAGE_SIZE):
+    """Gets one page of rows that come after the given key.
+
+    The page is found by seeking past the key on the table's rowid or primary
+    key, not with OFFSET, so every page costs the same however deep it is and
+    no read transaction stays open between pages.
+
+    Args:
+        selected_table (str): table name
+        database (str or ConnectionManager): database name or open manager
+        after (tuple): key returned with the previous page, None for the first
+        page_size (int): most rows in the page
+
+    Returns:
+        list: [rows, key of the last row] where the key is None if rows is empty.
+
+    """
+    assert page_size > 0, "Page size must be at least 1."
+
+    with connect(database) as connection:
+        key = get_catalog(database, connection).table(selected_table).page_key
+        keyed_rows = cached_read(
+            database, ('page', selected_table, after, page_size),
+            lambda: select_keyed_rows(connection, selected_table, key, after, page_size))
+
+    if not keyed_rows:
+        return [[], None]
+
+    key_length = len(key)
+    rows = [row[key_length:] for row in keyed_rows]
+
+    return [rows, keyed_rows[-1][:key_length]]
+
+
+def select_keyed_rows(connection, selected_table, key, after, page_size):
+    """Selects rows in key order, each prefixed with its key values.
+
+    Args:
+        connection (sqlite3.Connection): open connection
+        selected_table (str): table name
+        key (list): key columns from the table's page_key
+        after (tuple): key to seek past, or None to start at the first row
+        page_size (int): most rows to select, or None for every row
+
+    Returns:
+        list: rows with the key values first.
+
+    """
+    key_columns = ', '.join(key)
+
+    sql = f"SELECT {key_columns}, * FROM {selected_table}"
+    values = []
+    if after is not None:
+        placeholders = ', '.join('?' * len(key))
+        sql = f"{sql} WHERE ({key_columns}) > ({placeholders})"
+        values.extend(after)
+    sql = f"{sql} ORDER BY {key_columns}"
+    if page_size is not None:
+        sql = f"{sql} LIMIT ?"
+        values.append(page_size)
+
+    return connection.execute(f"{sql};", values).fetchall()
+
+
+def iter_table_pages(selected_table, database, page_size=PAGE_SIZE):
+    """Yields the rows of a table one page at a time.
+
+    Args:
+        selected_table (str): table name
+        database (str or ConnectionManager): database name or open manager
+        page_size (int): most rows in each page
+
+    Yields:
+        list: rows of the next page.
+
+    """
+    after = None
+    while True:
+        rows, after = get_table_page(selected_table, database, after, page_size)
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+
+
+def get_field_names(selected_table, database):
+    """Gets the field names of a table from the schema catalog.
+
+    Args:
+        selected_table (str): table name
+        database (str or ConnectionManager): database name or open manager
+
+    Returns:
+        list: field names.
+
+    """
+    with connect(database) as connection:
+        return list(get_catalog(database, connection).table(selected_table).columns)
+
+
+def match_column(name, columns):
+    """Finds a column by name the way SQLite does, ignoring case.
+
+    Args:
+        name (str): column name as typed
+        columns (list): columns of the table
+
+    Returns:
+        str: the column's own name.
+
+    Raises:
+        ValueError: If the table has no such column.
+
+    """
+    for column in columns:
+        if column.lower() == name.lower():
+            return column
+    raise ValueError(f"no such column: {name}")
+
+
+def parse_filter(text, columns):
+    """Parses a filter such as "ShipCountry = France" or "Region is null".
+
+    Args:
+        text (str): column, operator and value
+        columns (list): columns of the table
+
+    Returns:
+        tuple: (column, operator, value) with NULL as None.
+
+    Raises:
+        ValueError: If the column or operator is not valid.
+
+    """
+    match = FILTER_PATTERN.match(text)
+    if match is None:
+        raise ValueError(f"Expected 'column operator value' with an operator from "
+                         f"{', '.join(FILTER_OPERATORS)}: {text}")
+
+    column, operator, value = match.groups()
+    operator = ' '.join(operator.upper().split())
+    if value.lower() == 'null':
+        value = None
+
+    return match_column(column, columns), operator, value
+
+
+def parse_order(text, columns):
+    """Parses a sort such as "OrderDate desc".
+
+    Args:
+        text (str): column, then optionally asc or desc
+        columns (list): columns of the table
+
+    Returns:
+        tuple: (column, True if descending)
+
+    Raises:
+        ValueError: If the column or direction is not valid.
+
+    """
+    words = text.split()
+    if not 1 <= len(words) <= 2 or (len(words) == 2 and words[1].lower() not in {'asc', 'desc'}):
+        raise ValueError(f"Expected 'column [asc|desc]': {text}")
+
+    return match_column(words[0], columns), len(words) == 2 and words[1].lower() == 'desc'
+
+
+def build_query(selected_table, filters=None, order_by=None, limit=None):
+    """Compiles filters, a sort and a limit into one parameterized SELECT.
+
+    Columns and operators come from parse_filter and parse_order, and every
+    value is bound, so SQLite can answer from an index.
+
+    Args:
+        selected_table (str): table name
+        filters (list): (column, operator, value) tuples that must all match
+        order_by (list): (column, descending) tuples
+        limit (int): most rows to return, or None for all of them
+
+    Returns:
+        tuple: (sql, values)
+
+    """
+    sql = f"SELECT * FROM {selected_table}"
+    values = []
+
+    if filters:
+        conditions, values = build_where(filters)
+        sql = f"{sql} WHERE {conditions}"
+
+    if order_by:
+        terms = ', '.join(f'"{column}"{" DESC" if descending else ""}'
+                          for column, descending in order_by)
+        sql = f"{sql} ORDER BY {terms}"
+
+    if limit is not None:
+        sql = f"{sql} LIMIT ?"
+        values.append(limit)
+
+    return f"{sql};", values
+
+
+def build_where(filters):
+    """Compiles filters from parse_filter into a parameterized condition.
+
+    Args:
+        filters (list): (column, operator, value) tuples that must all match
+
+    Returns:
+        tuple: (condition, values)
+
+    """
+    conditions = []
+    values = []
+    for column, operator, value in filters:
+        assert operator in FILTER_OPERATORS, f"Unknown operator: {operator}"
+        conditions.append(f'"{column}" {operator} ?')
+        values.append(value)
+
+    return ' AND '.join(conditions), values
+
+
+def query_table(selected_table, database, filters=None, order_by=None, limit=PAGE_SIZE):
+    """Gets the rows of a table that match filters, sorted and limited by SQLite.
+
+    Args:
+        selected_table (str): table name
+        database (str or ConnectionManager): database name or open manager
+        filters (list): (column, operator, value) tuples that must all match
+        order_by (list): (column, descending) tuples
+        limit (int): most rows to return, or None for all of them
+
+    Returns:
+        list: [field names, rows]
+
+    """
+    sql, values = build_query(selected_table, filters, order_by, limit)
+
+    def read():
+        with connect(database) as connection:
+            cursor = connection.execute(sql, values)
+            return [[field[0] for field in cursor.description], cursor.fetchall()]
+
+    field_names, rows = cached_read(database, ('query', sql, tuple(values)), read)
+
+    return [list(field_names), list(rows)]
+
+
+def search_index_name(selected_table):
+    """Returns: str: name of the FTS5 search index of a table."""
+    return f"{selected_table}{SEARCH_INDEX_SUFFIX}"
+
+
+def build_match(text, substring=False):
+    """Turns search text into an FTS5 MATCH query.
+
+    Args:
+        text (str): words to search for
+        substring (bool): True for a trigram index, which matches the text
+        anywhere inside a value
+
+    Returns:
+        str: one quoted phrase for substrings, or every word as a prefix,
+        e.g. "alfred"* "futt"*
+
+    """
+    if substring:
+        return '"' + text.replace('"', '""') + '"'
+
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in text.split())
+
+
+def search_table(selected_table, text, database, limit=PAGE_SIZE):
+    """Finds the rows of a table whose indexed columns contain text.
+
+    The table needs a search index built by full_text_search.py. Rows come
+    best match first, and update_record and delete_record take them as they
+    take the rows of display_table.
+
+    Args:
+        selected_table (str): table name
+        text (str): words that start words of the row, or with a substring
+        index, text found anywhere in it
+        database (str or ConnectionManager): database name or open manager
+        limit (int): most rows to return
+
+    Returns:
+        list: [row ids, rows]
+
+    Raises:
+        sqlite3.OperationalError: If the table has no search index.
+
+    """
+    index = search_index_name(selected_table)
+
+    def read():
+        with connect(database) as connection:
+            definition = connection.execute(
+                "SELECT sql FROM sqlite_master WHERE name = ? AND type = 'table';",
+                (index,)).fetchone()
+            if definition is None or index not in get_search_tables(connection):
+                raise sqlite3.OperationalError(f"no search index on {selected_table}")
+
+            substring = 'trigram' in definition[0].lower()
+            if substring and len(text) < 3:
+                # Trigrams need three characters, LIKE scans the index's columns.
+                columns = [row[1] for row in connection.execute(f'PRAGMA table_info("{index}");')]
+                condition = ' OR '.join(f'"{index}"."{column}" LIKE ?' for column in columns)
+                values = [f"%{text}%"] * len(columns)
+            else:
+                condition = f'"{index}" MATCH ?'
+                values = [build_match(text, substring)]
+
+            cursor = connection.execute(
+                f'SELECT "{selected_table}".rowid, "{selected_table}".* FROM "{index}" '
+                f'JOIN "{selected_table}" ON "{selected_table}".rowid = "{index}".rowid '
+                f'WHERE {condition} ORDER BY rank LIMIT ?;', values + [limit])
+            return cursor.fetchall()
+
+    matches = cached_read(database, ('search', selected_table, text, limit), read)
+
+    return [[row[0] for row in matches], [row[1:] for row in matches]]
+
+
+def ask_query(field_names):  # pragma: no cover
+    """Asks for filters, a sort and a limit.
+
+    Args:
+        field_names (list): columns of the table
+
+    Returns:
+        tuple: (filters, order_by, limit), with no filters or sort to clear them.
+
+    """
+    filters = []
+    order_by = []
+
+    print("Enter filters such as 'ShipCountry = France' or 'OrderDate >= 1997-01-01', "
+          "one per line. Press <Enter> when done.")
+    while True:
+        text = input()
+        if text == '':
+            break
+        try:
+            filters.append(parse_filter(text, field_names))
+        except ValueError as exception:
+            print(exception)
+
+    print("Sort by, such as 'OrderDate desc'. Press <Enter> for none.")
+    while True:
+        text = input()
+        if text == '':
+            break
+        try:
+            order_by.append(parse_order(text, field_names))
+        except ValueError as exception:
+            print(exception)
+
+    print(f"Most rows to show. Press <Enter> for {PAGE_SIZE}.")
+    text = input()
+    limit = int(text) if text.isdigit() else PAGE_SIZE
+
+    return filters, order_by, limit
+
+
+def track_changes(selected_table, connection):
+    """Logs the rowid of every row changed in a table through connection.
+
+    TEMP triggers append to a temp.changelog table. Both live only in this
+    connection, so nothing is written to the database file.
+
+    Args:
+        selected_table (str): table name
+        connection (sqlite3.Connection): connection whose writes are logged
+
+    Returns:
+        None.
+
+    """
+    connection.execute("CREATE TEMP TABLE IF NOT EXISTS changelog("
+                       "seq INTEGER PRIMARY KEY, table_name TEXT NOT NULL, row_id INTEGER);")
+
+    # Trigger bodies take no parameters, so the name is quoted into the SQL.
+    name = selected_table.replace('"', '""')
+    literal = selected_table.replace("'", "''")
+    logged = {'insert': ['NEW'], 'update': ['OLD', 'NEW'], 'delete': ['OLD']}
+    for event, versions in logged.items():
+        inserts = ' '.join(f"INSERT INTO changelog(table_name, row_id) "
+                           f"VALUES('{literal}', {version}.rowid);"
+                           for version in versions)
+        connection.execute(f'CREATE TEMP TRIGGER IF NOT EXISTS "changelog_{name}_{event}" '
+                           f'AFTER {event.upper()} ON main."{name}" '
+                           f'BEGIN {inserts} END;')
+
+
+def untrack_changes(selected_table, connection):
+    """Stops logging changes to a table and forgets the changes already logged.
+
+    Commits only if no transaction was open, so a caller's transaction is
+    left for the caller to end.
+
+    Args:
+        selected_table (str): table name
+        connection (sqlite3.Connection): connection passed to track_changes
+
+    Returns:
+        None.
+
+    """
+    in_transaction = connection.in_transaction
+    name = selected_table.replace('"', '""')
+    for event in ['insert', 'update', 'delete']:
+        connection.execute(f'DROP TRIGGER IF EXISTS temp."changelog_{name}_{event}";')
+    connection.execute("DELETE FROM temp.changelog WHERE table_name = ?;", (selected_table,))
+    if not in_transaction:
+        connection.commit()
+
+
+class TableRows:
+    """Rows of a table held in memory and patched with only the rows that change.
+
+    Through a ConnectionManager the rowid of every row the session changes is
+    logged by track_changes, and refresh reads back just those rows. A write
+    from another connection, seen as a new PRAGMA data_version, or a table
+    without rowids reloads the rows instead.
+
+    Args:
+        selected_table (str): table name
+        database (str or ConnectionManager): database name or open manager
+        page_size (int): most rows held, or None for the whole table
+
+    """
+
+    def __init__(self, selected_table, database, page_size=PAGE_SIZE):
+        self.selected_table = selected_table
+        self.database = database
+        self.page_size = page_size
+        self.keys = []
+        self.rows = []
+        self.after = None
+        self.end = None
+        self._key = None
+        self._tracked = False
+        self._data_version = None
+        self._seq = 0
+
+        self.load()
+
+    def load(self, after=None):
+        """Reads the rows whose key comes after the given key.
+
+        Args:
+            after (tuple): key to seek past, or None to start at the first row
+
+        Returns:
+            list: the rows held.
+
+        """
+        with connect(self.database, write=True) as connection:
+            self._key = get_catalog(self.database, connection).table(self.selected_table).page_key
+            self._tracked = (isinstance(self.database, ConnectionManager)
+                             and self._key == ['rowid'])
+            if self._tracked:
+                track_changes(self.selected_table, connection)
+                self._seq = connection.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM temp.changelog;").fetchone()[0]
+            self._data_version = connection.execute("PRAGMA data_version;").fetchone()[0]
+
+            keyed_rows = cached_read(
+                self.database, ('page', self.selected_table, after, self.page_size),
+                lambda: select_keyed_rows(connection, self.selected_table, self._key,
+                                          after, self.page_size))
+
+        key_length = len(self._key)
+        self.keys = [row[:key_length] for row in keyed_rows]
+        self.rows = [row[key_length:] for row in keyed_rows]
+        self.after = after
+        self._set_end()
+
+        return self.rows
+
+    def next_page(self):
+        """Loads the page after this one, or the first page after the last.
+
+        Returns:
+            list: the rows held.
+
+        """
+        if self.end is None:
+            return self.load()
+
+        self.load(self.end)
+        if not self.rows:
+            self.load()
+
+        return self.rows
+
+    def refresh(self):
+        """Brings the rows up to date with the database.
+
+        Returns:
+            int: number of changed rows that were read back.
+
+        """
+        with connect(self.database, write=True) as connection:
+            data_version = connection.execute("PRAGMA data_version;").fetchone()[0]
+            if not self._tracked or data_version != self._data_version:
+                return len(self.load(self.after))
+
+            changes = connection.execute(
+                "SELECT seq, row_id FROM temp.changelog WHERE seq > ? AND table_name = ?;",
+                (self._seq, self.selected_table)).fetchall()
+            if not changes:
+                return 0
+            self._seq = changes[-1][0]
+
+            row_ids = sorted({change[1] for change in changes if self._in_range(change[1])})
+            changed_rows = {}
+            for start in range(0, len(row_ids), 500):
+                chunk = row_ids[start:start + 500]
+                placeholders = ', '.join('?' * len(chunk))
+                sql = (f"SELECT rowid, * FROM {self.selected_table} "
+                       f"WHERE rowid IN ({placeholders});")
+                for row in connection.execute(sql, chunk):
+                    changed_rows[row[0]] = row[1:]
+
+        for row_id in row_ids:
+            key = (row_id,)
+            position = bisect_left(self.keys, key)
+            held = position < len(self.keys) and self.keys[position] == key
+            if row_id in changed_rows:
+                if held:
+                    self.rows[position] = changed_rows[row_id]
+                else:
+                    self.keys.insert(position, key)
+                    self.rows.insert(position, changed_rows[row_id])
+            elif held:
+                del self.keys[position]
+                del self.rows[position]
+
+        if self.page_size is not None and len(self.rows) > self.page_size:
+            del self.keys[self.page_size:]
+            del self.rows[self.page_size:]
+            self._set_end()
+        elif self.end is None:
+            # A full page keeps its end key after a delete, so rows inserted
+            # past it stay on the later pages.
+            self._set_end()
+
+        return len(row_ids)
+
+    def close(self):
+        """Stops logging changes to the table."""
+        if self._tracked:
+            with self.database.temp_writer() as connection:
+                untrack_changes(self.selected_table, connection)
+            self._tracked = False
+
+    def _in_range(self, row_id):
+        """Checks whether a row with this rowid belongs to the rows held."""
+        key = (row_id,)
+        return ((self.after is None or key > tuple(self.after))
+                and (self.end is None or key <= self.end))
+
+    def _set_end(self):
+        """Closes the key range at the last row when the page is full."""
+        full = self.page_size is not None and len(self.rows) >= self.page_size
+        self.end = self.keys[-1] if full else None
+
+
+def display_table(selected_table, rows, field_names, max_length=None, sink=None):
     """Displays the chosen table.
 
     Args:
         selected_table (string): table chosen to get data from
-        database (string): name of database
+        rows (list): rows to display
+        field_names (list): field names of the table
+        max_length (list): planned column widths from plan_column_widths, or
+        None to measure rows. Values longer than a planned width are cut.
+        sink (file): where the table is written, sys.stdout by default
 
     Returns:
         None.
@@ -146,23 +1309,25 @@ def display_table(selected_table, rows, field_names):
     assert len(rows) > 0, "Error displaying table, rows list is empty."
     assert len(field_names) > 0, "Error displaying table, field names list is empty."
 
+    if sink is None:
+        sink = sys.stdout
+
     try:
         space = ' ' * len(str(len(rows)))
-        max_length = calculate_max_length(field_names, None)
-
-        for row in rows:
-            max_length = calculate_max_length(row, max_length)
+        truncate = max_length is not None
+        if max_length is None:
+            max_length = calculate_max_length(field_names, None)
 
-        print()
-        print(f'Table: {selected_table}\n')
-        formatted_row = format_row(field_names, max_length)
-        print(f'Row #{space}|   {formatted_row}\n')
+            for row in rows:
+                max_length = calculate_max_length(row, max_length)
 
-        for num, row in enumerate(rows):
-            formatted_row = format_row(row, max_length)
-            print(f"{num + 1:<2}{space}   |   {formatted_row}")
+        header_format = compile_row_format(max_length, f'Row #{space}|   ', truncate)
+        row_format = compile_row_format(max_length, f'{{0:<2}}{space}   |   ', truncate)
 
-        print("\n")
+        sink.write(f'\nTable: {selected_table}\n\n')
+        sink.write(f'{header_format.format(None, *field_names)}\n\n')
+        write_rows(rows, row_format, sink)
+        sink.write('\n\n')
 
     except Exception as exception: # pragma: no cover
         print("Error displaying tables.")
@@ -170,6 +1335,50 @@ def display_table(selected_table, rows, field_names):
         raise exception from exception
 
 
+def compile_row_format(max_length, prefix='', truncate=False):
+    """Builds one format string that lays out a whole row.
+
+    Args:
+        max_length (list): width of each column
+        prefix (str): format text before the first column, {0} is the row number
+        truncate (bool): True to cut values longer than their width
+
+    Returns:
+        str: format string that takes the row number followed by the row's values.
+
+    """
+    columns = ''.join(f"{{{num + 1}!s:<{width + 5}{f'.{width}' if truncate else ''}}}"
+                      for num, width in enumerate(max_length))
+
+    return f'{prefix}{columns}'
+
+
+def write_rows(rows, row_format, sink, batch_size=ROW_BATCH):
+    """Formats rows and writes them to sink with one write per batch.
+
+    Args:
+        rows (iterable): rows to write
+        row_format (str): format string from compile_row_format
+        sink (file): file-like object to write to
+        batch_size (int): rows joined into each write
+
+    Returns:
+        int: number of rows written.
+
+    """
+    rows = iter(rows)
+    count = 0
+
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return count
+
+        sink.write(''.join([f'{row_format.format(count + num, *row)}\n'
+                            for num, row in enumerate(batch, 1)]))
+        count += len(batch)
+
+
 def calculate_max_length(data, max_length):
     """Caculates the char count of biggest string in given list.
     Args:
@@ -183,13 +1392,57 @@ def calculate_max_length(data, max_length):
     assert len(data) > 0, "List is empty."
 
     if max_length is None:
-        max_length = []
-        for iteration in data:
-            max_length.append(0)
+        max_length = [0] * len(data)
 
     for num, item in enumerate(data):
-        if len(str(item)) > max_length[num]:
-            max_length[num] = len(str(item))
+        length = len(str(item))
+        if length > max_length[num]:
+            max_length[num] = length
+
+    return max_length
+
+
+def plan_column_widths(selected_table, database, field_names, sample_size=None, cap=None):
+    """Plans column widths for display_table without reading rows into Python.
+
+    SQLite measures MAX(LENGTH()) of every column in one statement. With a
+    sample size only the first rows are measured, so the cost stays the same
+    however big the table grows.
+
+    Args:
+        selected_table (str): table name
+        database (str or ConnectionManager): database name or open manager
+        field_names (list): field names of the table
+        sample_size (int): rows to measure, or None to measure every row
+        cap (int): widest a column may be, or None for no limit
+
+    Returns:
+        list: width of each column, at least as wide as its field name.
+
+    """
+    assert len(field_names) > 0, "Table has no fields."
+
+    # NULL is displayed as None, so it is measured as such.
+    lengths = ', '.join(f"MAX(LENGTH(COALESCE(CAST(\"{name}\" AS TEXT), 'None')))"
+                        for name in field_names)
+    source = selected_table
+    values = []
+    if sample_size is not None:
+        source = f"(SELECT * FROM {selected_table} LIMIT ?)"
+        values.append(sample_size)
+
+    with connect(database) as connection:
+        planned = cached_read(
+            database, ('widths', selected_table, sample_size),
+            lambda: connection.execute(f"SELECT {lengths} FROM {source};", values).fetchone())
+
+    max_length = calculate_max_length(field_names, None)
+    for num, length in enumerate(planned):
+        if length is not None and length > max_length[num]:
+            max_length[num] = length
+
+    if cap is not None:
+        max_length = [min(length, cap) for length in max_length]
 
     return max_length
 
@@ -199,7 +1452,8 @@ def execute_sql(sql, database_name, values):
 
     Args:
         sql (string): A valid SQL statement to execute.
-        database_name (string): The name of the database
+        database_name (string or ConnectionManager): The name of the database
+        or an open manager.
         values (list): a list of values or None 
         depending sql statement inserts into the database.
 
@@ -207,26 +1461,219 @@ def execute_sql(sql, database_name, values):
         None.
 
     """
-    try:
-        database_path = f'file:{pathname2url(database_name)}?mode=rw'
-        connection = sqlite3.connect(database_path, uri=True)
-    except:
-        print(f"Unable to connect to {database_name}")
-        raise
+    with connect(database_name, write=True) as connection:
+        try:
+            cursor = connection.cursor()
+            if values is None:
+                cursor.execute(sql)
+            else:
+                cursor.execute(sql, values)
+            connection.commit()
+        except Exception as exception:
+            connection.rollback()
+            print(f"Unable to execute: {sql}")
+            print(f"Due to: {exception}")
+            print()
+
+
+def execute_sql_many(sql, database_name, values_list):
+    """Executes the given sql statement once for each list of values, in one
+    transaction. If any execution fails none of them are kept.
+
+    Args:
+        sql (string): A valid SQL statement with ? placeholders.
+        database_name (string or ConnectionManager): The name of the database
+        or an open manager.
+        values_list (list): a list of values for each execution.
+
+    Returns:
+        int: rows changed, 0 if the transaction was rolled back.
+
+    """
+    with connect(database_name, write=True) as connection:
+        try:
+            cursor = connection.cursor()
+            cursor.executemany(sql, values_list)
+            connection.commit()
+            return cursor.rowcount
+        except Exception as exception:
+            connection.rollback()
+            print(f"Unable to execute: {sql}")
+            print(f"Due to: {exception}")
+            print()
+            return 0
+
+
+def get_key_columns(selected_table, database):
+    """Gets the columns that identify one row of a table.
+
+    Args:
+        selected_table (str): table name
+        database (str or ConnectionManager): database name or open manager
+
+    Returns:
+        list: the primary key, or ['rowid'] if the table has none.
+
+    """
+    with connect(database) as connection:
+        table = get_catalog(database, connection).table(selected_table)
+
+    # A WITHOUT ROWID table always has a primary key, its page key.
+    return table.primary_key or table.page_key
+
+
+def update_sql(selected_table, fields, key):
+    """Builds a parameterized UPDATE of one row.
+
+    The text depends only on the table, fields and key, so SQLite prepares it
+    once and reuses it for every row.
+
+    Args:
+        selected_table (str): table name
+        fields (list): fields to set
+        key (list): key columns from get_key_columns
+
+    Returns:
+        str: UPDATE taking the new values followed by the key values.
+
+    """
+    assignments = ', '.join(f'"{field}" = ?' for field in fields)
+    return f"UPDATE {selected_table} SET {assignments} WHERE {where_key(key)};"
+
+
+def delete_sql(selected_table, key):
+    """Builds a parameterized DELETE of one row.
+
+    Args:
+        selected_table (str): table name
+        key (list): key columns from get_key_columns
+
+    Returns:
+        str: DELETE taking the key values.
+
+    """
+    return f"DELETE FROM {selected_table} WHERE {where_key(key)};"
+
+
+def where_key(key):
+    """Returns: str: condition matching a row on every key column, NULLs included."""
+    return ' AND '.join(f'"{column}" IS ?' for column in key)
 
-    try:
-        cursor = connection.cursor()
-        if values is None:
-            cursor.execute(sql)
-        else:
-            cursor.execute(sql, values)
-        connection.commit()
-    except Exception as exception:
-        print(f"Unable to execute: {sql}")
-        print(f"Due to: {exception}")
-        print()
-    finally:
-        connection.close()
+
+def key_values(row, field_names, key):
+    """Gets the key values of a row.
+
+    Args:
+        row (tuple): row of values
+        field_names (list): field names of the row
+        key (list): key columns from get_key_columns
+
+    Returns:
+        list: the row's value for each key column.
+
+    """
+    return [row[field_names.index(column)] for column in key]
+
+
+def row_keys(selected_table, database, field_names, rows, key):
+    """Gets the key values of rows, finding the rowid of rows that do not hold it.
+
+    Rows read for display hold only the table's columns. When the key is the
+    rowid, each row's rowid is found by matching every column, and rows that
+    are exactly alike get different rowids, so choosing one of two duplicate
+    rows changes only one of them.
+
+    Args:
+        selected_table (str): table name
+        database (str or ConnectionManager): database name or open manager
+        field_names (list): field names of the rows
+        rows (list): rows of the table
+        key (list): key columns from get_key_columns
+
+    Returns:
+        list: the key values of every row, None for a row no longer in the table.
+
+    """
+    if all(column in field_names for column in key):
+        return [key_values(row, field_names, key) for row in rows]
+
+    sql = f"SELECT rowid FROM {selected_table} WHERE {where_key(field_names)} ORDER BY rowid;"
+    keys = []
+    used = set()
+    with connect(database) as connection:
+        for row in rows:
+            row_ids = [row_id for (row_id,) in connection.execute(sql, list(row))
+                       if row_id not in used]
+            used.update(row_ids[:1])
+            keys.append(row_ids[:1] or None)
+
+    return keys
+
+
+def update_records(database_name, selected_table, field_names, selected_field, changes):
+    """Sets one field of many rows in one transaction.
+
+    Args:
+        database_name (str or ConnectionManager): database name or open manager
+        selected_table (str): table name
+        field_names (list): field names of the rows
+        selected_field (str): field to set
+        changes (list): (row, new value) pairs
+
+    Returns:
+        int: rows changed.
+
+    """
+    key = get_key_columns(selected_table, database_name)
+    sql = update_sql(selected_table, [selected_field], key)
+    keys = row_keys(selected_table, database_name, field_names,
+                    [row for row, _ in changes], key)
+
+    return execute_sql_many(sql, database_name, [[new_value] + values for (_, new_value), values
+                                                 in zip(changes, keys) if values is not None])
+
+
+def delete_records(database_name, selected_table, field_names, rows):
+    """Deletes many rows in one transaction.
+
+    Args:
+        database_name (str or ConnectionManager): database name or open manager
+        selected_table (str): table name
+        field_names (list): field names of the rows
+        rows (list): rows to delete
+
+    Returns:
+        int: rows deleted.
+
+    """
+    key = get_key_columns(selected_table, database_name)
+    sql = delete_sql(selected_table, key)
+
+    keys = row_keys(selected_table, database_name, field_names, rows, key)
+
+    return execute_sql_many(sql, database_name, [values for values in keys if values is not None])
+
+
+def parse_row_numbers(raw_input, rows):
+    """Turns row numbers such as "2" or "1, 3" into indexes of rows.
+
+    Args:
+        raw_input (str): comma separated row numbers
+        rows (list): rows the numbers refer to
+
+    Returns:
+        list: indexes into rows.
+
+    Raises:
+        ValueError: If a number is not an integer or is out of range.
+
+    """
+    row_numbers = [int(number) - 1 for number in str(raw_input).split(',')]
+    for row_number in row_numbers:
+        if not 0 <= row_number < len(rows):
+            raise ValueError(f"{row_number + 1} is not a row number.")
+
+    return row_numbers
 
 
 def format_row(row, max_length):
@@ -243,13 +1690,7 @@ def format_row(row, max_length):
     assert len(row) > 0, "List is empty."
 
     try:
-        formatted_row = ''
-        for num, column in enumerate(row):
-            spaces = ' ' * (5 + max_length[num] - len(str(column)))
-            new_row = f"{str(column)}{spaces}"
-            formatted_row = f"{formatted_row}{new_row}"
-
-        return formatted_row
+        return ''.join([f"{column!s:<{5 + max_length[num]}}" for num, column in enumerate(row)])
     except IndexError as i_e:
         raise IndexError(
             f"Error printing output: {i_e}") from i_e
@@ -325,14 +1766,14 @@ def update_record(database_name, selected_table, field_names, rows):
         selected_field = field_names[choice - 1]
 
         try:
-            print("Which row do you want to update? Use row numbers.")
+            print("Which row do you want to update? Use row numbers, separate several with commas.")
             for num, row in enumerate(rows):
                 print(f"({num + 1}) {row[choice - 1]}")
             
-            row_number = input()
-            row_number = int(row_number) - 1
+            row_numbers = parse_row_numbers(input(), rows)
 
-            current_value = rows[row_number][choice - 1]
+            current_value = ', '.join(str(rows[row_number][choice - 1])
+                                      for row_number in row_numbers)
 
             print(f"What do you want to update '{current_value}' to?")
             new_value = input()
@@ -344,15 +1785,26 @@ def update_record(database_name, selected_table, field_names, rows):
                     break
                 
             if proceed == 'y':
-                sql = (f"UPDATE {selected_table} SET {selected_field} = '{new_value}' "
-                        f"WHERE {field_names[0]} = '{rows[row_number][0]}';")
-                execute_sql(sql, database_name, None)
+                update_records(database_name, selected_table, field_names, selected_field,
+                               [(rows[row_number], new_value) for row_number in row_numbers])
             break
         except Exception: # pragma: no cover
             print("Error: invalid input.")
 
 
 def delete_record(database_name, selected_table, field_names, rows):
+    """Deletes the records chosen by row number from the selected table.
+
+    Args:
+        database_name (string or ConnectionManager): database used to delete
+        selected_table (string): table name
+        field_names (list): list of field names
+        rows (list): rows shown to choose from
+
+    Returns:
+        None.
+
+    """
     while True:
         try:
             print(f"Which record from '{selected_table}' do you want to delete? Use row numbers. "
@@ -364,20 +1816,18 @@ def delete_record(database_name, selected_table, field_names, rows):
                 print("Going back...\n")
                 break
 
-            row_number = int(raw_input) - 1
-
-            if row_number < 0:
-                raise Exception # pragma: no cover
+            row_numbers = parse_row_numbers(raw_input, rows)
+            selected_rows = [rows[row_number] for row_number in row_numbers]
 
             while True:
-                print(f"Confirm deletion of {rows[row_number]} from {selected_table}'? y/n")
+                print(f"Confirm deletion of {', '.join(str(row) for row in selected_rows)} "
+                      f"from {selected_table}'? y/n")
                 proceed = input()
                 if proceed in {'y', 'n'}:
                     break
 
             if proceed == 'y':
-                sql = f"DELETE FROM {selected_table} WHERE {field_names[0]} = '{rows[row_number][0]}'"
-                execute_sql(sql, database_name, None)
+                delete_records(database_name, selected_table, field_names, selected_rows)
             break
         except Exception: # pragma: no cover
             print(f"Error: {raw_input} is invalid.")
@@ -385,9 +1835,82 @@ def delete_record(database_name, selected_table, field_names, rows):
 
 def main():  # pragma: no cover
     """Runs the main program logic."""
+    parser = argparse.ArgumentParser(description="Browse and edit the tables of a database.")
+    parser.add_argument("--database", default="Northwind.db",
+                        help="database to open (default Northwind.db)")
+    parser.add_argument("--profile", choices=list(PROFILES), default='default',
+                        help="SQLite settings for the session (default: SQLite's own)")
+    parser.add_argument("--read-only", action="store_true",
+                        help="browse without taking write locks, editing is turned off")
+    parser.add_argument("--immutable", action="store_true",
+                        help="browse an archived snapshot nothing writes to, without locks")
+    parser.add_argument("--in-memory", choices=['write-through', 'periodic'],
+                        help="edit a copy of the database in memory, flushed to the file "
+                             "after every write or every --flush-every writes")
+    parser.add_argument("--flush-every", type=int, default=100,
+                        help="writes between periodic flushes of --in-memory (default 100)")
+    parser.add_argument("--stats", action="store_true",
+                        help="print the time taken by every statement on exit")
+    parser.add_argument("--slow-ms", type=float, default=100.0,
+                        help="statements this slow are slow queries (default 100)")
+    parser.add_argument("--slow-log", help="file slow queries are appended to")
+    parser.add_argument("--script", help="run the operations in this file without "
+                                         "prompts, - for standard input")
+    parser.add_argument("--transaction-size", type=int, default=1000,
+                        help="writes per transaction in a script, 0 for one (default 1000)")
+    parser.add_argument("--stop-on-error", action="store_true",
+                        help="roll back and stop a script at its first failure")
+    arguments = parser.parse_args()
+    read_only = arguments.read_only or arguments.immutable
+    if read_only and arguments.in_memory:
+        parser.error("--in-memory edits a copy, it cannot be read-only")
+
+    # The script runner and the working copy import this file as sql_program,
+    # a module apart from __main__, so the session runs in that module.
+    program = sys.modules[__name__]
+    if arguments.script:
+        import batch_mode
+        program = batch_mode.sql_program
+    if arguments.in_memory:
+        import memory_copy
+        program = memory_copy.sql_program
+
+    if arguments.stats or arguments.slow_log:
+        import atexit
+        import instrumentation
+
+        instruments = instrumentation.Instrumentation(arguments.slow_ms, arguments.slow_log)
+        instruments.install(program)
+        if arguments.stats:
+            atexit.register(lambda: print(f"\n{instruments.summary()}", file=sys.stderr))
+
+    if arguments.script:
+        sys.exit(batch_mode.run_script_file(arguments.script, arguments.database,
+                                            arguments.profile, arguments.transaction_size,
+                                            arguments.stop_on_error, read_only,
+                                            arguments.immutable))
+
+    if arguments.in_memory:
+        database = memory_copy.MemoryCopy(arguments.database, arguments.in_memory,
+                                          flush_every=arguments.flush_every,
+                                          profile=arguments.profile)
+        print(f"Loaded {arguments.database} into memory in "
+              f"{database.load_seconds * 1000:.1f} ms\n")
+    else:
+        database = ConnectionManager(arguments.database, profile=arguments.profile,
+                                     read_only=read_only, immutable=arguments.immutable)
+    with database:
+        program.run_session(database, read_only)
+
+
+def run_session(database_name, read_only=False):  # pragma: no cover
+    """Runs the table menu until the user quits.
 
-    database_name = "Northwind.db"
+    Args:
+        database_name (str or ConnectionManager): database used for every operation
+        read_only (bool): True to leave Insert, Update and Delete out of the menu
 
+    """
     tables_list = get_tables(database_name)
 
     while True:
@@ -398,19 +1921,35 @@ def main():  # pragma: no cover
         
         selected_table = tables_list[choice - 1]
 
-        meta_data_and_rows = get_table_data(selected_table, database_name)
+        field_names = get_field_names(selected_table, database_name)
+        max_length = plan_column_widths(selected_table, database_name, field_names,
+                                        WIDTH_SAMPLE)
+        table_rows = TableRows(selected_table, database_name)
+        rows = table_rows.rows
 
-        field_names = meta_data_and_rows[0]
-        rows = meta_data_and_rows[1]
+        display_table(selected_table, rows, field_names, max_length)
 
-        display_table(selected_table, rows, field_names)
+        query = None
+        search_text = None
+        with connect(database_name) as connection:
+            searchable = search_index_name(selected_table) in get_search_tables(connection)
 
         while True:
-            prompt = (f"Enter a number to either INSERT, UPDATE or DELETE a row in '{selected_table}'. "
+            prompt = (f"Enter a number to either INSERT, UPDATE or DELETE a row in '{selected_table}', "
+                      "to show the next page or to filter and sort. "
                       "Press <Enter> to choose a different table.")
-            options = ["Insert", "Update", "Delete"]
+            options = ["Insert", "Update", "Delete", "Next page", "Filter"]
+            if read_only:
+                prompt = (f"Enter a number to show the next page of '{selected_table}' or to "
+                          "filter and sort. Press <Enter> to choose a different table.")
+                options = ["Next page", "Filter"]
+            if searchable:
+                options.append("Search")
+            if sys.stdout.isatty():
+                options.append("Browse")
             choice = get_choice(options, prompt)
             if choice is None:
+                table_rows.close()
                 break
 
             selected_option = options[choice - 1]
@@ -424,8 +1963,59 @@ def main():  # pragma: no cover
             if selected_option == "Delete":
                 delete_record(database_name, selected_table, field_names, rows)
 
-            meta_data_and_rows = get_table_data(selected_table, database_name)
-            rows = meta_data_and_rows[1]
+            if selected_option in {"Insert", "Update"}:
+                max_length = plan_column_widths(selected_table, database_name, field_names,
+                                                WIDTH_SAMPLE)
+
+            if selected_option == "Filter":
+                filters, order_by, limit = ask_query(field_names)
+                query = (filters, order_by, limit) if filters or order_by else None
+                search_text = None
+
+            if selected_option == "Search":
+                search_text = input("Words to search for. Press <Enter> to clear the search: ")
+                search_text = search_text.strip() or None
+                query = None
+
+            if selected_option == "Browse":
+                # The pager opens its own read-only connection to the file, so a
+                # working copy in memory writes its changes there first.
+                import pager
+                if isinstance(database_name, ConnectionManager):
+                    if hasattr(database_name, 'flush'):
+                        database_name.flush()
+                    pager.browse(selected_table, database_name.database, database_name.profile)
+                else:
+                    pager.browse(selected_table, database_name)
+                continue
+
+            if selected_option == "Next page":
+                if query is None and search_text is None:
+                    rows = table_rows.next_page()
+                    display_table(selected_table, rows, field_names, max_length)
+                else:
+                    print("Choose Filter and press <Enter> three times, or Search and press "
+                          "<Enter>, to page through the whole table.\n")
+                continue
+
+            if query is not None:
+                rows = query_table(selected_table, database_name, *query)[1]
+                if not rows:
+                    print("No rows match the filter.\n")
+                    query = None
+
+            if search_text is not None:
+                rows = search_table(selected_table, search_text, database_name)[1]
+                if not rows:
+                    print("No rows match the search.\n")
+                    search_text = None
+
+            if query is None and search_text is None:
+                table_rows.refresh()
+                rows = table_rows.rows
+
+            if selected_option in {"Filter", "Search"}:
+                display_table(selected_table, rows, field_names, max_length)
 
 
 if __name__ == "__main__":  # pragma: no cover
@@ -0,0 +1,373 @@
+"""This program exports tables or query results from a SQLite database to CSV,
+JSONL or a compact columnar file. Rows are fetched in batches with fetchmany,
+so memory use stays the same however big the table is.
+
+Instructions:
+    Include Northwind.db in the current directory.
+
+    Run "python table_export.py Orders OrderDetails --format csv --gzip" to write
+    Orders.csv.gz and OrderDetails.csv.gz, or "python table_export.py --all
+    --parallel" to export every table at once on separate read connections.
+    Run "python table_export.py --query "SELECT * FROM Orders WHERE ShipCountry = ?"
+    --value France --output france.jsonl" to export a query.
+
+Columnar format:
+    The file starts with MAGIC, then a header line of JSON with the column names.
+    Each batch of rows follows as a row group: the row count, then for every
+    column a kind byte, the payload length and the payload. Kind 'q' is an
+    array of 64-bit integers, 'd' an array of doubles, 's' an array of UTF-8
+    byte lengths followed by the joined strings, and 'j' a JSON list for
+    columns with NULLs or mixed types, where a BLOB is an object {"$b64":
+    base64 text} so it reads back as bytes. Integers are little-endian.
+
+Output:
+    One file per table, with rows, bytes and rows per second for each.
+
+"""
+import argparse
+import base64
+import csv
+import gzip
+import io
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import sql_program
+
+BATCH_SIZE = 5000
+MAGIC = b'SQLCOL1\n'
+EXTENSIONS = {'csv': '.csv', 'jsonl': '.jsonl', 'columnar': '.col'}
+
+ExportReport = namedtuple('ExportReport', ['path', 'rows', 'bytes', 'seconds'])
+
+
+def json_default(value):
+    """Encodes BLOB values, which JSON has no type for, as base64 text."""
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def tag_blob(value):
+    """Encodes BLOB values as {"$b64": base64 text}, so they decode as bytes."""
+    if isinstance(value, bytes):
+        return {'$b64': json_default(value)}
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def untag_blob(obj):
+    """Decodes an object written by tag_blob back to bytes."""
+    if obj.keys() == {'$b64'}:
+        return base64.b64decode(obj['$b64'])
+    return obj
+
+
+def fetch_batches(cursor, batch_size):
+    """Yields the rows of an executed cursor in batches from fetchmany."""
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return
+        yield batch
+
+
+def write_csv(file, field_names, batches):
+    """Writes a header row and then every batch as CSV.
+
+    Args:
+        file (binary file): file to write to
+        field_names (list): column names
+        batches (iterable): lists of rows
+
+    Returns:
+        int: rows written.
+
+    """
+    text = io.TextIOWrapper(file, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(field_names)
+
+    count = 0
+    for batch in batches:
+        writer.writerows([[json_default(value) if isinstance(value, bytes) else value
+                           for value in row] for row in batch])
+        count += len(batch)
+
+    text.flush()
+    text.detach()
+    return count
+
+
+def write_jsonl(file, field_names, batches):
+    """Writes every row as a JSON object on its own line.
+
+    Args:
+        file (binary file): file to write to
+        field_names (list): column names
+        batches (iterable): lists of rows
+
+    Returns:
+        int: rows written.
+
+    """
+    count = 0
+    for batch in batches:
+        lines = [json.dumps(dict(zip(field_names, row)), default=json_default)
+                 for row in batch]
+        file.write(('\n'.join(lines) + '\n').encode('utf-8'))
+        count += len(batch)
+
+    return count
+
+
+def encode_column(values):
+    """Encodes one column of a row group.
+
+    Args:
+        values (list): the column's values
+
+    Returns:
+        tuple: (kind byte, payload bytes)
+
+    """
+    kinds = {type(value) for value in values}
+
+    if kinds == {int}:
+        return b'q', array('q', values).tobytes()
+    if kinds == {float}:
+        return b'd', array('d', values).tobytes()
+    if kinds == {str}:
+        encoded = [value.encode('utf-8') for value in values]
+        lengths = array('I', [len(value) for value in encoded])
+        return b's', lengths.tobytes() + b''.join(encoded)
+
+    return b'j', json.dumps(values, default=tag_blob).encode('utf-8')
+
+
+def write_columnar(file, field_names, batches):
+    """Writes every batch as a row group of the columnar format.
+
+    Args:
+        file (binary file): file to write to
+        field_names (list): column names
+        batches (iterable): lists of rows
+
+    Returns:
+        int: rows written.
+
+    """
+    file.write(MAGIC)
+    file.write((json.dumps({'columns': field_names}) + '\n').encode('utf-8'))
+
+    count = 0
+    for batch in batches:
+        parts = [struct.pack('<I', len(batch))]
+        for values in zip(*batch):
+            kind, payload = encode_column(list(values))
+            parts.append(kind + struct.pack('<Q', len(payload)))
+            parts.append(payload)
+        file.write(b''.join(parts))
+        count += len(batch)
+
+    return count
+
+
+def read_columnar(path):
+    """Reads a columnar file back.
+
+    Args:
+        path (str): file written by export, gzipped if it ends in .gz
+
+    Returns:
+        list: [field names, rows]
+
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as file:
+        assert file.read(len(MAGIC)) == MAGIC, f"{path} is not a columnar file."
+        field_names = json.loads(file.readline())['columns']
+
+        rows = []
+        while True:
+            header = file.read(4)
+            if not header:
+                break
+            row_count = struct.unpack('<I', header)[0]
+
+            columns = []
+            for _ in field_names:
+                kind = file.read(1)
+                payload = file.read(struct.unpack('<Q', file.read(8))[0])
+                columns.append(decode_column(kind, payload, row_count))
+            rows.extend(zip(*columns))
+
+    return [field_names, rows]
+
+
+def decode_column(kind, payload, row_count):
+    """Decodes one column of a row group written by encode_column."""
+    if kind in {b'q', b'd'}:
+        values = array(kind.decode('ascii'))
+        values.frombytes(payload)
+        return values.tolist()
+    if kind == b's':
+        lengths = array('I')
+        lengths.frombytes(payload[:row_count * lengths.itemsize])
+        values = []
+        position = row_count * lengths.itemsize
+        for length in lengths:
+            values.append(payload[position:position + length].decode('utf-8'))
+            position += length
+        return values
+
+    return json.loads(payload, object_hook=untag_blob)
+
+
+WRITERS = {'csv': write_csv, 'jsonl': write_jsonl, 'columnar': write_columnar}
+
+
+def export_query(sql, values, database, path, file_format='csv', compress=False,
+                 batch_size=BATCH_SIZE):
+    """Streams the rows of a query to a file.
+
+    Args:
+        sql (str): SELECT statement, may use ? placeholders
+        values (list): values for the placeholders, or None
+        database (str or ConnectionManager): database name or open manager
+        path (str): file to write
+        file_format (str): 'csv', 'jsonl' or 'columnar'
+        compress (bool): True to gzip the file
+        batch_size (int): rows fetched and written at a time
+
+    Returns:
+        ExportReport: path, rows, bytes written and seconds taken.
+
+    """
+    assert file_format in WRITERS, f"Unknown export format: {file_format}"
+    assert batch_size > 0, "Batch size must be at least 1."
+
+    start = time.perf_counter()
+    opener = gzip.open if compress else open
+
+    with sql_program.connect(database) as connection:
+        cursor = connection.execute(sql, values or [])
+        field_names = [field[0] for field in cursor.description]
+
+        with opener(path, 'wb') as file:
+            count = WRITERS[file_format](file, field_names,
+                                         fetch_batches(cursor, batch_size))
+
+    return ExportReport(path, count, os.path.getsize(path), time.perf_counter() - start)
+
+
+def export_path(selected_table, output_dir, file_format, compress):
+    """Returns: str: file name a table is exported to."""
+    extension = EXTENSIONS[file_format] + ('.gz' if compress else '')
+    return os.path.join(output_dir, f"{selected_table}{extension}")
+
+
+def export_table(selected_table, database, output_dir='.', file_format='csv',
+                 compress=False, batch_size=BATCH_SIZE):
+    """Streams every row of a table to a file named after the table.
+
+    Args:
+        selected_table (str): table name
+        database (str or ConnectionManager): database name or open manager
+        output_dir (str): directory to write to
+        file_format (str): 'csv', 'jsonl' or 'columnar'
+        compress (bool): True to gzip the file
+        batch_size (int): rows fetched and written at a time
+
+    Returns:
+        ExportReport: path, rows, bytes written and seconds taken.
+
+    """
+    path = export_path(selected_table, output_dir, file_format, compress)
+    return export_query(f"SELECT * FROM {selected_table};", None, database, path,
+                        file_format, compress, batch_size)
+
+
+def export_tables(tables, database, output_dir='.', file_format='csv', compress=False,
+                  batch_size=BATCH_SIZE, workers=1):
+    """Exports several tables, more than one at a time if workers is above 1.
+
+    Each worker thread reads on its own connection: a pooled reader of the
+    ConnectionManager, or a connection of its own for a database name.
+
+    Args:
+        tables (list): table names
+        database (str or ConnectionManager): database name or open manager
+        output_dir (str): directory to write to
+        file_format (str): 'csv', 'jsonl' or 'columnar'
+        compress (bool): True to gzip the files
+        batch_size (int): rows fetched and written at a time
+        workers (int): tables exported at the same time
+
+    Returns:
+        list: ExportReport for each table, in the order given.
+
+    """
+    assert workers > 0, "Workers must be at least 1."
+
+    def export(selected_table):
+        return export_table(selected_table, database, output_dir, file_format,
+                            compress, batch_size)
+
+    if workers == 1:
+        return [export(selected_table) for selected_table in tables]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(export, tables))
+
+
+def main():  # pragma: no cover
+    """Exports the tables or query named on the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tables", nargs='*', help="tables to export")
+    parser.add_argument("--all", action="store_true", help="export every table")
+    parser.add_argument("--query", help="SELECT statement to export instead of tables")
+    parser.add_argument("--value", action="append", dest="values",
+                        help="value for a ? in the query, repeat for each one")
+    parser.add_argument("--output", help="file the query is exported to")
+    parser.add_argument("--database", default="Northwind.db",
+                        help="database to export from (default Northwind.db)")
+    parser.add_argument("--format", choices=list(WRITERS), default='csv',
+                        dest="file_format", help="file format (default csv)")
+    parser.add_argument("--gzip", action="store_true", help="compress the files")
+    parser.add_argument("--output-dir", default='.', help="directory for table files")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"rows fetched at a time (default {BATCH_SIZE})")
+    parser.add_argument("--parallel", type=int, nargs='?', const=4, default=1,
+                        metavar="WORKERS", help="tables exported at once (default 4)")
+    arguments = parser.parse_args()
+
+    with sql_program.ConnectionManager(arguments.database,
+                                       pool_size=arguments.parallel) as database:
+        if arguments.query:
+            if not arguments.output:
+                sys.exit("--output is needed with --query")
+            reports = [export_query(arguments.query, arguments.values, database,
+                                    arguments.output, arguments.file_format,
+                                    arguments.gzip, arguments.batch_size)]
+        else:
+            tables = sql_program.get_tables(database) if arguments.all else arguments.tables
+            if not tables:
+                sys.exit("Name the tables to export, or use --all or --query")
+            reports = export_tables(tables, database, arguments.output_dir,
+                                    arguments.file_format, arguments.gzip,
+                                    arguments.batch_size, arguments.parallel)
+
+    for report in reports:
+        rate = report.rows / report.seconds if report.seconds else 0.0
+        print(f"{report.path}: {report.rows} rows, {report.bytes} bytes "
+              f"in {report.seconds:.2f}s ({rate:.0f} rows/s)")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
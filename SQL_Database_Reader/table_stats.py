@@ -0,0 +1,209 @@
+"""This program profiles every table of a SQLite database: its row count and,
+for every column, the share of NULLs, the number of distinct values and the
+smallest and largest value. Tables are profiled at the same time in a pool of
+processes, each reading its table on a read-only connection of its own.
+
+The profiles are saved next to the database in "<database>.stats.json" and
+reused until the database changes.
+
+Instructions:
+    Include Northwind.db in the current directory.
+
+    Run "python table_stats.py" to profile every table, "--workers 8" to use
+    eight processes and "--refresh" to ignore the saved profiles.
+
+Output:
+    Each table's row count followed by one line per column.
+
+"""
+import argparse
+import json
+import os
+import struct
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import sql_program
+
+TableStats = namedtuple('TableStats', ['name', 'rows', 'columns'])
+ColumnStats = namedtuple('ColumnStats', ['name', 'nulls', 'distinct', 'minimum', 'maximum'])
+
+
+def null_ratio(stats, column):
+    """Returns: float: share of a ColumnStats' table rows that are NULL."""
+    return column.nulls / stats.rows if stats.rows else 0.0
+
+
+def summarize(value):
+    """Replaces a BLOB with its size, so profiles stay small and JSON safe."""
+    if isinstance(value, bytes):
+        return f"<{len(value)} bytes>"
+    return value
+
+
+def profile_table(database, selected_table):
+    """Profiles one table in a single pass over its rows.
+
+    Args:
+        database (str): database name
+        selected_table (str): table name
+
+    Returns:
+        TableStats: row count and a ColumnStats for every column.
+
+    """
+    connection = sql_program.open_connection(database, 'ro')
+    try:
+        cursor = connection.execute(f'SELECT * FROM "{selected_table}" LIMIT 0;')
+        columns = [field[0] for field in cursor.description]
+
+        aggregates = ['COUNT(*)']
+        for column in columns:
+            aggregates += [f'COUNT("{column}")', f'COUNT(DISTINCT "{column}")',
+                           f'MIN("{column}")', f'MAX("{column}")']
+        row = connection.execute(
+            f'SELECT {", ".join(aggregates)} FROM "{selected_table}";').fetchone()
+    finally:
+        connection.close()
+
+    rows = row[0]
+    column_stats = []
+    for num, column in enumerate(columns):
+        filled, distinct, minimum, maximum = row[1 + num * 4:5 + num * 4]
+        column_stats.append(ColumnStats(column, rows - filled, distinct,
+                                        summarize(minimum), summarize(maximum)))
+
+    return TableStats(selected_table, rows, column_stats)
+
+
+def stats_path(database):
+    """Returns: str: file the profiles of database are saved in."""
+    return f"{database}.stats.json"
+
+
+def database_version(database):
+    """Gets a value that changes whenever database changes.
+
+    PRAGMA data_version only means something on the connection that read it,
+    so the saved profiles are keyed on state every connection can see: the
+    schema version and file change counter in the database header and the
+    size and modification time of the database and its WAL file.
+
+    Args:
+        database (str): database name
+
+    Returns:
+        list: the version, as saved in the stats file.
+
+    """
+    with open(database, 'rb') as file:
+        header = file.read(100)
+    change_counter, schema_version = struct.unpack('>I12xI', header[24:44])
+
+    version = [schema_version, change_counter]
+    for path in (database, f"{database}-wal"):
+        try:
+            status = os.stat(path)
+            version += [status.st_size, status.st_mtime_ns]
+        except FileNotFoundError:
+            version += [0, 0]
+
+    return version
+
+
+def load_stats(database, version):
+    """Gets the saved profiles if they were made at this version.
+
+    Returns:
+        list: TableStats for every table, or None.
+
+    """
+    try:
+        with open(stats_path(database), encoding='utf-8') as file:
+            saved = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if saved.get('version') != version:
+        return None
+
+    return [TableStats(table['name'], table['rows'],
+                       [ColumnStats(*column) for column in table['columns']])
+            for table in saved['tables']]
+
+
+def save_stats(database, version, table_stats):
+    """Saves profiles next to the database, replacing any saved before."""
+    saved = {'version': version,
+             'tables': [{'name': stats.name, 'rows': stats.rows,
+                         'columns': [list(column) for column in stats.columns]}
+                        for stats in table_stats]}
+
+    path = stats_path(database)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as file:
+        json.dump(saved, file)
+    os.replace(f"{path}.tmp", path)
+
+
+def collect_stats(database, workers=None, refresh=False):
+    """Profiles every table of a database, in parallel processes.
+
+    Args:
+        database (str or ConnectionManager): database name or open manager
+        workers (int): processes to use, None for one per CPU or 1 to profile
+        in this process
+        refresh (bool): True to profile again even if saved profiles are current
+
+    Returns:
+        list: TableStats for every table, in get_tables order.
+
+    """
+    if isinstance(database, sql_program.ConnectionManager):
+        database = database.database
+
+    version = database_version(database)
+    if not refresh:
+        table_stats = load_stats(database, version)
+        if table_stats is not None:
+            return table_stats
+
+    tables = sql_program.get_tables(database)
+    if workers == 1:
+        table_stats = [profile_table(database, selected_table) for selected_table in tables]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            table_stats = list(executor.map(profile_table, [database] * len(tables), tables))
+
+    save_stats(database, version, table_stats)
+
+    return table_stats
+
+
+def main():  # pragma: no cover
+    """Profiles the database named on the command line and prints the profiles."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", default="Northwind.db",
+                        help="database to profile (default Northwind.db)")
+    parser.add_argument("--workers", type=int,
+                        help="processes to use (default one per CPU)")
+    parser.add_argument("--refresh", action="store_true", help="ignore saved profiles")
+    arguments = parser.parse_args()
+
+    start = time.perf_counter()
+    table_stats = collect_stats(arguments.database, arguments.workers, arguments.refresh)
+
+    for stats in table_stats:
+        print(f"{stats.name}: {stats.rows} rows")
+        width = max(len(column.name) for column in stats.columns)
+        for column in stats.columns:
+            print(f"    {column.name:<{width}}  nulls {null_ratio(stats, column):6.1%}  "
+                  f"distinct {column.distinct:<8} min {column.minimum!s:.30}  "
+                  f"max {column.maximum!s:.30}")
+        print()
+
+    print(f"Profiled {len(table_stats)} tables in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
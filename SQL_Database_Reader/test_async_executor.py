@@ -0,0 +1,99 @@
+"""This file tests async_executor.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import asyncio
+import sqlite3
+
+import pytest
+import async_executor
+import sql_program
+
+ENDLESS_COUNT = ("WITH RECURSIVE numbers(num) AS (SELECT 1 UNION ALL "
+                 "SELECT num + 1 FROM numbers LIMIT 100000000) SELECT COUNT(*) FROM numbers;")
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE Regions(RegionID INTEGER PRIMARY KEY, "
+                       "RegionDescription TEXT);")
+    connection.executemany("INSERT INTO Regions VALUES(?, ?);",
+                           [(num, f"Region {num}") for num in range(1, 2001)])
+    connection.commit()
+    connection.close()
+    return database
+
+
+async def cancel_after_progress(executor, call):
+    """Starts call, cancels it at its first progress report and awaits it."""
+    started = asyncio.Event()
+    task = asyncio.create_task(executor.run(call, lambda steps: started.set()))
+    await asyncio.wait_for(started.wait(), 10)
+    task.cancel()
+    await task
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=ASYNC CALLS=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_async_calls_return_program_results(tmp_path):
+    database = create_database(tmp_path)
+    async def session():
+        async with async_executor.AsyncExecutor(database, progress_steps=10) as executor:
+            steps = []
+            tables = await executor.get_tables()
+            await executor.execute_sql("DELETE FROM Regions WHERE RegionID > ?;", [10])
+            field_names, rows = await executor.get_table_data('Regions', steps.append)
+            return tables, field_names, rows, steps
+
+    tables, field_names, rows, steps = asyncio.run(session())
+
+    assert tables == ['Regions']
+    assert field_names == ['RegionID', 'RegionDescription']
+    assert rows[-1] == (10, 'Region 10')
+    assert steps and steps == sorted(steps)
+
+
+def test_async_calls_run_on_one_thread(tmp_path):
+    database = create_database(tmp_path)
+    async def session():
+        async with async_executor.AsyncExecutor(database) as executor:
+            first = await executor.run(lambda manager: manager)
+            second = await executor.run(lambda manager: manager)
+            return first is second
+
+    assert asyncio.run(session())
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=CANCELLATION=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_cancel_interrupts_running_query(tmp_path):
+    database = create_database(tmp_path)
+    def count(manager):
+        with manager.writer() as connection:
+            return connection.execute(ENDLESS_COUNT).fetchone()
+
+    async def session():
+        async with async_executor.AsyncExecutor(database, progress_steps=1000) as executor:
+            with pytest.raises(asyncio.CancelledError):
+                await cancel_after_progress(executor, count)
+            return await executor.get_tables()
+
+    assert asyncio.run(session()) == ['Regions']
+
+
+def test_cancel_undoes_running_write(tmp_path):
+    database = create_database(tmp_path)
+    sql = ENDLESS_COUNT.replace("SELECT COUNT(*) FROM numbers;",
+                                "INSERT INTO Regions SELECT num + 5000, 'x' FROM numbers;")
+
+    async def session():
+        async with async_executor.AsyncExecutor(database, progress_steps=1000) as executor:
+            with pytest.raises(asyncio.CancelledError):
+                await cancel_after_progress(
+                    executor, lambda manager: sql_program.execute_sql(sql, manager, None))
+            return await executor.get_table_data('Regions')
+
+    assert len(asyncio.run(session())[1]) == 2000
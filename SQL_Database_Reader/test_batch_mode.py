@@ -0,0 +1,130 @@
+"""This file tests batch_mode.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import csv
+import io
+import sqlite3
+
+import pytest
+import batch_mode
+import sql_program
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE Regions(RegionID INTEGER PRIMARY KEY, "
+                       "RegionDescription TEXT NOT NULL);")
+    connection.executemany("INSERT INTO Regions VALUES(?, ?);",
+                           [(1, 'Eastern'), (2, 'Western'), (3, 'Northern')])
+    connection.commit()
+    connection.close()
+    return database
+
+
+def get_rows(database):
+    return sql_program.get_table_data('Regions', database)[1]
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=SCRIPTS=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_list_and_show_write_to_the_sink(tmp_path):
+    database = create_database(tmp_path)
+    sink = io.StringIO()
+    with sql_program.ConnectionManager(database) as manager:
+        report = batch_mode.run_script(
+            ["# tables", "list", 'show Regions where "RegionID > 1" order "RegionID desc"',
+             'show Regions where "RegionID > 9"'], manager, sink=sink)
+
+    output = sink.getvalue()
+    assert output.startswith("Regions\n")
+    assert output.index("Northern") < output.index("Western")
+    assert "Eastern" not in output
+    assert "No rows in Regions match." in output
+    assert report.operations['show'][0] == 2 and not report.errors
+
+
+def test_writes_count_rows_changed(tmp_path):
+    database = create_database(tmp_path)
+    script = ['insert Regions RegionID=4 "RegionDescription=Southern Isles"',
+              'update Regions set RegionDescription=Central where "RegionID >= 3"',
+              'delete Regions where "RegionID = 1"']
+    with sql_program.ConnectionManager(database) as manager:
+        report = batch_mode.run_script(script, manager, transaction_size=2)
+
+    assert report.rows == 4
+    assert get_rows(database) == [(2, 'Western'), (3, 'Central'), (4, 'Central')]
+
+
+def test_writes_commit_every_transaction_size(tmp_path):
+    database = create_database(tmp_path)
+    script = [f"insert Regions RegionID={num} RegionDescription=Region{num}"
+              for num in range(10, 15)]
+    with sql_program.ConnectionManager(database) as manager:
+        with manager.writer() as connection:
+            commits = []
+            connection.set_trace_callback(
+                lambda sql: commits.append(sql) if sql == 'COMMIT' else None)
+        batch_mode.run_script(script, manager, transaction_size=2)
+
+    # Two full transactions and the rest at the end of the script.
+    assert len(commits) == 3
+    assert len(get_rows(database)) == 8
+
+
+def test_failures_are_reported_and_skipped(tmp_path):
+    database = create_database(tmp_path)
+    script = ["insert Regions RegionID=1 RegionDescription=Again", "fly Regions",
+              "delete Regions", 'show Regions where "Missing = 1"',
+              "insert Regions RegionID=5 RegionDescription=Fifth"]
+    with sql_program.ConnectionManager(database) as manager:
+        report = batch_mode.run_script(script, manager, sink=io.StringIO())
+
+    assert [line_number for line_number, _ in report.errors] == [1, 2, 3, 4]
+    assert "UNIQUE" in report.errors[0][1]
+    assert "Unknown operation" in report.errors[1][1]
+    assert report.rows == 1 and len(get_rows(database)) == 4
+    assert "line 2: Unknown operation: fly" in batch_mode.format_report(report)
+
+
+def test_stop_on_error_rolls_back_the_open_transaction(tmp_path):
+    database = create_database(tmp_path)
+    script = ["insert Regions RegionID=4 RegionDescription=Kept", "commit",
+              "insert Regions RegionID=5 RegionDescription=Dropped",
+              "insert Regions RegionID=1 RegionDescription=Duplicate",
+              "insert Regions RegionID=6 RegionDescription=Never"]
+    with sql_program.ConnectionManager(database) as manager:
+        report = batch_mode.run_script(script, manager, stop_on_error=True)
+
+    assert report.rows == 1
+    assert [line_number for line_number, _ in report.errors] == [4]
+    assert [row[0] for row in get_rows(database)] == [1, 2, 3, 4]
+
+
+def test_export_writes_a_file_of_the_table(tmp_path):
+    database = create_database(tmp_path)
+    path = tmp_path / "regions.csv"
+    sink = io.StringIO()
+    with sql_program.ConnectionManager(database) as manager:
+        report = batch_mode.run_script([f"export Regions {path}", f"export Regions {path}.txt"],
+                                       manager, sink=sink)
+
+    with open(path, newline='', encoding='utf-8') as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ['RegionID', 'RegionDescription'] and len(rows) == 4
+    assert "Exported 3 rows" in sink.getvalue()
+    assert report.errors[0][0] == 2
+
+
+def test_script_file_writes_fail_when_read_only(tmp_path, capsys):
+    database = create_database(tmp_path)
+    path = tmp_path / "ops.txt"
+    path.write_text("insert Regions RegionID=4 RegionDescription=Southern\n"
+                    "show Regions\n", encoding='utf-8')
+
+    assert batch_mode.run_script_file(str(path), database, read_only=True) == 1
+    assert "readonly" in capsys.readouterr().err
+    assert len(get_rows(database)) == 3
@@ -0,0 +1,75 @@
+"""This file tests benchmark_suite.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import json
+import sqlite3
+
+import benchmark_suite
+import sql_program
+
+
+def test_build_database_writes_bench_rows(tmp_path):
+    database = str(tmp_path / "bench.db")
+    benchmark_suite.build_database(database, 250)
+
+    connection = sqlite3.connect(database)
+    rows = connection.execute("SELECT COUNT(*), MAX(BenchID) FROM Bench;").fetchone()
+    first = connection.execute("SELECT * FROM Bench WHERE BenchID = 1;").fetchone()
+    connection.close()
+
+    assert rows == (250, 250)
+    assert first == (1, 'Product 1', 0.25, 1, '1996-07-05')
+
+
+def test_percentile_uses_nearest_rank():
+    samples = list(range(100, 0, -1))
+
+    assert benchmark_suite.percentile(samples, 0.5) == 50
+    assert benchmark_suite.percentile(samples, 0.99) == 99
+    assert benchmark_suite.percentile([7], 0.99) == 7
+
+
+def test_run_suite_measures_every_operation(monkeypatch):
+    monkeypatch.setattr(benchmark_suite, 'MIN_SAMPLES', 2)
+    run = benchmark_suite.run_suite([1500], budget=0)
+
+    results = run['results']
+    assert [result['operation'] for result in results] == [
+        'get_tables', 'get_table_data', 'display_table', 'format_row',
+        'calculate_max_length', 'insert', 'update', 'delete']
+    assert all(result['rows'] == 1500 and result['samples'] == 2 for result in results)
+    assert all(result['p50_ms'] <= result['p99_ms'] for result in results)
+    assert results[1]['peak_bytes'] > 0
+    assert json.loads(json.dumps(run))['environment']['sqlite'] == sqlite3.sqlite_version
+
+
+def test_writes_change_rows_that_exist(tmp_path):
+    database = str(tmp_path / "bench.db")
+    benchmark_suite.build_database(database, 10)
+    rows = sql_program.get_table_page('Bench', database, None, 5)[0]
+    field_names = sql_program.get_field_names('Bench', database)
+
+    with sql_program.ConnectionManager(database) as manager:
+        operations = {name: operation for name, operation, _, _ in
+                      benchmark_suite.suite_operations(database, manager, 10, rows,
+                                                       field_names, None)}
+        for run in range(25):
+            operations['update'](run)
+        before = sql_program.get_table_data('Bench', manager)[1]
+        for run in range(3):
+            operations['delete'](run)
+        after = sql_program.get_table_data('Bench', manager)[1]
+
+    assert [row[3] for row in before[:10]] == [20, 21, 22, 23, 24, 15, 16, 17, 18, 19]
+    assert len(before) - len(after) == 3
+
+
+def test_compare_runs_flags_slower_operations():
+    baseline = {'results': [{'operation': 'format_row', 'rows': 1000, 'throughput': 100.0},
+                            {'operation': 'insert', 'rows': 1000, 'throughput': 100.0}]}
+    current = {'results': [{'operation': 'format_row', 'rows': 1000, 'throughput': 95.0},
+                           {'operation': 'insert', 'rows': 1000, 'throughput': 80.0},
+                           {'operation': 'delete', 'rows': 1000, 'throughput': 1.0}]}
+
+    assert benchmark_suite.compare_runs(baseline, current) == [('insert', 1000, 100.0, 80.0)]
@@ -0,0 +1,133 @@
+"""This file tests bulk_import.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import sqlite3
+
+import pytest
+import bulk_import
+import sql_program
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE Regions(RegionID INTEGER PRIMARY KEY, "
+                       "RegionDescription TEXT NOT NULL, Population INT DEFAULT 0);")
+    connection.execute("CREATE INDEX RegionNames ON Regions(RegionDescription);")
+    connection.close()
+    return database
+
+
+def select_regions(database):
+    connection = sqlite3.connect(database)
+    rows = connection.execute("SELECT * FROM Regions;").fetchall()
+    connection.close()
+    return rows
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=READ RECORDS=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_read_records_reads_csv(tmp_path):
+    path = tmp_path / "regions.csv"
+    path.write_text("RegionID,RegionDescription\n1,Eastern\n2,\n3\n", encoding='utf-8')
+
+    assert list(bulk_import.read_records(str(path))) == [
+        (2, {'RegionID': '1', 'RegionDescription': 'Eastern'}),
+        (3, {'RegionID': '2', 'RegionDescription': None}),
+        (4, 'expected 2 fields')]
+
+
+def test_read_records_reads_jsonl(tmp_path):
+    path = tmp_path / "regions.txt"
+    path.write_text('{"RegionID": 1}\n\n[1]\n{bad\n', encoding='utf-8')
+
+    records = list(bulk_import.read_records(str(path), 'jsonl'))
+    assert records[0] == (1, {'RegionID': 1})
+    assert records[1] == (3, 'expected a JSON object')
+    assert records[2][0] == 4 and records[2][1].startswith('invalid JSON')
+
+
+def test_read_records_raises_with_unknown_format(tmp_path):
+    with pytest.raises(AssertionError):
+        list(bulk_import.read_records(str(tmp_path / "regions.xml")))
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=BULK IMPORT=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_bulk_import_loads_csv_in_batches(tmp_path):
+    database = create_database(tmp_path)
+    path = tmp_path / "regions.csv"
+    lines = ["regionid,RegionDescription"] + [f"{num},Region {num}" for num in range(1, 8)]
+    path.write_text('\n'.join(lines), encoding='utf-8')
+
+    report = bulk_import.bulk_import(str(path), 'Regions', database, batch_size=3)
+
+    assert (report.inserted, report.rejected) == (7, [])
+    assert select_regions(database)[-1] == (7, 'Region 7', 0)
+    assert bulk_import.rows_per_second(report) > 0
+
+
+def test_bulk_import_rejects_bad_rows_and_keeps_good_ones(tmp_path):
+    database = create_database(tmp_path)
+    path = tmp_path / "regions.jsonl"
+    path.write_text('{"RegionID": 1, "RegionDescription": "Eastern", "Population": 5}\n'
+                    '{"RegionID": 2}\n'
+                    '{"RegionID": 3, "Planet": "Mars"}\n'
+                    '{"RegionDescription": "Western"}\n', encoding='utf-8')
+
+    with sql_program.ConnectionManager(database) as manager:
+        report = bulk_import.bulk_import(str(path), 'Regions', manager)
+
+    assert report.inserted == 2
+    assert report.rejected == [(3, 'no such column: Planet'),
+                               (2, 'NOT NULL constraint failed: Regions.RegionDescription')]
+    assert select_regions(database) == [(1, 'Eastern', 5), (2, 'Western', 0)]
+
+
+def test_bulk_import_rebuilds_indexes(tmp_path):
+    database = create_database(tmp_path)
+    path = tmp_path / "regions.csv"
+    path.write_text("RegionID,RegionDescription\n1,Eastern\n", encoding='utf-8')
+
+    report = bulk_import.bulk_import(str(path), 'Regions', database, rebuild_indexes=True)
+
+    connection = sqlite3.connect(database)
+    indexes = connection.execute("SELECT name FROM sqlite_master WHERE type='index';").fetchall()
+    connection.close()
+
+    assert report.inserted == 1
+    assert indexes == [('RegionNames',)]
+    assert report.failed_indexes == []
+
+
+def test_bulk_import_keeps_unique_indexes(tmp_path):
+    database = create_database(tmp_path)
+    path = tmp_path / "regions.csv"
+    path.write_text("RegionID,RegionDescription\n1,Eastern\n2,Eastern\n", encoding='utf-8')
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE UNIQUE INDEX UniqueNames ON Regions(RegionDescription);")
+    connection.close()
+
+    report = bulk_import.bulk_import(str(path), 'Regions', database, rebuild_indexes=True)
+
+    connection = sqlite3.connect(database)
+    indexes = connection.execute("SELECT name FROM sqlite_master WHERE type='index' "
+                                 "ORDER BY name;").fetchall()
+    connection.close()
+
+    assert report.inserted == 1
+    assert [line_number for line_number, _ in report.rejected] == [3]
+    assert report.failed_indexes == []
+    assert indexes == [('RegionNames',), ('UniqueNames',)]
+
+
+def test_bulk_import_raises_with_invalid_table(tmp_path):
+    database = create_database(tmp_path)
+    path = tmp_path / "regions.csv"
+    path.write_text("RegionID\n1\n", encoding='utf-8')
+
+    with pytest.raises(sqlite3.OperationalError):
+        bulk_import.bulk_import(str(path), 'invalid_name', database)
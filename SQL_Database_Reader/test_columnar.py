@@ -0,0 +1,122 @@
+"""This file tests columnar.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import io
+import sqlite3
+
+import pytest
+import columnar
+import sql_program
+
+ROWS = [(10248, 11, 14.0, 12, 'Queso'), (10248, 42, 9.8, 10, 'Mee'),
+        (10249, 14, None, 9, 'Tofu'), (10250, 41, 7.7, None, 'Mee'),
+        (10251, 22, 16.8, 6, None)]
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE OrderDetails(OrderID INTEGER, ProductID INTEGER, "
+                       "UnitPrice REAL, Quantity INTEGER, ProductName TEXT);")
+    connection.executemany("INSERT INTO OrderDetails VALUES(?, ?, ?, ?, ?);", ROWS)
+    connection.commit()
+    connection.close()
+    return database
+
+
+def test_get_table_columns_stores_arrays_and_codes(tmp_path):
+    database = create_database(tmp_path)
+    table = columnar.get_table_columns('OrderDetails', database, batch_size=2)
+
+    assert [column.kind for column in table.columns] == ['q', 'q', 'd', 'q', 'o']
+    assert table.column('productname').dictionary == ['Queso', 'Mee', 'Tofu', None]
+    assert list(table) == sql_program.get_table_data('OrderDetails', database)[1]
+
+
+def test_rows_are_read_by_index_and_slice(tmp_path):
+    database = create_database(tmp_path)
+    table = columnar.get_table_columns('OrderDetails', database)
+
+    assert len(table) == 5
+    assert table[2] == (10249, 14, None, 9, 'Tofu')
+    assert table[-1] == (10251, 22, 16.8, 6, None)
+    assert list(table[1:3]) == ROWS[1:3]
+    assert len(table[4:10]) == 1
+    with pytest.raises(IndexError):
+        table[5]
+
+
+def test_aggregates_leave_out_nulls(tmp_path):
+    database = create_database(tmp_path)
+    table = columnar.get_table_columns('OrderDetails', database)
+
+    assert table.sum('Quantity') == 37
+    assert table.mean('UnitPrice') == pytest.approx((14.0 + 9.8 + 7.7 + 16.8) / 4)
+    assert (table.min('UnitPrice'), table.max('OrderID')) == (7.7, 10251)
+    assert table.max('ProductName') == 'Tofu'
+    assert table.sum_product('UnitPrice', 'Quantity') == pytest.approx(
+        14.0 * 12 + 9.8 * 10 + 16.8 * 6)
+    with pytest.raises(TypeError):
+        table.sum('ProductName')
+
+
+def test_column_changes_storage_for_mixed_values():
+    column = columnar.Column()
+    column.extend((None, None))
+    column.extend((1.5, None))
+    assert column.kind == 'd' and column.values() == [None, None, 1.5, None]
+
+    column.extend(('text', 2 ** 70))
+    assert column.kind == 'o'
+    assert column.values() == [None, None, 1.5, None, 'text', 2 ** 70]
+
+    big = columnar.Column()
+    big.extend((1, 2 ** 70))
+    assert big.kind == 'o' and big.values() == [1, 2 ** 70]
+
+
+def test_mixed_integers_and_doubles_are_summed(tmp_path):
+    database = create_database(tmp_path)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE Prices(Price NUMERIC, Quantity INT);")
+    connection.executemany("INSERT INTO Prices VALUES(?, ?);",
+                           [(2, 3), (2.5, 2), (None, 1), (4, 1)])
+    connection.commit()
+    connection.close()
+
+    table = columnar.get_table_columns('Prices', database)
+    assert table.columns[0].kind == 'd'
+    assert table.sum('Price') == 8.5
+    assert table.mean('Price') == pytest.approx(8.5 / 3)
+    assert table.sum_product('Price', 'Quantity') == 15.0
+    assert (table.min('Price'), table.max('Price')) == (2, 4)
+
+    # Integers come back as integers, as they do from get_table_data.
+    rows = sql_program.get_table_data('Prices', database)[1]
+    assert [tuple(map(type, row)) for row in table] == [tuple(map(type, row)) for row in rows]
+    assert list(table[1:]) == rows[1:]
+
+    column = columnar.Column()
+    column.extend((1, 2))
+    column.extend((0.5, 3))
+    assert column.kind == 'd' and column.values() == [1, 2, 0.5, 3]
+    assert type(column[0]) is int and type(column[2]) is float
+
+    column.extend((2 ** 60,))
+    assert column.kind == 'o' and column.values() == [1, 2, 0.5, 3, 2 ** 60]
+
+
+def test_display_table_renders_columnar_rows(tmp_path):
+    database = create_database(tmp_path)
+    table = columnar.get_table_columns('OrderDetails', database)
+    sink = io.StringIO()
+    expected = io.StringIO()
+
+    sql_program.display_table('OrderDetails', table, table.field_names, sink=sink)
+    sql_program.display_table('OrderDetails', ROWS, table.field_names, sink=expected)
+
+    assert sink.getvalue() == expected.getvalue()
+    assert table.memory_size() < sql_program.estimate_size(ROWS)
@@ -0,0 +1,84 @@
+"""This file tests full_text_search.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import sqlite3
+
+import pytest
+import full_text_search
+import sql_program
+
+CUSTOMERS = [('ALFKI', 'Alfreds Futterkiste', 'Maria Anders'),
+             ('ANATR', 'Ana Trujillo Emparedados y helados', 'Ana Trujillo'),
+             ('BERGS', 'Berglunds snabbköp', 'Christina Berglund'),
+             ('FRANK', 'Frankenversand', 'Peter Franken')]
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE Customers(CustomerID TEXT PRIMARY KEY, "
+                       "CompanyName TEXT COLLATE NOCASE, ContactName TEXT COLLATE NOCASE);")
+    connection.executemany("INSERT INTO Customers VALUES(?, ?, ?);", CUSTOMERS)
+    connection.commit()
+    connection.close()
+    return database
+
+
+def test_word_prefixes_find_rows_and_row_ids(tmp_path):
+    database = create_database(tmp_path)
+    assert full_text_search.create_index('Customers', ['companyname', 'ContactName'],
+                                         database) == 4
+
+    row_ids, rows = sql_program.search_table('Customers', 'alfr futt', database)
+    assert row_ids == [1] and rows == [CUSTOMERS[0]]
+    assert sql_program.search_table('Customers', 'BERGLUND', database)[1] == [CUSTOMERS[2]]
+    assert sql_program.search_table('Customers', 'terki', database) == [[], []]
+
+
+def test_substring_index_matches_inside_words(tmp_path):
+    database = create_database(tmp_path)
+    full_text_search.create_index('Customers', ['CompanyName'], database, substring=True)
+
+    assert sql_program.search_table('Customers', 'terki', database)[1] == [CUSTOMERS[0]]
+    # Shorter than a trigram, so the index's columns are scanned with LIKE.
+    assert sql_program.search_table('Customers', 'nv', database)[1] == [CUSTOMERS[3]]
+    assert full_text_search.get_indexes(database) == [
+        full_text_search.SearchIndex('Customers', ['CompanyName'], True)]
+
+
+def test_triggers_keep_the_index_in_sync(tmp_path):
+    database = create_database(tmp_path)
+    with sql_program.ConnectionManager(database) as manager:
+        full_text_search.create_index('Customers', ['CompanyName'], manager)
+        assert sql_program.search_table('Customers', 'alfreds', manager)[0] == [1]
+
+        sql_program.execute_sql("INSERT INTO Customers VALUES(?, ?, ?);", manager,
+                                ['WOLZA', 'Wolski Zajazd', 'Zbyszek'])
+        sql_program.execute_sql("UPDATE Customers SET CompanyName = ? WHERE CustomerID = ?;",
+                                manager, ['Alfred Shop', 'FRANK'])
+        sql_program.execute_sql("DELETE FROM Customers WHERE CustomerID = ?;", manager, ['ALFKI'])
+
+        assert sql_program.search_table('Customers', 'wolski', manager)[0] == [5]
+        assert sql_program.search_table('Customers', 'alfred', manager)[1] == [
+            ('FRANK', 'Alfred Shop', 'Peter Franken')]
+        assert sql_program.search_table('Customers', 'frankenversand', manager) == [[], []]
+
+
+def test_search_tables_are_left_out_of_the_catalog(tmp_path):
+    database = create_database(tmp_path)
+    full_text_search.create_index('Customers', ['CompanyName'], database)
+
+    assert sql_program.get_tables(database) == ['Customers']
+    with sqlite3.connect(database) as connection:
+        assert 'Customers_fts_data' in sql_program.get_search_tables(connection)
+
+    full_text_search.drop_index('Customers', database)
+    assert full_text_search.get_indexes(database) == []
+    with pytest.raises(sqlite3.OperationalError, match="no search index"):
+        sql_program.search_table('Customers', 'alfreds', database)
+    # The triggers went with the index, so writes still work.
+    sql_program.execute_sql("DELETE FROM Customers;", database, [])
+    assert sql_program.get_table_data('Customers', database)[1] == []
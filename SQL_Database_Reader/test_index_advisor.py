@@ -0,0 +1,110 @@
+"""This file tests index_advisor.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import sqlite3
+
+import pytest
+import index_advisor
+import sql_program
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE Orders(OrderID INTEGER PRIMARY KEY, ShipCountry TEXT, "
+                       "Freight REAL, ShipName TEXT);")
+    connection.executemany("INSERT INTO Orders VALUES(?, ?, ?, ?);",
+                           [(num, ['France', 'Germany', 'Spain'][num % 3], num * 1.5,
+                             f"Ship {num}") for num in range(1, 301)])
+    connection.commit()
+    connection.close()
+    return database
+
+
+def get_table(database, selected_table):
+    connection = sqlite3.connect(database)
+    table = sql_program.SchemaCatalog().refresh(connection).table(selected_table)
+    connection.close()
+    return table
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=STATEMENT LOG=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_statement_log_captures_program_statements(tmp_path):
+    database = create_database(tmp_path)
+    log = index_advisor.StatementLog()
+
+    with sql_program.ConnectionManager(database) as manager:
+        with manager.writer() as connection:
+            log.attach(connection)
+        index_advisor.run_program_workload(manager, [('Orders', 'shipcountry')])
+        with manager.writer() as connection:
+            log.detach(connection)
+
+    statements = list(log.statements)
+    assert any(sql.startswith('UPDATE Orders SET') for sql in statements)
+    assert any(sql.startswith('DELETE FROM Orders') for sql in statements)
+    assert "SELECT * FROM Orders WHERE \"ShipCountry\" = 'Germany' LIMIT 100;" in statements
+    assert not any(sql.upper().startswith(('PRAGMA', 'SAVEPOINT')) for sql in statements)
+    assert len(sql_program.get_table_data('Orders', database)[1]) == 300
+
+
+def test_read_statements_splits_on_line_ends(tmp_path):
+    path = tmp_path / "session.sql"
+    path.write_text("SELECT *\nFROM Orders;\nSELECT 1;\n\n", encoding='utf-8')
+
+    assert index_advisor.read_statements(str(path)) == ["SELECT *\nFROM Orders", "SELECT 1"]
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=PROPOSE INDEX=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_find_scans_ignores_unfiltered_reads():
+    assert index_advisor.find_scans("SELECT * FROM Orders LIMIT 100;", ['SCAN Orders']) == []
+    assert index_advisor.find_scans("SELECT * FROM Orders WHERE Freight > 1;",
+                                    ['SCAN Orders']) == ['Orders']
+    assert index_advisor.find_scans("SELECT * FROM Orders ORDER BY Freight;",
+                                    ['SCAN Orders', 'USE TEMP B-TREE FOR ORDER BY']) == ['Orders']
+
+
+def test_propose_index_puts_equality_before_range_and_order(tmp_path):
+    database = create_database(tmp_path)
+    table = get_table(database, 'Orders')
+    sql = ("SELECT * FROM Orders WHERE \"Freight\" > 10 AND \"ShipCountry\" = 'France' "
+           "ORDER BY \"ShipName\" LIMIT 100;")
+
+    assert index_advisor.propose_index(sql, table) == (
+        'CREATE INDEX IF NOT EXISTS "advisor_Orders_ShipCountry_Freight_ShipName" '
+        'ON "Orders"("ShipCountry", "Freight", "ShipName");')
+    assert index_advisor.propose_index("SELECT * FROM Orders;", table) is None
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=ADVISE=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_advise_applies_index_and_removes_scan(tmp_path):
+    database = create_database(tmp_path)
+    sql = "SELECT * FROM Orders WHERE \"ShipCountry\" = 'Spain' LIMIT 100;"
+
+    with sql_program.ConnectionManager(database) as manager:
+        advice = index_advisor.advise(manager, {sql: 2}, apply=True)
+        again = index_advisor.advise(manager, {sql: 2})
+
+    assert len(advice) == 1
+    assert advice[0].scans == ['Orders'] and advice[0].count == 2
+    assert advice[0].index_sql.startswith('CREATE INDEX IF NOT EXISTS "advisor_Orders_ShipCountry"')
+    assert advice[0].before > 0 and advice[0].after > 0
+    assert again == []
+    assert get_table(database, 'Orders').indexes[0].columns == ['ShipCountry']
+
+
+def test_advise_does_not_change_rows(tmp_path):
+    database = create_database(tmp_path)
+    sql = "DELETE FROM Orders WHERE \"ShipName\" = 'Ship 5';"
+
+    with sql_program.ConnectionManager(database) as manager:
+        advice = index_advisor.advise(manager, {sql: 1}, apply=True)
+
+    assert advice[0].index_sql is not None
+    assert len(sql_program.get_table_data('Orders', database)[1]) == 300
@@ -0,0 +1,87 @@
+"""This file tests instrumentation.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import sqlite3
+
+import pytest
+import instrumentation
+import sql_program
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE Regions(RegionID INTEGER PRIMARY KEY, "
+                       "RegionDescription TEXT);")
+    connection.executemany("INSERT INTO Regions VALUES(?, ?);",
+                           [(1, 'Eastern'), (2, 'Western'), (3, 'Northern')])
+    connection.commit()
+    connection.close()
+    return database
+
+
+@pytest.fixture
+def instruments(tmp_path):
+    instruments = instrumentation.Instrumentation(slow_ms=0, slow_log=str(tmp_path / "slow.log"))
+    instruments.install(sql_program)
+    yield instruments
+    instruments.uninstall()
+
+
+def test_normalize_replaces_literals():
+    sql = "SELECT * FROM t1 WHERE a = 12 AND b = 'it''s'\n  AND c > -1.5;"
+
+    assert instrumentation.normalize(sql) == "SELECT * FROM t1 WHERE a = ? AND b = ? AND c > ?;"
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    histogram = instrumentation.Histogram()
+    for seconds in [0.0004] * 98 + [0.02, 3.0]:
+        histogram.add(seconds)
+
+    assert histogram.count == 100
+    assert histogram.percentile(0.5) == 0.5
+    assert histogram.percentile(0.99) == 25
+    assert histogram.percentile(1.0) == pytest.approx(3000)
+
+
+def test_install_times_operations_and_statements(tmp_path, instruments):
+    database = create_database(tmp_path)
+    sql_program.execute_sql("UPDATE Regions SET RegionDescription = ? WHERE RegionID > ?;",
+                            database, ['Southern', 1])
+    sql_program.execute_sql("UPDATE Regions SET RegionDescription = ? WHERE RegionID > ?;",
+                            database, ['Central', 2])
+    field_names, rows = sql_program.get_table_data('Regions', database)
+
+    operations = instruments.operations
+    assert operations['execute_sql'].latency.count == 2
+    assert operations['get_table_data'].rows == 3
+    assert operations['get_table_data'].bytes == sql_program.estimate_size(rows)
+
+    update = instruments.statements[
+        "UPDATE Regions SET RegionDescription = ? WHERE RegionID > ?;"]
+    assert update.latency.count == 2 and update.rows == 3
+    assert instruments.statements["COMMIT"].latency.count == 2
+    assert 'get_table_data' in instruments.summary()
+
+
+def test_slow_queries_are_logged(tmp_path, instruments):
+    database = create_database(tmp_path)
+    sql_program.get_table_data('Regions', database)
+
+    with open(instruments.slow_log, encoding='utf-8') as file:
+        lines = file.read().splitlines()
+
+    assert instruments.slow_queries == len(lines) > 0
+    assert lines[-1].endswith(" ms SELECT * FROM Regions;")
+
+
+def test_uninstall_restores_program(instruments):
+    instruments.uninstall()
+
+    assert sql_program.get_table_data.__qualname__ == 'get_table_data'
+    assert sql_program.open_connection.__module__ == 'sql_program'
+    assert sql_program.TableRows.refresh.__qualname__ == 'TableRows.refresh'
@@ -0,0 +1,124 @@
+"""This file tests memory_copy.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import sqlite3
+import time
+
+import pytest
+import memory_copy
+import sql_program
+
+INSERT = "INSERT INTO Regions(RegionID, RegionDescription) VALUES(?, ?);"
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE Regions(RegionID INTEGER PRIMARY KEY, "
+                       "RegionDescription TEXT NOT NULL);")
+    connection.executemany("INSERT INTO Regions VALUES(?, ?);",
+                           [(1, 'Eastern'), (2, 'Western'), (3, 'Northern')])
+    connection.commit()
+    connection.close()
+    return database
+
+
+def count_on_disk(database):
+    connection = sqlite3.connect(database)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM Regions;").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_write_through_flushes_every_write(tmp_path):
+    database = create_database(tmp_path)
+    with memory_copy.MemoryCopy(database) as copy:
+        assert copy.load_seconds is not None
+        with copy.writer() as connection:
+            assert connection.execute("PRAGMA database_list;").fetchone()[2] == ''
+
+        assert sql_program.get_table_data('Regions', copy)[1][0] == (1, 'Eastern')
+        assert copy.flush_seconds == []
+
+        sql_program.execute_sql(INSERT, copy, [4, 'Southern'])
+        assert count_on_disk(database) == 4
+        assert len(copy.flush_seconds) == 1
+
+
+def test_periodic_flushes_in_batches_and_on_close(tmp_path):
+    database = create_database(tmp_path)
+    with memory_copy.MemoryCopy(database, 'periodic', flush_every=2) as copy:
+        sql_program.execute_sql(INSERT, copy, [4, 'Southern'])
+        assert count_on_disk(database) == 3
+
+        sql_program.execute_sql(INSERT, copy, [5, 'Central'])
+        assert count_on_disk(database) == 5
+
+        sql_program.execute_sql(INSERT, copy, [6, 'Outer'])
+        assert count_on_disk(database) == 5
+        assert len(copy.flush_seconds) == 1
+
+    assert count_on_disk(database) == 6
+
+
+def test_failed_writes_are_not_flushed(tmp_path):
+    database = create_database(tmp_path)
+    with memory_copy.MemoryCopy(database, flush_pages=1) as copy:
+        # A duplicate key is rolled back by execute_sql.
+        sql_program.execute_sql(INSERT, copy, [1, 'Again'])
+        assert copy.flush_seconds == []
+        assert copy.flush() == 0.0
+
+        with pytest.raises(sqlite3.IntegrityError):
+            with copy.writer() as connection:
+                connection.execute(INSERT, [7, 'Kept'])
+                connection.execute(INSERT, [7, 'Duplicate'])
+        assert copy.flush_seconds == []
+
+
+def test_periodic_flushes_an_idle_session(tmp_path):
+    database = create_database(tmp_path)
+    with memory_copy.MemoryCopy(database, 'periodic', flush_interval=0.05) as copy:
+        sql_program.execute_sql(INSERT, copy, [4, 'Southern'])
+
+        deadline = time.perf_counter() + 5
+        while count_on_disk(database) == 3 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        assert count_on_disk(database) == 4
+
+
+def test_write_that_raises_is_rolled_back(tmp_path):
+    database = create_database(tmp_path)
+    with memory_copy.MemoryCopy(database) as copy:
+        with pytest.raises(RuntimeError):
+            with copy.writer() as connection:
+                connection.execute(INSERT, [4, 'Southern'])
+                raise RuntimeError("interrupted")
+
+        with copy.writer() as connection:
+            assert not connection.in_transaction
+        assert len(sql_program.get_table_data('Regions', copy)[1]) == 3
+    assert count_on_disk(database) == 3
+
+
+def test_table_switch_is_not_a_write(tmp_path):
+    database = create_database(tmp_path)
+    with memory_copy.MemoryCopy(database, 'periodic') as copy:
+        table_rows = sql_program.TableRows('Regions', copy)
+        sql_program.execute_sql(INSERT, copy, [4, 'Southern'])
+        assert table_rows.refresh() == 1
+        table_rows.close()
+
+        assert copy._pending == 1
+
+
+def test_run_timings_reports_every_size():
+    timings = memory_copy.run_timings([100, 2000], writes=3, flush_every=2)
+
+    assert [timing.rows for timing in timings] == [100, 2000]
+    assert all(timing.load_ms > 0 and timing.flush_ms > 0 for timing in timings)
+    assert timings[1].size_bytes > timings[0].size_bytes
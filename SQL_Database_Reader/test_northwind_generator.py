@@ -0,0 +1,127 @@
+"""This file tests northwind_generator.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import sqlite3
+
+import pytest
+import northwind_generator
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.executescript("""
+        CREATE TABLE Customers(CustomerID TEXT PRIMARY KEY, CompanyName TEXT NOT NULL);
+        CREATE TABLE Products(ProductID INTEGER PRIMARY KEY AUTOINCREMENT, ProductName TEXT,
+                              UnitPrice REAL CHECK (UnitPrice >= 0));
+        CREATE TABLE OrderDetails(OrderID INTEGER NOT NULL REFERENCES Orders(OrderID),
+                                  ProductID INTEGER NOT NULL REFERENCES Products,
+                                  Quantity INTEGER, PRIMARY KEY(OrderID, ProductID));
+        CREATE TABLE Orders(OrderID INTEGER PRIMARY KEY,
+                            CustomerID TEXT REFERENCES Customers(CustomerID), ShipCity TEXT);
+        CREATE INDEX OrderCities ON Orders(ShipCity);
+        INSERT INTO Customers VALUES('ALFKI', 'Alfreds'), ('BONAP', 'Bon app');
+        INSERT INTO Products(ProductName, UnitPrice) VALUES('Chai', 18), ('Chang', 19),
+                                                           ('Tofu', 23.25);
+        INSERT INTO Orders VALUES(10248, 'ALFKI', 'Berlin'), (10249, NULL, 'Lyon'),
+                                 (10250, 'BONAP', 'Marseille');
+        INSERT INTO OrderDetails VALUES(10248, 1, 12), (10248, 2, 10), (10249, 3, 5),
+                                       (10250, 1, 9);
+    """)
+    connection.close()
+    return database
+
+
+def fetch(database, sql):
+    connection = sqlite3.connect(database)
+    rows = connection.execute(sql).fetchall()
+    connection.close()
+    return rows
+
+
+def test_load_order_puts_parents_first():
+    foreign_keys = {'OrderDetails': {'OrderID': ('Orders', 'OrderID')},
+                    'Orders': {'CustomerID': ('Customers', 'CustomerID')},
+                    'Customers': {}}
+
+    assert northwind_generator.load_order(['OrderDetails', 'Orders', 'Customers'],
+                                          foreign_keys) == ['Customers', 'Orders', 'OrderDetails']
+
+
+def test_generate_database_scales_every_table(tmp_path):
+    database = create_database(tmp_path)
+    target = str(tmp_path / "target.db")
+    results = northwind_generator.generate_database(database, target, 10, batch_size=7)
+
+    assert [name for name, _, _, _ in results] == ['Customers', 'Products', 'Orders',
+                                                   'OrderDetails']
+    assert [(written, dropped) for _, written, dropped, _ in results] == [
+        (20, 0), (30, 0), (30, 0), (40, 0)]
+    assert fetch(target, "SELECT CustomerID FROM Customers WHERE rowid IN (1, 3, 20);") == [
+        ('ALFKI',), ('ALFKI1',), ('BONAP9',)]
+    assert fetch(target, "SELECT MIN(OrderID), MAX(OrderID) FROM Orders;") == [(1, 30)]
+    assert fetch(target, "SELECT name FROM sqlite_master WHERE type = 'index' "
+                         "AND sql IS NOT NULL;") == [('OrderCities',)]
+
+
+def test_generate_database_keeps_keys_consistent(tmp_path):
+    database = create_database(tmp_path)
+    target = str(tmp_path / "target.db")
+    northwind_generator.generate_database(database, target, 25, seed=3)
+
+    assert fetch(target, "PRAGMA foreign_key_check;") == []
+    assert fetch(target, "PRAGMA integrity_check;") == [('ok',)]
+    assert fetch(target, "SELECT COUNT(*) FROM Orders WHERE CustomerID IS NULL;") == [(25,)]
+
+
+def test_generate_database_makes_suffixed_keys_unique(tmp_path):
+    source = str(tmp_path / "source.db")
+    connection = sqlite3.connect(source)
+    connection.execute("CREATE TABLE Codes(Code TEXT PRIMARY KEY);")
+    connection.executemany("INSERT INTO Codes VALUES(?);", [('A',), ('A1',), ('A11',)])
+    connection.commit()
+    connection.close()
+    target = str(tmp_path / "target.db")
+    northwind_generator.generate_database(source, target, 12)
+
+    codes = [code for code, in fetch(target, "SELECT Code FROM Codes;")]
+    assert len(codes) == len(set(codes)) == 36
+    assert fetch(target, "SELECT Code FROM Codes WHERE rowid IN (4, 5);") == [('A2',), ('A12',)]
+
+
+def test_generate_database_reports_dropped_rows(tmp_path):
+    source = str(tmp_path / "source.db")
+    connection = sqlite3.connect(source)
+    connection.executescript("""
+        CREATE TABLE Regions(RegionID INTEGER PRIMARY KEY);
+        CREATE TABLE RegionNotes(RegionID INTEGER PRIMARY KEY REFERENCES Regions);
+        INSERT INTO Regions VALUES(1);
+        INSERT INTO RegionNotes VALUES(1), (2), (3);
+    """)
+    connection.close()
+    target = str(tmp_path / "target.db")
+    results = northwind_generator.generate_database(source, target, 2)
+
+    # Only two region keys exist for six notes.
+    assert [result[:3] for result in results] == [('Regions', 2, 0), ('RegionNotes', 2, 4)]
+    assert fetch(target, "SELECT RegionID FROM RegionNotes ORDER BY RegionID;") == [(1,), (2,)]
+
+
+def test_generate_database_is_repeatable(tmp_path):
+    database = create_database(tmp_path)
+    first = str(tmp_path / "first.db")
+    second = str(tmp_path / "second.db")
+    northwind_generator.generate_database(database, first, 3, seed=7)
+    northwind_generator.generate_database(database, second, 3, seed=7)
+
+    sql = "SELECT * FROM OrderDetails ORDER BY rowid;"
+    assert fetch(first, sql) == fetch(second, sql)
+
+
+def test_generate_database_raises_if_target_exists(tmp_path):
+    database = create_database(tmp_path)
+    with pytest.raises(AssertionError):
+        northwind_generator.generate_database(database, database, 2)
@@ -0,0 +1,73 @@
+"""This file tests pager.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import sqlite3
+
+import pytest
+import pager
+import sql_program
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE Orders(OrderID INTEGER PRIMARY KEY, ShipName TEXT, "
+                       "ShipCountry TEXT);")
+    connection.executemany("INSERT INTO Orders VALUES(?, ?, ?);",
+                           [(10000 + num, f"Ship {num}", 'France') for num in range(95)])
+    connection.execute("CREATE TABLE Codes(Code TEXT PRIMARY KEY, Name TEXT) WITHOUT ROWID;")
+    connection.executemany("INSERT INTO Codes VALUES(?, ?);",
+                           [(f"C{num:02}", f"Name {num}") for num in range(25)])
+    connection.commit()
+    connection.close()
+    return database
+
+
+def test_rows_are_read_a_page_at_a_time(tmp_path):
+    database = create_database(tmp_path)
+    source = pager.PageSource('Orders', database, page_size=10, cache_pages=2)
+
+    assert source.count == 95
+    assert [row[0] for row in source.rows(8, 4)] == [10008, 10009, 10010, 10011]
+    assert source.misses == 2
+    assert [row[0] for row in source.rows(90, 10)] == [10090, 10091, 10092, 10093, 10094]
+    assert source.rows(120, 5) == []
+
+
+def test_scrolling_back_is_served_from_the_cache(tmp_path):
+    database = create_database(tmp_path)
+    source = pager.PageSource('Orders', database, page_size=10, cache_pages=2)
+    source.rows(0, 10)
+    source.rows(10, 10)
+    source.rows(0, 10)
+    assert (source.hits, source.misses) == (1, 2)
+
+    # A third page pushes out the page used least recently.
+    source.rows(20, 10)
+    source.rows(10, 10)
+    assert (source.hits, source.misses) == (1, 4)
+
+
+def test_jump_seeks_without_rowid(tmp_path):
+    database = create_database(tmp_path)
+    with sql_program.ConnectionManager(database, read_only=True) as manager:
+        source = pager.PageSource('Codes', manager, page_size=10)
+
+        assert source.rows(21, 2) == [('C21', 'Name 21'), ('C22', 'Name 22')]
+        assert source.misses == 1
+        assert source.rows(0, 1) == [('C00', 'Name 0')]
+
+
+def test_render_fits_visible_columns(tmp_path):
+    database = create_database(tmp_path)
+    source = pager.PageSource('Orders', database)
+    widths = sql_program.plan_column_widths('Orders', database, source.field_names)
+
+    lines = pager.render(source.field_names, source.rows(40, 2), widths, 40, 1, 40)
+    assert lines == ['Row # | ShipName     ShipCountry     ',
+                     '41    | Ship 40      France          ',
+                     '42    | Ship 41      France          ']
+    assert list(pager.visible_columns(widths, 0, 10, 8)) == [0]
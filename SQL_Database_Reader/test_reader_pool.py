@@ -0,0 +1,73 @@
+"""This file tests reader_pool.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import sqlite3
+import threading
+
+import pytest
+import reader_pool
+import sql_program
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE Regions(RegionID INTEGER PRIMARY KEY, "
+                       "RegionDescription TEXT NOT NULL);")
+    connection.execute("CREATE TABLE Orders(OrderID INTEGER PRIMARY KEY, ShipCountry TEXT);")
+    connection.executemany("INSERT INTO Regions VALUES(?, ?);",
+                           [(1, 'Eastern'), (2, 'Western'), (3, 'Northern')])
+    connection.executemany("INSERT INTO Orders VALUES(?, ?);",
+                           [(num, 'France') for num in range(1, 251)])
+    connection.commit()
+    connection.close()
+    return database
+
+
+def test_views_are_read_on_reader_threads(tmp_path):
+    database = create_database(tmp_path)
+    with reader_pool.ReaderPool(database, readers=2) as pool:
+        names = pool.submit(lambda manager: threading.current_thread().name).result()
+        pages = pool.views(['Regions', 'Orders'], page_size=100)
+
+        assert names.startswith('reader')
+        assert pages['Regions'] == [(1, 'Eastern'), (2, 'Western'), (3, 'Northern')]
+        assert len(pages['Orders']) == 100
+        rows, key = pool.view('Orders', (100,), 100).result()
+        assert rows[0] == (101, 'France') and key == (200,)
+
+
+def test_pool_connections_cannot_write(tmp_path):
+    database = create_database(tmp_path)
+    with reader_pool.ReaderPool(database, readers=1) as pool:
+        def delete(manager):
+            with manager.reader() as connection:
+                connection.execute("DELETE FROM Regions;")
+
+        future = pool.submit(delete)
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            future.result()
+
+    assert len(sql_program.get_table_data('Regions', database)[1]) == 3
+
+
+def test_measure_readers_reads_while_writing(tmp_path):
+    database = create_database(tmp_path)
+    result = reader_pool.measure_readers(database, 2, 0.2, 'Orders', 'read-heavy')
+
+    assert result.readers == 2 and result.busy == 0
+    assert result.rows > 0 and result.pages > 0 and result.writes > 0
+    with sqlite3.connect(database) as connection:
+        count = connection.execute("SELECT COUNT(*) FROM BenchmarkWrites;").fetchone()[0]
+    assert count == result.writes
+
+
+def test_immutable_snapshot_is_read_without_a_writer(tmp_path):
+    database = create_database(tmp_path)
+    results = reader_pool.run_benchmark(database, [1, 3], 0.1, 'Orders', immutable=True)
+
+    assert [result.readers for result in results] == [1, 3]
+    assert all(result.rows > 0 and result.writes == 0 for result in results)
@@ -0,0 +1,103 @@
+"""This file tests snapshot.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import gzip
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+import snapshot
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE Orders(OrderID INTEGER PRIMARY KEY, ShipName TEXT);")
+    connection.executemany("INSERT INTO Orders VALUES(?, ?);",
+                           [(num, 'Ship ' * 50) for num in range(2000)])
+    connection.commit()
+    connection.close()
+    return database
+
+
+def count_rows(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM Orders;").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_snapshot_copies_in_steps_with_progress(tmp_path):
+    database = create_database(tmp_path)
+    steps = []
+    report = snapshot.take_snapshot(database, str(tmp_path / "snapshots"), pages=10, sleep=0,
+                                    progress=lambda copied, total: steps.append(copied))
+
+    assert count_rows(report.path) == 2000
+    assert report.pages == steps[-1] and len(steps) == -(-report.pages // 10)
+    assert report.bytes == os.path.getsize(database) and report.restarts == 0
+    assert os.listdir(tmp_path / "snapshots") == [os.path.basename(report.path)]
+
+
+def test_compressed_snapshot_is_the_database(tmp_path):
+    database = create_database(tmp_path)
+    report = snapshot.take_snapshot(database, str(tmp_path), compress=True)
+
+    assert report.path.endswith('.db.gz') and report.bytes < os.path.getsize(database)
+    restored = str(tmp_path / "restored.db")
+    with gzip.open(report.path, 'rb') as packed, open(restored, 'wb') as file:
+        file.write(packed.read())
+    assert count_rows(restored) == 2000
+
+
+def test_snapshot_is_consistent_while_writing(tmp_path):
+    database = create_database(tmp_path)
+    done = threading.Event()
+
+    def write():
+        connection = sqlite3.connect(database, timeout=10)
+        num = 2000
+        while not done.is_set():
+            with connection:
+                connection.execute("INSERT INTO Orders VALUES(?, 'Late');", [num])
+            num += 1
+        connection.close()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        report = snapshot.take_snapshot(database, str(tmp_path / "snapshots"), pages=5,
+                                        sleep=0.001)
+    finally:
+        done.set()
+        writer.join()
+
+    connection = sqlite3.connect(report.path)
+    assert connection.execute("PRAGMA integrity_check;").fetchone()[0] == 'ok'
+    ids = [row[0] for row in connection.execute("SELECT OrderID FROM Orders ORDER BY OrderID;")]
+    connection.close()
+    assert ids == list(range(len(ids))) and len(ids) >= 2000
+
+
+def test_retention_keeps_the_newest(tmp_path):
+    database = create_database(tmp_path)
+    directory = str(tmp_path)
+    paths = [snapshot.take_snapshot(database, directory, compress=num % 2 == 1).path
+             for num in range(4)]
+    open(os.path.join(directory, "Other_20260101_000000.db"), 'w').close()
+
+    assert snapshot.list_snapshots(database, directory) == paths
+    assert snapshot.apply_retention(database, directory, keep=2) == paths[:2]
+    assert snapshot.list_snapshots(database, directory) == paths[2:]
+
+    os.utime(paths[2], (0, 0))
+    assert snapshot.apply_retention(database, directory, keep=1, max_age_days=1) == [paths[2]]
+    assert snapshot.apply_retention(database, directory, keep=1, max_age_days=1,
+                                    now=time.time() + 2 * 86400) == []
+    assert len(os.listdir(directory)) == 3
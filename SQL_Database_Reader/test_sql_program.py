@@ -4,11 +4,13 @@ Run "pytest -vv" in the current directory to run these tests.
 
 Run "coverage run -m pytest test_sql_program.py" and "coverage report" to display coverage.
 
-pytest:      31 passed in 0.xx seconds
+pytest:      81 passed in 0.xx seconds
 coverage:    100% coverage
 """
+import io
 import os
 import sqlite3
+import threading
 from urllib.request import pathname2url
 import pytest
 import sql_program
@@ -401,3 +403,753 @@ def test_delete_record_goes_back_with_enter(capsys):
                             "RegionDescription     \n\n1     |   1          "
                             '  Eastern               \n2     |   2            Western               \n3     '
                             "|   3            Northern              \n\n\nRow number: \nGoing back...\n\n")
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=CONNECTION MANAGER=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_connection_manager_raises_with_invalid_db():
+    with pytest.raises(Exception):
+        sql_program.ConnectionManager("invalid_name")
+
+
+def test_connection_manager_reuses_connection():
+    try:
+        create_table_queries()
+        insert_queries()
+
+        with sql_program.ConnectionManager(DATABASE) as manager:
+            with manager.reader() as first, manager.writer() as second:
+                assert first is second
+
+            assert sql_program.get_tables(manager) == ['Regions', 'Categories',
+                                                       'EmployeesTerritories']
+            sql = "INSERT INTO Regions(RegionID, RegionDescription) VALUES(?,?);"
+            sql_program.execute_sql(sql, manager, [4, 'Southern'])
+
+            data = sql_program.get_table_data('Regions', manager)
+            assert data[1][-1] == (4, 'Southern')
+
+        assert execute_sql("SELECT COUNT(*) FROM Regions;", True) == [(4,)]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_connection_manager_pools_readers_for_other_threads():
+    try:
+        create_table_queries()
+        insert_queries()
+        results = []
+
+        with sql_program.ConnectionManager(DATABASE, pool_size=1) as manager:
+            def read():
+                with manager.reader() as connection:
+                    results.append(connection)
+                results.append(sql_program.get_table_data('Regions', manager)[1])
+
+            for _ in range(2):
+                thread = threading.Thread(target=read)
+                thread.start()
+                thread.join()
+
+            with manager.writer() as primary:
+                assert results[0] is results[2]
+                assert results[0] is not primary
+            assert results[1] == [(1, 'Eastern'), (2, 'Western'), (3, 'Northern')]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_connection_manager_raises_when_closed():
+    try:
+        create_table_queries()
+
+        manager = sql_program.ConnectionManager(DATABASE)
+        manager.close()
+        manager.close()
+
+        with pytest.raises(sqlite3.ProgrammingError):
+            sql_program.get_tables(manager)
+    finally:
+        os.remove(DATABASE)
+
+
+def test_connection_manager_read_only_rejects_writes():
+    try:
+        create_table_queries()
+        insert_queries()
+
+        with sql_program.ConnectionManager(DATABASE, read_only=True) as manager:
+            assert sql_program.get_table_data('Regions', manager)[1][0] == (1, 'Eastern')
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                with manager.writer() as connection:
+                    connection.execute("DELETE FROM Regions;")
+
+        with sql_program.ConnectionManager(DATABASE, read_only=True, immutable=True) as manager:
+            assert manager.data_version() == (0, 0, 0)
+            assert len(sql_program.get_table_page('Regions', manager)[0]) == 3
+
+        with pytest.raises(AssertionError):
+            sql_program.ConnectionManager(DATABASE, immutable=True)
+    finally:
+        os.remove(DATABASE)
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=TABLE PAGES=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_get_table_page_returns_page_and_key():
+    try:
+        create_table_queries()
+        insert_queries()
+
+        rows, key = sql_program.get_table_page('Regions', DATABASE, page_size=2)
+        assert rows == [(1, 'Eastern'), (2, 'Western')]
+
+        rows, key = sql_program.get_table_page('Regions', DATABASE, key, 2)
+        assert rows == [(3, 'Northern')]
+
+        assert sql_program.get_table_page('Regions', DATABASE, key, 2) == [[], None]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_iter_table_pages_yields_every_row():
+    try:
+        create_table_queries()
+        insert_queries()
+
+        with sql_program.ConnectionManager(DATABASE) as manager:
+            pages = list(sql_program.iter_table_pages('Regions', manager, 1))
+            assert pages == [[(1, 'Eastern')], [(2, 'Western')], [(3, 'Northern')]]
+
+            pages = list(sql_program.iter_table_pages('Regions', manager, 3))
+            assert pages == [[(1, 'Eastern'), (2, 'Western'), (3, 'Northern')]]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_iter_table_pages_uses_primary_key_without_rowid():
+    try:
+        execute_sql("CREATE TABLE Pairs(A INT, B TEXT, PRIMARY KEY(A, B)) WITHOUT ROWID;",
+                    False)
+        execute_sql("INSERT INTO Pairs VALUES(2, 'a'), (1, 'b'), (1, 'a');", False)
+
+        pages = list(sql_program.iter_table_pages('Pairs', DATABASE, 2))
+        assert pages == [[(1, 'a'), (1, 'b')], [(2, 'a')]]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_get_field_names_returns_names():
+    try:
+        create_table_queries()
+
+        assert sql_program.get_field_names('Regions', DATABASE) == FIELD_NAMES
+    finally:
+        os.remove(DATABASE)
+
+
+def test_get_table_page_raises_with_invalid_table_name():
+    try:
+        create_table_queries()
+
+        with pytest.raises(sqlite3.OperationalError):
+            sql_program.get_table_page('invalid_name', DATABASE)
+    finally:
+        os.remove(DATABASE)
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=PLAN COLUMN WIDTHS=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_plan_column_widths_measures_every_row():
+    try:
+        create_table_queries()
+        insert_queries()
+        execute_sql("INSERT INTO Regions(RegionID, RegionDescription) "
+                    "VALUES(1000, 'North Eastern Seaboard');", False)
+
+        widths = sql_program.plan_column_widths('Regions', DATABASE, FIELD_NAMES)
+        assert widths == [8, 22]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_plan_column_widths_samples_and_caps():
+    try:
+        create_table_queries()
+        insert_queries()
+        execute_sql("INSERT INTO Regions(RegionID, RegionDescription) "
+                    "VALUES(1000, 'North Eastern Seaboard');", False)
+
+        widths = sql_program.plan_column_widths('Regions', DATABASE, FIELD_NAMES, 3)
+        assert widths == [8, 17]
+
+        widths = sql_program.plan_column_widths('Regions', DATABASE, FIELD_NAMES, cap=5)
+        assert widths == [5, 5]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_plan_column_widths_measures_null_as_none():
+    try:
+        execute_sql("CREATE TABLE Notes(N TEXT);", False)
+        execute_sql("INSERT INTO Notes VALUES(NULL);", False)
+
+        assert sql_program.plan_column_widths('Notes', DATABASE, ['N']) == [4]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_display_table_uses_planned_widths(capsys):
+    sql_program.display_table("Regions", ROWS, FIELD_NAMES, [3, 4])
+    captured = capsys.readouterr()
+    assert captured.out == ('\nTable: Regions\n\nRow # |   Reg     Regi     \n\n1     '
+                            '|   1       East     \n2     |   2       West     \n3     '
+                            '|   3       Nort     \n\n\n')
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=ROW FORMAT=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_compile_row_format_matches_format_row():
+    row_format = sql_program.compile_row_format([8, 17])
+    assert row_format.format(None, '1', 'Eastern') == sql_program.format_row(['1', 'Eastern'],
+                                                                             [8, 17])
+
+
+def test_compile_row_format_truncates():
+    row_format = sql_program.compile_row_format([2, 4], '{0}: ', True)
+    assert row_format.format(7, 100, None) == '7: 10     None     '
+
+
+def test_write_rows_writes_once_per_batch():
+    writes = []
+
+    class Sink:
+        def write(self, text):
+            writes.append(text)
+
+    row_format = sql_program.compile_row_format([1, 8], '{0} ')
+    count = sql_program.write_rows(ROWS, row_format, Sink(), batch_size=2)
+
+    assert count == 3
+    assert writes == ['1 1     Eastern      \n2 2     Western      \n',
+                      '3 3     Northern     \n']
+
+
+def test_display_table_writes_to_sink(capsys):
+    sink = io.StringIO()
+    sql_program.display_table("Regions", ROWS, FIELD_NAMES, sink=sink)
+
+    assert capsys.readouterr().out == ''
+    assert sink.getvalue().startswith('\nTable: Regions\n\nRow # |   RegionID')
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=SCHEMA CATALOG=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_get_tables_leaves_out_internal_tables():
+    try:
+        create_table_queries()
+        execute_sql("CREATE TABLE Shippers(ShipperID INTEGER PRIMARY KEY AUTOINCREMENT);", False)
+        execute_sql("INSERT INTO Shippers DEFAULT VALUES;", False)
+
+        tables = sql_program.get_tables(DATABASE)
+        assert tables == ['Regions', 'Categories', 'EmployeesTerritories', 'Shippers']
+    finally:
+        os.remove(DATABASE)
+
+
+def test_schema_catalog_reads_keys_and_indexes():
+    try:
+        execute_sql("CREATE TABLE OrderDetails(OrderID INT, ProductID INT, Quantity INT, "
+                    "PRIMARY KEY(ProductID, OrderID));", False)
+        execute_sql("CREATE INDEX Quantities ON OrderDetails(Quantity);", False)
+
+        with sql_program.ConnectionManager(DATABASE) as manager:
+            with manager.reader() as connection:
+                table = manager.catalog.refresh(connection).table('OrderDetails')
+
+        assert table.columns == ['OrderID', 'ProductID', 'Quantity']
+        assert table.types == ['INT', 'INT', 'INT']
+        assert table.primary_key == ['ProductID', 'OrderID']
+        assert table.page_key == ['rowid']
+        assert [(index.name, index.origin, index.columns) for index in table.indexes] == [
+            ('Quantities', 'c', ['Quantity']),
+            ('sqlite_autoindex_OrderDetails_1', 'pk', ['ProductID', 'OrderID'])]
+        assert table.indexes[0].sql == "CREATE INDEX Quantities ON OrderDetails(Quantity)"
+    finally:
+        os.remove(DATABASE)
+
+
+def test_schema_catalog_reloads_only_when_schema_changes():
+    try:
+        create_table_queries()
+
+        with sql_program.ConnectionManager(DATABASE) as manager:
+            sql_program.get_tables(manager)
+            tables = manager.catalog.tables
+
+            sql_program.execute_sql("INSERT INTO Regions VALUES(1, 'Eastern');", manager, None)
+            sql_program.get_tables(manager)
+            assert manager.catalog.tables is tables
+
+            execute_sql("DROP TABLE Categories;", False)
+            assert sql_program.get_tables(manager) == ['Regions', 'EmployeesTerritories']
+    finally:
+        os.remove(DATABASE)
+
+
+def test_schema_catalog_raises_with_invalid_table_name():
+    with pytest.raises(sqlite3.OperationalError):
+        sql_program.SchemaCatalog().table('invalid_name')
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=TABLE ROWS=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_table_rows_patches_only_changed_rows():
+    try:
+        create_table_queries()
+        insert_queries()
+
+        with sql_program.ConnectionManager(DATABASE) as manager:
+            table_rows = sql_program.TableRows('Regions', manager, None)
+            assert table_rows.refresh() == 0
+
+            sql = "INSERT INTO Regions(RegionID, RegionDescription) VALUES(?,?);"
+            sql_program.execute_sql(sql, manager, [4, 'Southern'])
+            sql = "UPDATE Regions SET RegionDescription = ? WHERE RegionID = ?;"
+            sql_program.execute_sql(sql, manager, ['Timbuktu', 1])
+            sql = "DELETE FROM Regions WHERE RegionID = ?;"
+            sql_program.execute_sql(sql, manager, [2])
+
+            assert table_rows.refresh() == 3
+            assert table_rows.rows == [(1, 'Timbuktu'), (3, 'Northern'), (4, 'Southern')]
+
+            table_rows.close()
+            with manager.writer() as connection:
+                triggers = connection.execute(
+                    "SELECT name FROM sqlite_temp_master WHERE type='trigger';").fetchall()
+            assert triggers == []
+    finally:
+        os.remove(DATABASE)
+
+
+def test_table_rows_reloads_after_write_from_another_connection():
+    try:
+        create_table_queries()
+        insert_queries()
+
+        with sql_program.ConnectionManager(DATABASE) as manager:
+            table_rows = sql_program.TableRows('Regions', manager, None)
+
+            execute_sql("DELETE FROM Regions WHERE RegionID = 3;", False)
+
+            assert table_rows.refresh() == 2
+            assert table_rows.rows == [(1, 'Eastern'), (2, 'Western')]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_table_rows_keeps_to_its_page():
+    try:
+        create_table_queries()
+        insert_queries()
+
+        with sql_program.ConnectionManager(DATABASE) as manager:
+            table_rows = sql_program.TableRows('Regions', manager, 2)
+            assert table_rows.rows == [(1, 'Eastern'), (2, 'Western')]
+
+            sql = "INSERT INTO Regions(RegionID, RegionDescription) VALUES(?,?);"
+            sql_program.execute_sql(sql, manager, [4, 'Southern'])
+            assert table_rows.refresh() == 0
+
+            assert table_rows.next_page() == [(3, 'Northern'), (4, 'Southern')]
+            assert table_rows.next_page() == [(1, 'Eastern'), (2, 'Western')]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_table_rows_keeps_its_end_after_a_delete():
+    try:
+        create_table_queries()
+        insert_queries()
+        execute_sql("INSERT INTO Regions(RegionID, RegionDescription) VALUES(4, 'Southern');",
+                    False)
+        execute_sql("INSERT INTO Regions(RegionID, RegionDescription) VALUES(5, 'Central');",
+                    False)
+
+        with sql_program.ConnectionManager(DATABASE) as manager:
+            table_rows = sql_program.TableRows('Regions', manager, 2)
+            assert table_rows.next_page() == [(3, 'Northern'), (4, 'Southern')]
+
+            sql_program.execute_sql("DELETE FROM Regions WHERE RegionID = ?;", manager, [3])
+            sql = "INSERT INTO Regions(RegionID, RegionDescription) VALUES(?,?);"
+            sql_program.execute_sql(sql, manager, [100, 'Polar'])
+            assert table_rows.refresh() == 1
+
+            assert table_rows.rows == [(4, 'Southern')]
+            assert table_rows.next_page() == [(5, 'Central'), (100, 'Polar')]
+            assert table_rows.next_page() == [(1, 'Eastern'), (2, 'Western')]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_table_rows_reloads_without_manager():
+    try:
+        create_table_queries()
+        insert_queries()
+
+        table_rows = sql_program.TableRows('Regions', DATABASE)
+        execute_sql("DELETE FROM Regions WHERE RegionID = 1;", False)
+
+        assert table_rows.refresh() == 2
+        assert table_rows.rows == [(2, 'Western'), (3, 'Northern')]
+        table_rows.close()
+    finally:
+        os.remove(DATABASE)
+
+
+def test_track_changes_quotes_table_name():
+    connection = sqlite3.connect(":memory:")
+    selected_table = 'Bob\'s "Notes"'
+    insert_sql = 'INSERT INTO "Bob\'s ""Notes"""(Note) VALUES(?);'
+    connection.execute('CREATE TABLE "Bob\'s ""Notes"""(Note TEXT);')
+
+    sql_program.track_changes(selected_table, connection)
+    connection.execute(insert_sql, ['first'])
+    rows = connection.execute("SELECT table_name, row_id FROM temp.changelog;").fetchall()
+    assert rows == [(selected_table, 1)]
+
+    # The insert's transaction is still open, so it is left uncommitted.
+    sql_program.untrack_changes(selected_table, connection)
+    assert connection.in_transaction
+    connection.commit()
+
+    connection.execute(insert_sql, ['second'])
+    assert connection.execute("SELECT COUNT(*) FROM temp.changelog;").fetchone() == (0,)
+    connection.close()
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=RESULT CACHE=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_result_cache_serves_repeat_reads():
+    try:
+        create_table_queries()
+        insert_queries()
+
+        with sql_program.ConnectionManager(DATABASE) as manager:
+            first = sql_program.get_table_data('Regions', manager)
+            second = sql_program.get_table_data('Regions', manager)
+
+            assert first == second == [FIELD_NAMES, [(1, 'Eastern'), (2, 'Western'),
+                                                     (3, 'Northern')]]
+            stats = manager.results.stats()
+            assert (stats['entries'], stats['hits'], stats['misses']) == (1, 1, 1)
+    finally:
+        os.remove(DATABASE)
+
+
+def test_result_cache_invalidates_on_any_write():
+    try:
+        create_table_queries()
+        insert_queries()
+
+        with sql_program.ConnectionManager(DATABASE) as manager:
+            sql_program.get_table_data('Regions', manager)
+
+            sql = "DELETE FROM Regions WHERE RegionID = ?;"
+            sql_program.execute_sql(sql, manager, [1])
+            assert sql_program.get_table_data('Regions', manager)[1] == [(2, 'Western'),
+                                                                          (3, 'Northern')]
+
+            execute_sql("DELETE FROM Regions WHERE RegionID = 2;", False)
+            assert sql_program.get_table_data('Regions', manager)[1] == [(3, 'Northern')]
+
+            stats = manager.results.stats()
+            assert (stats['hits'], stats['misses'], stats['invalidations']) == (0, 3, 2)
+    finally:
+        os.remove(DATABASE)
+
+
+def test_result_cache_off_reads_no_version():
+    try:
+        create_table_queries()
+        insert_queries()
+
+        with sql_program.ConnectionManager(DATABASE, cache_budget=0) as manager:
+            manager.data_version = None
+            assert len(sql_program.get_table_data('Regions', manager)[1]) == 3
+            assert manager.results.stats()['misses'] == 0
+    finally:
+        os.remove(DATABASE)
+
+
+def test_result_cache_reads_version_on_reader_connection():
+    try:
+        create_table_queries()
+        insert_queries()
+        results = []
+
+        with sql_program.ConnectionManager(DATABASE, pool_size=1) as manager:
+            def read():
+                for _ in range(2):
+                    results.append(sql_program.get_table_data('Regions', manager)[1])
+
+            # The primary connection stays locked while the other thread reads.
+            with manager.writer():
+                thread = threading.Thread(target=read)
+                thread.start()
+                thread.join(timeout=5)
+                assert not thread.is_alive()
+
+            assert results[0] == results[1] == [(1, 'Eastern'), (2, 'Western'),
+                                                (3, 'Northern')]
+            stats = manager.results.stats()
+            assert (stats['hits'], stats['misses']) == (1, 1)
+    finally:
+        os.remove(DATABASE)
+
+
+def test_result_cache_evicts_least_recently_used():
+    result = [(num, 'x' * 100) for num in range(4)]
+    size = sql_program.estimate_size(result)
+    results = sql_program.ResultCache(budget=size * 2)
+
+    results.put('a', 1, result)
+    results.put('b', 1, result)
+    assert results.get('a', 1) is result
+    results.put('c', 1, result)
+
+    assert results.get('b', 1) is None
+    assert results.get('a', 1) is result
+    assert results.stats() == {'entries': 2, 'bytes': size * 2, 'hits': 2, 'misses': 1,
+                               'evictions': 1, 'invalidations': 0}
+
+
+def test_result_cache_skips_results_over_budget():
+    results = sql_program.ResultCache(budget=10)
+    results.put('a', 1, [1, 2, 3])
+
+    assert results.get('a', 1) is None
+    assert results.stats()['bytes'] == 0
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=KEYED STATEMENTS=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def create_order_details():
+    execute_sql("CREATE TABLE OrderDetails(OrderID INT, ProductID INT, Quantity INT NOT NULL, "
+                "PRIMARY KEY(OrderID, ProductID));", False)
+    execute_sql("INSERT INTO OrderDetails VALUES(1, 1, 5), (1, 2, 6), (2, 1, 7);", False)
+
+
+def test_update_sql_uses_primary_key_and_parameters():
+    try:
+        create_order_details()
+
+        key = sql_program.get_key_columns('OrderDetails', DATABASE)
+        assert key == ['OrderID', 'ProductID']
+        assert sql_program.update_sql('OrderDetails', ['Quantity'], key) == (
+            'UPDATE OrderDetails SET "Quantity" = ? WHERE "OrderID" IS ? AND "ProductID" IS ?;')
+        assert sql_program.delete_sql('OrderDetails', key) == (
+            'DELETE FROM OrderDetails WHERE "OrderID" IS ? AND "ProductID" IS ?;')
+    finally:
+        os.remove(DATABASE)
+
+
+def test_get_key_columns_uses_rowid_without_primary_key():
+    try:
+        execute_sql("CREATE TABLE Notes(Author TEXT, Note TEXT);", False)
+
+        assert sql_program.get_key_columns('Notes', DATABASE) == ['rowid']
+    finally:
+        os.remove(DATABASE)
+
+
+def test_delete_records_deletes_one_of_two_duplicate_rows():
+    try:
+        execute_sql("CREATE TABLE Notes(Author TEXT, Note TEXT);", False)
+        execute_sql("INSERT INTO Notes VALUES('Ann', 'Hi'), ('Ann', 'Hi'), ('Bob', NULL);", False)
+        field_names = ['Author', 'Note']
+
+        assert sql_program.delete_records(DATABASE, 'Notes', field_names, [('Ann', 'Hi')]) == 1
+        assert sql_program.update_records(DATABASE, 'Notes', field_names, 'Note',
+                                          [(('Bob', None), 'Yo'), (('Cy', 'Gone'), 'No')]) == 1
+        assert execute_sql("SELECT * FROM Notes ORDER BY rowid;", True) == [
+            ('Ann', 'Hi'), ('Bob', 'Yo')]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_update_record_changes_only_the_chosen_row_of_composite_key():
+    try:
+        create_order_details()
+        field_names = ['OrderID', 'ProductID', 'Quantity']
+        rows = [(1, 1, 5), (1, 2, 6), (2, 1, 7)]
+
+        input_values = ["3", "2", "9", "y"]
+
+        def input():
+            return input_values.pop(0)
+
+        sql_program.input = input
+        sql_program.update_record(DATABASE, "OrderDetails", field_names, rows)
+
+        sql_results = execute_sql("SELECT * FROM OrderDetails;", True)
+        assert sql_results == [(1, 1, 5), (1, 2, 9), (2, 1, 7)]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_update_record_binds_quotes_and_several_rows():
+    try:
+        create_table_queries()
+        insert_queries()
+
+        input_values = ["2", "1,3", "O'Hare", "y"]
+
+        def input():
+            return input_values.pop(0)
+
+        sql_program.input = input
+        sql_program.update_record(DATABASE, "Regions", FIELD_NAMES, ROWS)
+
+        sql_results = execute_sql("SELECT * FROM Regions;", True)
+        assert sql_results == [(1, "O'Hare"), (2, 'Western'), (3, "O'Hare")]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_delete_record_deletes_several_rows():
+    try:
+        create_order_details()
+        field_names = ['OrderID', 'ProductID', 'Quantity']
+        rows = [(1, 1, 5), (1, 2, 6), (2, 1, 7)]
+
+        input_values = ["1, 3", "y"]
+
+        def input():
+            return input_values.pop(0)
+
+        sql_program.input = input
+        sql_program.delete_record(DATABASE, "OrderDetails", field_names, rows)
+
+        assert execute_sql("SELECT * FROM OrderDetails;", True) == [(1, 2, 6)]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_update_records_rolls_back_whole_batch(capsys):
+    try:
+        create_order_details()
+        field_names = ['OrderID', 'ProductID', 'Quantity']
+        changes = [((1, 1, 5), 50), ((1, 2, 6), None)]
+
+        changed = sql_program.update_records(DATABASE, 'OrderDetails', field_names,
+                                             'Quantity', changes)
+
+        assert changed == 0
+        assert 'NOT NULL constraint failed' in capsys.readouterr().out
+        assert execute_sql("SELECT Quantity FROM OrderDetails;", True) == [(5,), (6,), (7,)]
+    finally:
+        os.remove(DATABASE)
+
+
+def test_parse_row_numbers_rejects_out_of_range():
+    assert sql_program.parse_row_numbers("3, 1", ROWS) == [2, 0]
+
+    for raw_input in ["0", "4", "1,x"]:
+        with pytest.raises(ValueError):
+            sql_program.parse_row_numbers(raw_input, ROWS)
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=PROFILES=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_connection_manager_applies_profile():
+    try:
+        create_table_queries()
+        readers = []
+
+        with sql_program.ConnectionManager(DATABASE, profile='read-heavy') as manager:
+            with manager.writer() as connection:
+                assert connection.execute("PRAGMA journal_mode;").fetchone() == ('wal',)
+                assert connection.execute("PRAGMA synchronous;").fetchone() == (1,)
+                assert connection.execute("PRAGMA cache_size;").fetchone() == (-64000,)
+                assert connection.execute("PRAGMA temp_store;").fetchone() == (2,)
+
+            def read():
+                with manager.reader() as connection:
+                    readers.append(connection.execute("PRAGMA cache_size;").fetchone())
+
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join()
+
+        assert readers == [(-64000,)]
+    finally:
+        for path in [DATABASE, f"{DATABASE}-wal", f"{DATABASE}-shm"]:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def test_default_profile_changes_nothing():
+    try:
+        create_table_queries()
+
+        connection = sql_program.open_connection(DATABASE)
+        assert connection.execute("PRAGMA journal_mode;").fetchone() == ('delete',)
+        connection.close()
+    finally:
+        os.remove(DATABASE)
+
+
+def test_apply_profile_raises_with_unknown_profile():
+    connection = sqlite3.connect(":memory:")
+    with pytest.raises(AssertionError):
+        sql_program.apply_profile(connection, 'turbo')
+    connection.close()
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=QUERY TABLE=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_parse_filter_returns_column_operator_and_value():
+    assert sql_program.parse_filter("regionid >= 2", FIELD_NAMES) == ('RegionID', '>=', '2')
+    assert sql_program.parse_filter("RegionDescription is not null", FIELD_NAMES) == (
+        'RegionDescription', 'IS NOT', None)
+    assert sql_program.parse_filter("RegionDescription not like %ern", FIELD_NAMES) == (
+        'RegionDescription', 'NOT LIKE', '%ern')
+
+
+def test_parse_filter_rejects_unknown_columns_and_operators():
+    for text in ["Planet = Mars", "RegionID ~ 2", "RegionID; DROP TABLE Regions = 1"]:
+        with pytest.raises(ValueError):
+            sql_program.parse_filter(text, FIELD_NAMES)
+
+
+def test_parse_order_reads_direction():
+    assert sql_program.parse_order("regionid DESC", FIELD_NAMES) == ('RegionID', True)
+    assert sql_program.parse_order("RegionID", FIELD_NAMES) == ('RegionID', False)
+
+    with pytest.raises(ValueError):
+        sql_program.parse_order("RegionID sideways", FIELD_NAMES)
+
+
+def test_build_query_binds_every_value():
+    sql, values = sql_program.build_query('Regions', [('RegionID', '>', '1')],
+                                          [('RegionDescription', True)], 5)
+
+    assert sql == ('SELECT * FROM Regions WHERE "RegionID" > ? '
+                   'ORDER BY "RegionDescription" DESC LIMIT ?;')
+    assert values == ['1', 5]
+
+
+def test_query_table_filters_sorts_and_limits_in_sqlite():
+    try:
+        create_table_queries()
+        insert_queries()
+
+        with sql_program.ConnectionManager(DATABASE) as manager:
+            data = sql_program.query_table('Regions', manager,
+                                           [('RegionDescription', 'LIKE', '%ern')],
+                                           [('RegionDescription', False)], 2)
+
+        assert data == [FIELD_NAMES, [(1, 'Eastern'), (3, 'Northern')]]
+    finally:
+        os.remove(DATABASE)
@@ -0,0 +1,104 @@
+"""This file tests table_export.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import csv
+import gzip
+import json
+import sqlite3
+
+import pytest
+import sql_program
+import table_export
+
+ROWS = [(1, 'Eastern', 1.5, None), (2, 'Western', 2.25, b'\x00\x01'),
+        (3, 'Northern', 3.0, 'text')]
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE Regions(RegionID INTEGER PRIMARY KEY, "
+                       "RegionDescription TEXT, Area REAL, Notes);")
+    connection.execute("CREATE TABLE Territories(TerritoryID INTEGER PRIMARY KEY, Name TEXT);")
+    connection.executemany("INSERT INTO Regions VALUES(?, ?, ?, ?);", ROWS)
+    connection.executemany("INSERT INTO Territories VALUES(?, ?);",
+                           [(num, f"Territory {num}") for num in range(1, 11)])
+    connection.commit()
+    connection.close()
+    return database
+
+
+# =-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=EXPORT=-=-=-=-=-=-=-=-=-=-=-=-=-=-=-=
+
+def test_export_table_writes_csv(tmp_path):
+    database = create_database(tmp_path)
+    report = table_export.export_table('Regions', database, str(tmp_path), batch_size=2)
+
+    assert report.rows == 3
+    with open(report.path, newline='', encoding='utf-8') as file:
+        rows = list(csv.reader(file))
+    assert rows == [['RegionID', 'RegionDescription', 'Area', 'Notes'],
+                    ['1', 'Eastern', '1.5', ''], ['2', 'Western', '2.25', 'AAE='],
+                    ['3', 'Northern', '3.0', 'text']]
+
+
+def test_export_query_writes_gzipped_jsonl(tmp_path):
+    database = create_database(tmp_path)
+    path = str(tmp_path / "regions.jsonl.gz")
+    sql = "SELECT RegionID, RegionDescription FROM Regions WHERE RegionID > ?;"
+    report = table_export.export_query(sql, [1], database, path, 'jsonl', True)
+
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        records = [json.loads(line) for line in file]
+
+    assert report.rows == 2
+    assert records == [{'RegionID': 2, 'RegionDescription': 'Western'},
+                       {'RegionID': 3, 'RegionDescription': 'Northern'}]
+
+
+def test_export_table_round_trips_columnar(tmp_path):
+    database = create_database(tmp_path)
+    report = table_export.export_table('Regions', database, str(tmp_path), 'columnar',
+                                       batch_size=2)
+
+    field_names, rows = table_export.read_columnar(report.path)
+    assert field_names == ['RegionID', 'RegionDescription', 'Area', 'Notes']
+    assert rows == ROWS
+    assert isinstance(rows[1][3], bytes)
+
+
+def test_columnar_round_trips_blobs():
+    values = [b'\x00\x01', None, b'', 'text']
+    kind, payload = table_export.encode_column(values)
+
+    assert kind == b'j'
+    assert table_export.decode_column(kind, payload, len(values)) == values
+    blobs = [b'\xff', b'ab']
+    assert table_export.decode_column(*table_export.encode_column(blobs), 2) == blobs
+
+
+def test_encode_column_picks_compact_kinds():
+    assert table_export.encode_column([1, 2])[0] == b'q'
+    assert table_export.encode_column([1.0, 2.5])[0] == b'd'
+    assert table_export.encode_column(['a', 'bc'])[0] == b's'
+    assert table_export.encode_column([1, None])[0] == b'j'
+
+
+def test_export_tables_in_parallel(tmp_path):
+    database = create_database(tmp_path)
+    with sql_program.ConnectionManager(database, pool_size=2) as manager:
+        reports = table_export.export_tables(['Regions', 'Territories'], manager,
+                                             str(tmp_path), 'columnar', True, workers=2)
+
+    assert [report.rows for report in reports] == [3, 10]
+    assert reports[1].path.endswith('Territories.col.gz')
+    assert table_export.read_columnar(reports[1].path)[1][-1] == (10, 'Territory 10')
+
+
+def test_export_query_raises_with_unknown_format(tmp_path):
+    database = create_database(tmp_path)
+    with pytest.raises(AssertionError):
+        table_export.export_query("SELECT 1;", None, database, str(tmp_path / "x"), 'xml')
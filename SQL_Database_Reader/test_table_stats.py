@@ -0,0 +1,66 @@
+"""This file tests table_stats.py using pytest.
+
+Run "pytest -vv" in the current directory to run these tests.
+"""
+import os
+import sqlite3
+
+import pytest
+import table_stats
+
+DATABASE = "database.db"
+
+
+def create_database(directory):
+    database = str(directory / DATABASE)
+    connection = sqlite3.connect(database)
+    connection.execute("CREATE TABLE Regions(RegionID INTEGER PRIMARY KEY, "
+                       "RegionDescription TEXT, Picture BLOB);")
+    connection.execute("CREATE TABLE Territories(TerritoryID INTEGER PRIMARY KEY, "
+                       "RegionID INT);")
+    connection.executemany("INSERT INTO Regions VALUES(?, ?, ?);",
+                           [(1, 'Eastern', b'\x00' * 10), (2, None, None), (3, 'Western', None),
+                            (4, 'Eastern', None)])
+    connection.executemany("INSERT INTO Territories VALUES(?, ?);",
+                           [(num, num % 3 or None) for num in range(1, 10)])
+    connection.commit()
+    connection.close()
+    return database
+
+
+def test_profile_table_counts_nulls_distinct_and_range(tmp_path):
+    database = create_database(tmp_path)
+    stats = table_stats.profile_table(database, 'Regions')
+
+    assert stats.rows == 4
+    assert stats.columns == [
+        table_stats.ColumnStats('RegionID', 0, 4, 1, 4),
+        table_stats.ColumnStats('RegionDescription', 1, 2, 'Eastern', 'Western'),
+        table_stats.ColumnStats('Picture', 3, 1, '<10 bytes>', '<10 bytes>')]
+    assert table_stats.null_ratio(stats, stats.columns[2]) == 0.75
+
+
+def test_collect_stats_in_processes_and_saves_them(tmp_path):
+    database = create_database(tmp_path)
+    stats = table_stats.collect_stats(database, workers=2)
+
+    assert [table.name for table in stats] == ['Regions', 'Territories']
+    assert stats[1].columns[1] == table_stats.ColumnStats('RegionID', 3, 2, 1, 2)
+    assert os.path.exists(table_stats.stats_path(database))
+    assert table_stats.load_stats(database, table_stats.database_version(database)) == stats
+
+
+def test_collect_stats_reuses_saved_stats_until_database_changes(tmp_path, monkeypatch):
+    database = create_database(tmp_path)
+    first = table_stats.collect_stats(database, workers=1)
+
+    monkeypatch.setattr(table_stats, 'profile_table', None)
+    assert table_stats.collect_stats(database, workers=1) == first
+
+    monkeypatch.undo()
+    connection = sqlite3.connect(database)
+    connection.execute("DELETE FROM Territories;")
+    connection.commit()
+    connection.close()
+
+    assert table_stats.collect_stats(database, workers=1)[1].rows == 0